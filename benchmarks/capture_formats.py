@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+'''
+Benchmark for the image formats screenshot utilities hand to gscreenshot.
+
+For each resolution and capture format this measures:
+    encode: the time a utility spends writing the image (simulated with PIL)
+    decode: the time gscreenshot spends turning those bytes into a Screenshot
+    total:  the capture-to-Screenshot latency, excluding the grab itself
+
+Usage:
+    PYTHONPATH=src python benchmarks/capture_formats.py [--repeat N] [--real]
+
+--real additionally times the screenshot backend gscreenshot would use on
+this machine, once per format it supports.
+'''
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshooter.screenshooter import CAPTURE_FORMAT_COSTS
+
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+
+def make_frame(size):
+    '''Makes a screenshot-like image: flat panels, a gradient and some "text"'''
+    width, height = size
+    gradient = Image.linear_gradient("L").resize((width, height))
+    frame = Image.merge("RGB", (gradient, gradient.rotate(90).resize((width, height)), gradient))
+
+    draw = ImageDraw.Draw(frame)
+    draw.rectangle((0, 0, width, height // 20), fill=(40, 40, 48))
+    draw.rectangle(
+        (width // 10, height // 8, width // 2, height - height // 8), fill=(250, 250, 250)
+    )
+    for line in range(height // 8, height - height // 8, 18):
+        draw.text((width // 10 + 10, line), "gscreenshot capture benchmark " * 4, fill=(20, 20, 20))
+
+    return frame
+
+
+def time_call(func, repeat):
+    '''Median wall clock time of func in milliseconds'''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+def encode(frame, capture_format):
+    '''Encode a frame the way a backend would'''
+    data = io.BytesIO()
+    frame.save(data, capture_format.upper())
+    return data.getvalue()
+
+
+def decode(payload):
+    '''Decode the bytes the way Screenshooter._call_screenshooter does'''
+    return Screenshot.from_bytes(payload).get_image()
+
+
+def run_synthetic(repeat):
+    '''Simulated encode/decode for each resolution'''
+    print(f"{'resolution':<12}{'format':<8}{'size MiB':>10}{'encode ms':>12}"
+          f"{'decode ms':>12}{'total ms':>12}")
+
+    for name, size in RESOLUTIONS.items():
+        frame = make_frame(size)
+        for capture_format in CAPTURE_FORMAT_COSTS:
+            payload = encode(frame, capture_format)
+            encode_ms = time_call(lambda: encode(frame, capture_format), repeat)
+            decode_ms = time_call(lambda: decode(payload), repeat)
+            print(f"{name:<12}{capture_format:<8}{len(payload) / 2**20:>10.1f}"
+                  f"{encode_ms:>12.1f}{decode_ms:>12.1f}{encode_ms + decode_ms:>12.1f}")
+
+
+def run_real(repeat):
+    '''Time the detected backend end to end for each format it supports'''
+    # pylint: disable=import-outside-toplevel
+    from gscreenshot.screenshooter import get_screenshooter
+
+    screenshooter = get_screenshooter()
+    formats = screenshooter.get_capture_formats()
+    print()
+    print(f"backend: {screenshooter.__utilityname__}")
+
+    for capture_format in formats:
+        screenshooter.get_capture_formats = lambda f=capture_format: [f]
+        total_ms = time_call(lambda: screenshooter.grab_fullscreen_() or
+                             screenshooter.screenshot.get_image(), repeat)
+        print(f"{capture_format:<8}{total_ms:>12.1f} ms")
+
+
+def main():
+    '''Run the benchmark'''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--real', action='store_true')
+    args = parser.parse_args()
+
+    run_synthetic(args.repeat)
+
+    if args.real:
+        run_real(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
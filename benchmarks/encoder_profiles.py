@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+'''
+Benchmark for the encoder profiles gscreenshot saves screenshots with.
+
+Each image in a corpus of synthetic screenshot-like images is encoded
+with every profile in every format the profiles tune, and the encode
+time and file size are reported. The corpus covers:
+    text:      dark text on a light page, like a terminal or a document
+    flat-ui:   flat panels, buttons and borders
+    gradient:  smooth gradients, like a desktop background
+    photo:     noisy, blurred content, like a photo or a video frame
+
+Usage:
+    PYTHONPATH=src python benchmarks/encoder_profiles.py [--repeat N] [--size WxH]
+'''
+import argparse
+import io
+import statistics
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from gscreenshot.encoder import ENCODER_PROFILES, get_encoder_options
+
+
+def make_text(size):
+    '''A page of text'''
+    width, height = size
+    image = Image.new("RGB", size, (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    for line in range(8, height - 16, 14):
+        draw.text((8, line), f"{line:>5} gscreenshot encoder benchmark " * (width // 220 + 1),
+                  fill=(30, 30, 30))
+    return image
+
+
+def make_flat_ui(size):
+    '''Flat panels, buttons and borders'''
+    width, height = size
+    image = Image.new("RGB", size, (236, 236, 240))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, width, 40), fill=(48, 52, 64))
+    draw.rectangle((0, 40, width // 5, height), fill=(220, 222, 228))
+    for row in range(60, height - 40, 48):
+        for column in range(width // 5 + 20, width - 140, 160):
+            draw.rounded_rectangle((column, row, column + 140, row + 32), 6,
+                                   fill=(66, 133, 244), outline=(40, 90, 200), width=2)
+            draw.text((column + 12, row + 10), "Button", fill=(255, 255, 255))
+    return image
+
+
+def make_gradient(size):
+    '''Smooth gradients'''
+    width, height = size
+    gradient = Image.linear_gradient("L").resize(size)
+    radial = Image.radial_gradient("L").resize(size)
+    return Image.merge("RGB", (gradient, radial, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+
+def make_photo(size):
+    '''Noisy, blurred content'''
+    channels = [
+        Image.effect_noise(size, sigma).filter(ImageFilter.GaussianBlur(radius))
+        for sigma, radius in ((80, 2), (60, 3), (40, 1))
+    ]
+    return Image.merge("RGB", channels)
+
+
+CORPUS = {
+    "text": make_text,
+    "flat-ui": make_flat_ui,
+    "gradient": make_gradient,
+    "photo": make_photo,
+}
+
+
+def time_call(func, repeat):
+    '''Median wall clock time of func in milliseconds'''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+def encode(image, file_type, options):
+    '''Encode an image the way SaveAction does'''
+    data = io.BytesIO()
+    image.save(data, file_type.upper(), **options)
+    return data.getvalue()
+
+
+def main():
+    '''Run the benchmark'''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--size', default="1920x1080")
+    args = parser.parse_args()
+
+    size = tuple(int(i) for i in args.size.split("x"))
+    file_types = sorted({file_type for profile in ENCODER_PROFILES.values()
+                         for file_type in profile})
+
+    print(f"{'image':<10}{'format':<8}{'profile':<10}{'encode ms':>12}{'KiB':>10}")
+
+    for name, make_image in CORPUS.items():
+        image = make_image(size)
+        for file_type in file_types:
+            for profile in ENCODER_PROFILES:
+                options = get_encoder_options(file_type, profile)
+                payload = encode(image, file_type, options)
+                encode_ms = time_call(lambda: encode(image, file_type, options), args.repeat)
+                print(f"{name:<10}{file_type:<8}{profile:<10}{encode_ms:>12.1f}"
+                      f"{len(payload) / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+'''
+Benchmark for handing PIL images to GTK as GdkPixbufs.
+
+For each image size this compares:
+    encoded: writing the image as PPM and reading it back with a PixbufLoader
+    raw:     wrapping the image's pixels with GdkPixbuf.Pixbuf.new_from_bytes
+
+The sizes cover full screenshots (used for the clipboard) as well as
+typical preview sizes (used every time the window is resized).
+
+Usage:
+    PYTHONPATH=src python benchmarks/pixbuf_conversion.py [--repeat N]
+'''
+import argparse
+import statistics
+import time
+
+from PIL import Image
+
+from gscreenshot.frontend.gtk.util import image_to_pixbuf_encoded, image_to_pixbuf_raw
+
+
+SIZES = {
+    "preview": (640, 360),
+    "large preview": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+
+def time_call(func, repeat):
+    '''Median wall clock time of func in milliseconds'''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+def main():
+    '''Run the benchmark'''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':<16}{'mode':<6}{'encoded ms':>12}{'raw ms':>12}{'speedup':>10}")
+
+    for name, size in SIZES.items():
+        for mode in ("RGB", "RGBA"):
+            image = Image.linear_gradient("L").resize(size).convert(mode)
+            encoded_ms = time_call(lambda: image_to_pixbuf_encoded(image), args.repeat)
+            raw_ms = time_call(lambda: image_to_pixbuf_raw(image), args.repeat)
+            print(f"{name:<16}{mode:<6}{encoded_ms:>12.1f}{raw_ms:>12.1f}"
+                  f"{encoded_ms / raw_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
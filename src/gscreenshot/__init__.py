@@ -10,18 +10,28 @@
  - Updated to use modern libraries and formats
  - Further changes will be noted in release notes
 '''
+from concurrent.futures import Future
 from dataclasses import asdict
 import gettext
 import locale
 import logging
 import os
 import sys
+import time
 import typing
 
 from PIL import Image
 from gscreenshot.actions import NotifyAction
+from gscreenshot.burst import BurstCapture, BurstStats
 from gscreenshot.cache import GscreenshotCache
+from gscreenshot.collection_saver import CollectionSaver
 from gscreenshot.compat import deprecated, get_resource_file
+from gscreenshot.encoder import (
+    get_encoder_profiles,
+    get_encoder_service,
+    set_adaptive_palette,
+    set_default_encoder_profile,
+)
 from gscreenshot.meta import (
     get_app_icon,
     get_program_authors,
@@ -32,6 +42,7 @@ from gscreenshot.meta import (
     get_program_version,
     get_program_website,
 )
+from gscreenshot.scheduler import IntervalScheduler
 from gscreenshot.screenshot import ScreenshotCollection
 from gscreenshot.screenshooter import Screenshooter, get_screenshooter
 
@@ -42,7 +53,9 @@ from gscreenshot.screenshot.actions import (
     ScreenshotActionError,
     XdgOpenAction
 )
+from gscreenshot.screenshot.effects.glyphs import get_glyph
 from gscreenshot.screenshot.screenshot import Screenshot
+from gscreenshot.watch import RegionWatcher, WatchStats, XDamageMonitor
 from gscreenshot.util import (
     get_supported_formats,
     session_is_mismatched,
@@ -97,7 +110,17 @@ class Gscreenshot():
             pass
 
         self.screenshooter = get_screenshooter(screenshooter)
-        self._screenshots = ScreenshotCollection()
+        cache = GscreenshotCache.load()
+        memory_budget = cache.screenshot_memory_budget
+        self._screenshots = ScreenshotCollection(
+            memory_budget=memory_budget * 1024 * 1024 if memory_budget > 0 else None
+        )
+
+        if cache.encoder_profile in get_encoder_profiles():
+            set_default_encoder_profile(cache.encoder_profile)
+        else:
+            log.warning("unknown encoder profile '%s' in cache", cache.encoder_profile)
+        set_adaptive_palette(cache.adaptive_palette)
 
         self._stamps = {}
         self._select_color = None
@@ -134,6 +157,22 @@ class Gscreenshot():
         log.debug("set select color to '%s'", select_color_rgba)
         self._select_color = select_color_rgba
 
+    def set_encoder_profile(self, profile: str):
+        '''
+        Set how screenshots are encoded when saved, one of
+        get_encoder_profiles()
+        '''
+        log.debug("set encoder profile to '%s'", profile)
+        set_default_encoder_profile(profile)
+
+    def set_adaptive_palette(self, enabled: bool):
+        '''
+        Set whether PNGs are saved with a palette when that doesn't
+        lose any colours
+        '''
+        log.debug("set adaptive palette to '%s'", enabled)
+        set_adaptive_palette(enabled)
+
     def set_select_border_weight(self, select_border_weight: typing.Optional[int]):
         '''Set the border weight for region selection'''
         log.debug("set select border weight to '%s'", select_border_weight)
@@ -168,7 +207,7 @@ class Gscreenshot():
             log.info("cursor glyph path '%s' does not exist", fname)
             return None
 
-        glyph = Image.open(fname).convert("RGBA")
+        glyph = get_glyph(fname)
         if name is None:
             name = os.path.basename(fname)
 
@@ -199,15 +238,9 @@ class Gscreenshot():
 
         available: typing.Dict[str, typing.Optional[Image.Image]] = {
             'theme': None,
-            'adwaita': Image.open(
-                adwaita_path
-            ),
-            'prohibit': Image.open(
-                prohibit_path
-            ),
-            'allow': Image.open(
-                allow_path
-            )
+            'adwaita': get_glyph(adwaita_path),
+            'prohibit': get_glyph(prohibit_path),
+            'allow': get_glyph(allow_path),
         }
 
         if session_is_wayland():
@@ -313,6 +346,230 @@ class Gscreenshot():
 
         return None
 
+    #pylint: disable=too-many-arguments
+    def screenshot_output(self, output: str, delay: int=0, capture_cursor: bool=False,
+                          cursor_name: typing.Optional[str]=None,
+                          overwrite: bool=False, count: int=1
+                          ) -> typing.Optional[Image.Image]:
+        """
+        Takes a screenshot of a single output (monitor) with a
+        given delay.
+
+        Parameters:
+            str output: the name of the output, such as "DP-1"
+            int delay: seconds to wait before taking screenshot
+
+        Returns:
+            PIL.Image
+        """
+        if not capture_cursor:
+            use_cursor = None
+        else:
+            use_cursor = self.get_cursor_by_name(cursor_name)
+
+        screenshot = None
+
+        for _ in range(0, count):
+            self.screenshooter.grab_output_(
+                output,
+                delay,
+                capture_cursor,
+                use_cursor=use_cursor
+            )
+
+            screenshot = self.screenshooter.screenshot
+
+            if screenshot is not None:
+                if overwrite:
+                    self._screenshots.replace(screenshot)
+                else:
+                    self._screenshots.insert(screenshot)
+
+        self.run_display_mismatch_warning()
+
+        if screenshot:
+            return screenshot.get_image()
+
+        return None
+
+    #pylint: disable=too-many-arguments
+    def screenshot_burst(self, count: int, interval_ms: float=0,
+                         foldername: typing.Optional[str]=None,
+                         delay: int=0, capture_cursor: bool=False,
+                         cursor_name: typing.Optional[str]=None,
+                         region: typing.Optional[typing.Tuple[int, int, int, int]]=None,
+                         output: typing.Optional[str]=None) -> BurstStats:
+        """
+        Takes a burst of screenshots of the full display, a region
+        or an output, one every interval_ms milliseconds. The
+        screenshots are saved to foldername as they're taken rather
+        than kept in the screenshot collection.
+
+        Parameters:
+            int count: the number of screenshots to take
+            float interval_ms: the target time between screenshots
+            int delay: seconds to wait before the first screenshot
+
+        Returns:
+            BurstStats
+        """
+        if foldername is None:
+            foldername = get_time_foldername(None)
+
+        # Every frame of a burst is wanted, even if some are late
+        scheduler = IntervalScheduler(interval_ms, max_frames=count, skip_if_behind=False)
+
+        return self._run_burst(
+            scheduler,
+            os.path.join(foldername, "gscreenshot-$n.png"),
+            delay, capture_cursor, cursor_name, region, output
+        )
+
+    #pylint: disable=too-many-arguments
+    def screenshot_timelapse(self, interval_ms: float,
+                             filename: typing.Optional[str]=None,
+                             max_frames: typing.Optional[int]=None,
+                             max_duration: typing.Optional[float]=None,
+                             skip_if_behind: bool=True,
+                             delay: int=0, capture_cursor: bool=False,
+                             cursor_name: typing.Optional[str]=None,
+                             region: typing.Optional[typing.Tuple[int, int, int, int]]=None,
+                             output: typing.Optional[str]=None) -> BurstStats:
+        """
+        Takes a screenshot of the full display, a region or an output
+        every interval_ms milliseconds until max_frames screenshots
+        were taken or max_duration seconds have passed. Without either
+        it runs until it's interrupted.
+
+        Screenshots are saved to filename as they're taken. "$n" in the
+        filename is replaced with the sequence number of the screenshot.
+        A filename without "$n" gets one added, and a filename without
+        a file extension is treated as a folder.
+
+        Parameters:
+            float interval_ms: the time between screenshots
+            bool skip_if_behind: skip screenshots which can't be taken
+                on time rather than taking them late
+            int delay: seconds to wait before the first screenshot
+
+        Returns:
+            BurstStats
+        """
+        filename = self._get_sequence_filename(filename)
+
+        scheduler = IntervalScheduler(
+            interval_ms,
+            max_frames=max_frames,
+            max_duration=max_duration,
+            skip_if_behind=skip_if_behind
+        )
+
+        return self._run_burst(
+            scheduler, filename, delay, capture_cursor, cursor_name, region, output
+        )
+
+    #pylint: disable=too-many-arguments
+    def screenshot_watch(self, region: typing.Tuple[int, int, int, int],
+                         interval_ms: float, filename: typing.Optional[str]=None,
+                         threshold: float=0.01,
+                         max_frames: typing.Optional[int]=None,
+                         max_duration: typing.Optional[float]=None,
+                         delay: int=0, capture_cursor: bool=False,
+                         cursor_name: typing.Optional[str]=None) -> WatchStats:
+        """
+        Watches a region of the screen, checking it every interval_ms
+        milliseconds, and saves a screenshot of it whenever more than
+        threshold (0 to 1) of it changed since the last screenshot
+        saved. Runs until max_frames screenshots were saved, max_duration
+        seconds have passed or it's interrupted.
+
+        Screenshots are saved to filename as with screenshot_timelapse.
+
+        Parameters:
+            tuple region: (left, upper, right, lower)
+            float interval_ms: the time between checks
+            float threshold: the fraction of the region which has to
+                change for a screenshot to be saved
+            int delay: seconds to wait before watching
+
+        Returns:
+            WatchStats
+        """
+        if not capture_cursor:
+            use_cursor = None
+        else:
+            use_cursor = self.get_cursor_by_name(cursor_name)
+
+        def capture() -> typing.Optional[Screenshot]:
+            self.screenshooter.grab_region_(region, 0, capture_cursor, use_cursor)
+            return self.screenshooter.screenshot
+
+        if delay:
+            time.sleep(delay)
+
+        watcher = RegionWatcher(
+            capture,
+            region,
+            self._get_sequence_filename(filename),
+            IntervalScheduler(interval_ms, max_duration=max_duration),
+            threshold=threshold,
+            max_frames=max_frames,
+            damage_monitor=XDamageMonitor.create(),
+        )
+
+        stats = watcher.run()
+        self.run_display_mismatch_warning()
+
+        return stats
+
+    @staticmethod
+    def _get_sequence_filename(filename: typing.Optional[str]) -> str:
+        """
+        Get a filename for a series of screenshots. A filename without
+        "$n" gets one added, and a filename without a file extension is
+        treated as a folder.
+        """
+        if filename is None:
+            return os.path.join(get_time_foldername(None), "gscreenshot-$n.png")
+
+        if "$n" not in filename:
+            name, extension = os.path.splitext(filename)
+            if extension:
+                return f"{name}-$n{extension}"
+
+            return os.path.join(filename, "gscreenshot-$n.png")
+
+        return filename
+
+    #pylint: disable=too-many-arguments
+    def _run_burst(self, scheduler: IntervalScheduler, filename: str, delay: int=0,
+                   capture_cursor: bool=False, cursor_name: typing.Optional[str]=None,
+                   region: typing.Optional[typing.Tuple[int, int, int, int]]=None,
+                   output: typing.Optional[str]=None) -> BurstStats:
+        """Runs a burst or timelapse"""
+        if not capture_cursor:
+            use_cursor = None
+        else:
+            use_cursor = self.get_cursor_by_name(cursor_name)
+
+        def capture() -> typing.Optional[Screenshot]:
+            if output is not None:
+                self.screenshooter.grab_output_(output, 0, capture_cursor, use_cursor)
+            elif region is not None:
+                self.screenshooter.grab_region_(region, 0, capture_cursor, use_cursor)
+            else:
+                self.screenshooter.grab_fullscreen_(0, capture_cursor, use_cursor)
+
+            return self.screenshooter.screenshot
+
+        if delay:
+            time.sleep(delay)
+
+        stats = BurstCapture(capture, filename, scheduler).run()
+        self.run_display_mismatch_warning()
+
+        return stats
+
     #pylint: disable=too-many-arguments
     def screenshot_selected(self, delay: int=0, capture_cursor: bool=False,
                             cursor_name: typing.Optional[str]=None,
@@ -490,11 +747,42 @@ class Gscreenshot():
         """
         return SaveTmpfileAction().execute(self._screenshots.cursor_current())
 
-    def save_screenshot_collection(self, foldername: typing.Optional[str]=None) -> bool:
+    def save_screenshot_collection(
+        self,
+        foldername: typing.Optional[str]=None,
+        progress: typing.Optional[typing.Callable[[int, int], typing.Any]]=None
+    ) -> bool:
         '''
-        Saves every image in the current screenshot collection
+        Saves every image in the current screenshot collection.
+        progress is called with (saved, total) after each image.
         '''
+        return self._save_screenshots(
+            self._get_collection_foldername(foldername), list(self._screenshots), progress
+        )
 
+    def save_screenshot_collection_async(
+        self,
+        foldername: typing.Optional[str]=None,
+        callback: typing.Optional[typing.Callable[["Future[bool]"], typing.Any]]=None,
+        progress: typing.Optional[typing.Callable[[int, int], typing.Any]]=None
+    ) -> "Future[bool]":
+        '''
+        Saves every image in the current screenshot collection with
+        the encoder service. callback is called with the future once
+        every image is written, and progress with (saved, total) after
+        each image.
+        '''
+        return get_encoder_service().submit(
+            self._save_screenshots,
+            self._get_collection_foldername(foldername),
+            list(self._screenshots),
+            progress,
+            callback=callback
+        )
+
+    @staticmethod
+    def _get_collection_foldername(foldername: typing.Optional[str]) -> str:
+        '''Works out and creates the folder to save a collection to'''
         if foldername is None:
             foldername = get_time_foldername(None)
         else:
@@ -506,13 +794,25 @@ class Gscreenshot():
             except (IOError, OSError) as exc:
                 log.info("failed to make tree '%s': %s", foldername, exc)
 
-        i = 0
-        for screenshot in self._screenshots:
-            i += 1
-            fname = os.path.join(foldername, f"gscreenshot-{i}.png")
-            SaveAction(filename=fname, overwrite=False).execute(screenshot)
+        return foldername
+
+    def _save_screenshots(
+        self,
+        foldername: str,
+        screenshots: typing.List[Screenshot],
+        progress: typing.Optional[typing.Callable[[int, int], typing.Any]]=None
+    ) -> bool:
+        '''
+        Saves screenshots to a folder. Returns whether every one was
+        written - existing files aren't overwritten.
+        '''
+        saved = CollectionSaver(
+            foldername,
+            memory_budget=self._screenshots.get_memory_stats().budget,
+            progress=progress,
+        ).save(screenshots)
 
-        return True
+        return saved == len(screenshots)
 
     @deprecated(
         "deprecated 3.9.0. Use SaveAction(filename=... , update_cache=True).execute instead"
@@ -0,0 +1,240 @@
+'''
+Burst and timelapse capture for gscreenshot
+
+Both take a series of screenshots on a schedule. Capturing runs on its
+own thread and hands frames to a bounded queue, which a pool of workers
+drains by encoding and saving each frame. Capture is never held up by
+encoding - if the workers fall behind and the queue is full, the frame
+is dropped instead.
+'''
+from dataclasses import dataclass, field
+import logging
+import os
+import queue
+import statistics
+import threading
+import time
+import typing
+
+from gscreenshot.filename import interpolate_filename
+from gscreenshot.scheduler import IntervalScheduler
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.actions import SaveAction, ScreenshotActionError
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class BurstStats():
+    '''
+    Results of a burst or timelapse. Latencies are in milliseconds.
+
+    frames_requested: the maximum number of frames, if there was one
+    foldername: where the frames were saved, once the burst has run
+    frames_skipped: frames skipped to get back on schedule
+
+    capture: time spent in the screenshot backend for each frame
+    queued:  time each frame waited for an encode worker
+    encode:  time spent encoding and writing each frame
+    total:   time from the start of each capture until it was saved
+    '''
+    frames_requested: typing.Optional[int]
+    interval_ms: float
+    foldername: str = ""
+    frames_captured: int = 0
+    frames_saved: int = 0
+    frames_dropped: int = 0
+    frames_failed: int = 0
+    frames_skipped: int = 0
+    elapsed: float = 0
+    capture_ms: typing.List[float] = field(default_factory=list)
+    queued_ms: typing.List[float] = field(default_factory=list)
+    encode_ms: typing.List[float] = field(default_factory=list)
+    total_ms: typing.List[float] = field(default_factory=list)
+
+    def fps(self) -> float:
+        '''The rate frames were captured at'''
+        if self.elapsed <= 0:
+            return 0
+
+        return self.frames_captured / self.elapsed
+
+    def report(self) -> str:
+        '''A human readable summary of the burst'''
+        target = f"{1000 / self.interval_ms:.1f} fps" if self.interval_ms > 0 else "unlimited"
+        saved = f"{self.frames_saved}"
+        if self.frames_requested is not None:
+            saved = f"{saved}/{self.frames_requested}"
+
+        lines = [
+            f"{saved} frames saved in {self.elapsed:.2f}s: "
+            f"{self.fps():.1f} fps (target {target}), {self.frames_dropped} dropped, "
+            f"{self.frames_skipped} skipped, {self.frames_failed} failed",
+        ]
+
+        for name, timings in (
+            ("capture", self.capture_ms),
+            ("queued", self.queued_ms),
+            ("encode", self.encode_ms),
+            ("total", self.total_ms),
+        ):
+            if not timings:
+                continue
+
+            lines.append(
+                f"{name:<8} mean {statistics.mean(timings):.1f} ms, "
+                f"p95 {self._percentile(timings, 95):.1f} ms, max {max(timings):.1f} ms"
+            )
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _percentile(timings: typing.List[float], percentile: int) -> float:
+        '''Nearest-rank percentile'''
+        ordered = sorted(timings)
+        rank = max(0, min(len(ordered) - 1, round(percentile / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+
+@dataclass
+class _Frame():
+    '''A captured frame waiting to be saved'''
+    number: int
+    screenshot: Screenshot
+    capture_started: float
+    captured: float
+
+
+class BurstCapture():
+    '''
+    Runs a burst or timelapse. capture is called on the capture thread
+    each time the scheduler says a frame is due, and returns the new
+    Screenshot or None if the capture failed.
+
+    Frames are saved with SaveAction to filename, where the "$n" token
+    is the frame's sequence number.
+    '''
+
+    _capture: typing.Callable[[], typing.Optional[Screenshot]]
+    _filename: str
+    _scheduler: IntervalScheduler
+    _workers: int
+    _queue: "queue.Queue[typing.Optional[_Frame]]"
+    _stats: BurstStats
+    _lock: threading.Lock
+
+    #pylint: disable=too-many-arguments
+    def __init__(self, capture: typing.Callable[[], typing.Optional[Screenshot]],
+                 filename: str, scheduler: IntervalScheduler,
+                 workers: typing.Optional[int] = None,
+                 queue_size: typing.Optional[int] = None):
+        '''constructor'''
+        self._capture = capture
+        self._filename = filename
+        self._scheduler = scheduler
+        self._workers = workers or min(4, os.cpu_count() or 1)
+        self._queue = queue.Queue(maxsize=queue_size or self._workers * 2)
+        self._stats = BurstStats(
+            frames_requested=scheduler.max_frames,
+            interval_ms=scheduler.interval_ms,
+            foldername=os.path.dirname(filename),
+        )
+        self._lock = threading.Lock()
+
+    def run(self) -> BurstStats:
+        '''
+        Run until the scheduler stops and wait for every frame to be
+        saved. Ctrl+C stops the schedule early.
+        '''
+        foldername = interpolate_filename(self._stats.foldername)
+        if foldername and not os.path.exists(foldername):
+            try:
+                os.makedirs(foldername)
+            except (IOError, OSError) as exc:
+                log.info("failed to make tree '%s': %s", foldername, exc)
+
+        # Report the folder the frames actually went to
+        self._stats.foldername = foldername or os.curdir
+
+        workers = [
+            threading.Thread(target=self._encode_frames, daemon=True)
+            for _ in range(self._workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        capture_thread = threading.Thread(target=self._capture_frames, daemon=True)
+        capture_thread.start()
+
+        try:
+            capture_thread.join()
+        except KeyboardInterrupt:
+            log.info("stopping after the current frame")
+            self._scheduler.stop()
+            capture_thread.join()
+
+        for _ in workers:
+            self._queue.put(None)
+
+        for worker in workers:
+            worker.join()
+
+        log.debug("burst finished: %s", self._stats)
+        return self._stats
+
+    def _capture_frames(self):
+        '''Capture thread'''
+        for number in self._scheduler:
+            capture_started = time.monotonic()
+            screenshot = self._capture()
+            captured = time.monotonic()
+
+            with self._lock:
+                self._stats.capture_ms.append((captured - capture_started) * 1000)
+
+                if screenshot is None:
+                    self._stats.frames_failed += 1
+                    continue
+
+                self._stats.frames_captured += 1
+
+            try:
+                self._queue.put_nowait(_Frame(number, screenshot, capture_started, captured))
+            except queue.Full:
+                log.debug("encode queue is full, dropping frame %s", number)
+                with self._lock:
+                    self._stats.frames_dropped += 1
+
+        with self._lock:
+            self._stats.elapsed = self._scheduler.elapsed
+            self._stats.frames_skipped = self._scheduler.skipped
+
+    def _encode_frames(self):
+        '''Encode worker'''
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+
+            dequeued = time.monotonic()
+
+            try:
+                saved = SaveAction(
+                    filename=self._filename, overwrite=False, sequence=frame.number
+                ).execute(frame.screenshot)
+            except ScreenshotActionError as exc:
+                log.warning("failed to save frame %s: %s", frame.number, exc)
+                saved = None
+
+            saved_at = time.monotonic()
+
+            with self._lock:
+                if saved is None:
+                    self._stats.frames_failed += 1
+                    continue
+
+                self._stats.frames_saved += 1
+                self._stats.queued_ms.append((dequeued - frame.captured) * 1000)
+                self._stats.encode_ms.append((saved_at - dequeued) * 1000)
+                self._stats.total_ms.append((saved_at - frame.capture_started) * 1000)
@@ -4,6 +4,9 @@ import gettext
 import json
 import logging
 import os
+import typing
+
+from gscreenshot.util import find_executable
 
 
 _ = gettext.gettext
@@ -32,6 +35,18 @@ class GscreenshotCache():
 
     stored_regions: dict = field(default_factory=dict)
 
+    screenshot_memory_budget: int = 1024
+    """
+    Megabytes of memory the screenshots of a session may use before the
+    least recently viewed are moved to disk. 0 for no limit.
+    """
+
+    encoder_profile: str = "balanced"
+    """How screenshots are encoded when saved: fast, balanced or smallest"""
+
+    adaptive_palette: bool = False
+    """Whether PNGs with at most 256 colours are saved with a palette"""
+
     def write(self) -> bool:
         """Writes the cache to disk"""
         try:
@@ -88,3 +103,138 @@ class GscreenshotCache():
         if 'XDG_CACHE_HOME' in os.environ:
             return os.environ['XDG_CACHE_HOME'] + "/gscreenshot"
         return os.path.expanduser("~/.gscreenshot")
+
+
+@dataclass
+class BackendProbeCache():
+    """
+    Cache of backend detection results between sessions
+
+    Detecting some backends means running them (e.g. "scrot --version"),
+    which is slow enough to be noticeable at startup. The results are
+    stored alongside the GscreenshotCache and are thrown away if the
+    session type or $PATH changes. Each result is also tied to the
+    modification times of the executables it depends on, so upgrading,
+    installing or removing one of them causes it to be probed again.
+    """
+
+    environment: str = ""
+    """Session type and $PATH the probes were run with"""
+
+    probes: dict = field(default_factory=dict)
+    """{probe name: {"mtimes": {executable: mtime}, "value": result}}"""
+
+    _instance: typing.ClassVar[typing.Optional["BackendProbeCache"]] = None
+
+    def write(self) -> bool:
+        """Writes the probe cache to disk"""
+        try:
+            with open(BackendProbeCache.get_cache_path(), "w", encoding="UTF-8") as cachefile:
+                json.dump(asdict(self), cachefile)
+                log.debug("wrote probe cache file '%s'", BackendProbeCache.get_cache_path())
+                return True
+        except (FileNotFoundError, PermissionError):
+            log.info("unable to save probe cache file")
+
+        return False
+
+    def probe(self, name: str, executables: typing.List[str],
+              probe_func: typing.Callable[[], typing.Any]) -> typing.Any:
+        """
+        Returns the cached result of a probe, running probe_func
+        if there is no valid cached result. The result must be
+        JSON serializable.
+
+        Parameters:
+            name: a unique name for the probe
+            executables: executables the result depends on
+            probe_func: runs the actual probe
+        """
+        mtimes = BackendProbeCache.get_executable_mtimes(executables)
+        cached = self.probes.get(name)
+
+        if cached is not None and cached.get("mtimes") == mtimes:
+            log.debug("using cached probe '%s' = %s", name, cached.get("value"))
+            return cached.get("value")
+
+        value = probe_func()
+        log.debug("probed '%s' = %s", name, value)
+
+        self.probes[name] = {"mtimes": mtimes, "value": value}
+        self.write()
+
+        return value
+
+    @staticmethod
+    def load() -> "BackendProbeCache":
+        """
+        Loads the probe cache from disk. This is only read once
+        per process.
+        """
+        if BackendProbeCache._instance is not None:
+            return BackendProbeCache._instance
+
+        environment = BackendProbeCache.get_environment()
+        cache = BackendProbeCache(environment=environment)
+
+        if os.path.isfile(BackendProbeCache.get_cache_path()):
+            with open(BackendProbeCache.get_cache_path(), "r", encoding="UTF-8") as cachefile:
+                try:
+                    stored = BackendProbeCache(**json.load(cachefile))
+                    if stored.environment == environment:
+                        cache = stored
+                    else:
+                        log.debug("session or $PATH changed - discarding probe cache")
+                except (json.JSONDecodeError, TypeError) as exc:
+                    log.warning(exc)
+
+        BackendProbeCache._instance = cache
+        return cache
+
+    @staticmethod
+    def clear():
+        """Forgets all probe results so backends are probed again"""
+        BackendProbeCache._instance = BackendProbeCache(
+            environment=BackendProbeCache.get_environment()
+        )
+        try:
+            os.unlink(BackendProbeCache.get_cache_path())
+            log.debug("removed probe cache file '%s'", BackendProbeCache.get_cache_path())
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def get_environment() -> str:
+        """The parts of the environment every probe result depends on"""
+        session_type = os.environ.get('XDG_SESSION_TYPE', '').lower()
+        return f"{session_type}:{os.environ.get('PATH', '')}"
+
+    @staticmethod
+    def get_executable_mtimes(executables: typing.List[str]
+                              ) -> typing.Dict[str, typing.Optional[float]]:
+        """
+        Resolves executables from $PATH and gets their modification
+        times, or None for executables that aren't installed
+        """
+        mtimes: typing.Dict[str, typing.Optional[float]] = {}
+        for executable in executables:
+            path = find_executable(executable)
+            try:
+                mtimes[executable] = os.path.getmtime(path) if path else None
+            except OSError:
+                mtimes[executable] = None
+
+        return mtimes
+
+    @staticmethod
+    def get_cache_path() -> str:
+        """
+        Find the gscreenshot probe cache file and return its path
+        """
+        return GscreenshotCache.get_cache_path() + "-probes"
+
+
+def cached_probe(name: str, executables: typing.List[str],
+                 probe_func: typing.Callable[[], typing.Any]) -> typing.Any:
+    """Convenience function for BackendProbeCache.load().probe"""
+    return BackendProbeCache.load().probe(name, executables, probe_func)
@@ -0,0 +1,184 @@
+'''
+Saving a whole collection of screenshots at once
+'''
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import typing
+
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.actions import SaveAction
+
+
+log = logging.getLogger(__name__)
+
+
+class CollectionSaver():
+    '''
+    Saves screenshots to a folder as gscreenshot-1.png, gscreenshot-2.png
+    and so on, numbered by their position in the list whatever order they
+    finish in.
+
+    PNG compression is CPU bound, so the images are encoded in a pool of
+    worker processes: one per available core, but no more than the
+    memory budget (in bytes) allows. Each image being encoded is held in
+    memory about three times over - rendered, pickled and unpickled in
+    its worker.
+
+    Starting a worker costs about as much as encoding a few megapixels
+    (each one imports gscreenshot), so smaller collections are saved on
+    this thread instead.
+
+    progress is called with (saved, total) after each screenshot.
+    '''
+
+    COPIES_PER_JOB = 3
+
+    # The fewest pixels in a collection worth starting workers for
+    MIN_POOL_PIXELS = 16 * 1000 * 1000
+
+    max_workers: typing.Optional[int]
+    memory_budget: typing.Optional[int]
+
+    def __init__(self, foldername: str, memory_budget: typing.Optional[int] = None,
+                 max_workers: typing.Optional[int] = None,
+                 progress: typing.Optional[typing.Callable[[int, int], typing.Any]] = None):
+        '''constructor'''
+        self._foldername = foldername
+        self._progress = progress
+        self.memory_budget = memory_budget
+        self.max_workers = max_workers
+
+    def get_filename(self, position: int) -> str:
+        '''The filename for the screenshot at a position in the list'''
+        return os.path.join(self._foldername, f"gscreenshot-{position + 1}.png")
+
+    def get_worker_count(self, screenshots: typing.List[Screenshot]) -> int:
+        '''How many worker processes to encode these screenshots with'''
+        try:
+            workers = len(os.sched_getaffinity(0))
+        except AttributeError: # not available on every platform
+            workers = os.cpu_count() or 1
+
+        if self.max_workers is not None:
+            workers = min(workers, self.max_workers)
+
+        pixels = sum(width * height for width, height in
+                     (screenshot.get_size() for screenshot in screenshots))
+        if pixels < self.MIN_POOL_PIXELS:
+            return 1
+
+        if self.memory_budget is not None and screenshots:
+            width, height = max(
+                (screenshot.get_size() for screenshot in screenshots),
+                key=lambda size: size[0] * size[1]
+            )
+            job_bytes = width * height * 3 * self.COPIES_PER_JOB
+            workers = min(workers, self.memory_budget // max(job_bytes, 1))
+
+        return max(1, min(workers, len(screenshots)))
+
+    def save(self, screenshots: typing.List[Screenshot]) -> int:
+        '''Save the screenshots. Returns how many were written.'''
+        workers = self.get_worker_count(screenshots)
+        if workers < 2:
+            return self._save_in_order(screenshots, range(len(screenshots)), 0)
+
+        try:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                # Forking a process with GTK's threads running isn't safe
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        except (OSError, ValueError, NotImplementedError) as exc:
+            log.info("unable to start encoder processes: %s", exc)
+            return self._save_in_order(screenshots, range(len(screenshots)), 0)
+
+        remaining = list(range(len(screenshots)))
+        saved = 0
+
+        with executor:
+            running: typing.Dict["Future[typing.Optional[str]]", int] = {}
+            try:
+                while remaining or running:
+                    # Only keep as many images in flight as there are workers,
+                    # so the rest aren't all rendered and pickled up front
+                    while remaining and len(running) < workers:
+                        position = remaining.pop(0)
+                        future = SaveAction(
+                            filename=self.get_filename(position), overwrite=False
+                        ).execute_in(screenshots[position], executor)
+                        running[future] = position
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    broken: typing.Optional[BrokenProcessPool] = None
+                    for future in done:
+                        position = running.pop(future)
+                        try:
+                            path = future.result()
+                        except BrokenProcessPool as exc:
+                            # The others in this batch may have been saved
+                            remaining.append(position)
+                            broken = exc
+                            continue
+
+                        if path is not None:
+                            saved += 1
+                        self._report(len(screenshots) - len(remaining) - len(running),
+                                     len(screenshots))
+
+                    if broken is not None:
+                        raise broken
+
+            except BrokenProcessPool as exc:
+                log.warning("encoder process failed, saving the rest here: %s", exc)
+
+                saved += self._collect_finished(running, remaining)
+
+        if remaining:
+            saved += self._save_in_order(
+                screenshots, remaining, len(screenshots) - len(remaining)
+            )
+
+        return saved
+
+    @staticmethod
+    def _collect_finished(running: typing.Dict["Future[typing.Optional[str]]", int],
+                          remaining: typing.List[int]) -> int:
+        '''
+        After the pool broke, count the screenshots which were written
+        anyway and add the positions of the rest to remaining, so that
+        only those are saved again. Returns how many were written.
+        '''
+        saved = 0
+        for future, position in running.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                if future.result() is not None:
+                    saved += 1
+            else:
+                remaining.append(position)
+
+        remaining.sort()
+        return saved
+
+    def _save_in_order(self, screenshots: typing.List[Screenshot],
+                       positions: typing.Iterable[int], done: int) -> int:
+        '''Save screenshots one after another on this thread'''
+        saved = 0
+        for position in positions:
+            if SaveAction(
+                filename=self.get_filename(position), overwrite=False
+            ).execute(screenshots[position]) is not None:
+                saved += 1
+
+            done += 1
+            self._report(done, len(screenshots))
+
+        return saved
+
+    def _report(self, done: int, total: int):
+        '''Report progress'''
+        if self._progress is not None:
+            self._progress(done, total)
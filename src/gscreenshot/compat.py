@@ -3,6 +3,8 @@ Compatibility functions
 """
 import warnings
 
+from PIL import Image
+
 try:
     from importlib.resources import as_file, files
 except ImportError:
@@ -46,6 +48,17 @@ def get_version():
     return require("gscreenshot")[0].version
 
 
+def get_pil_constant(enum: str, name: str):
+    """
+    Compatibility function for Pillow < 9.1, which has constants such
+    as Image.Resampling.LANCZOS directly on Image instead
+    """
+    try:
+        return getattr(getattr(Image, enum), name)
+    except AttributeError:
+        return getattr(Image, name)
+
+
 def deprecated(message):
     """Compatibility function for python < 3.13"""
     def deprecated_decorator(func):
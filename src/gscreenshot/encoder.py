@@ -0,0 +1,238 @@
+'''
+Encoding and writing of screenshots: encoder profiles and the
+background encoder service
+'''
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import typing
+from PIL import Image, ImageChops
+from gscreenshot.compat import get_pil_constant
+
+
+log = logging.getLogger(__name__)
+
+T = typing.TypeVar('T')
+
+# Options for PIL's Image.save, by profile name and image format.
+# "balanced" is what PIL does by default. "smallest" saves WebP
+# losslessly: text and flat interfaces, which most screenshots are,
+# come out many times smaller that way than lossy, and without
+# artifacts. Photo-like screenshots come out larger.
+ENCODER_PROFILES: typing.Dict[str, typing.Dict[str, typing.Dict[str, typing.Any]]] = {
+    "fast": {
+        "png": {"compress_level": 1},
+        "webp": {"method": 0, "lossless": False, "quality": 80},
+        "jpeg": {"subsampling": "4:2:0", "quality": 75},
+    },
+    "balanced": {
+        "png": {"compress_level": 6},
+        "webp": {"method": 4, "lossless": False, "quality": 80},
+        "jpeg": {"quality": 75},
+    },
+    "smallest": {
+        "png": {"compress_level": 9, "optimize": True},
+        "webp": {"method": 6, "lossless": True, "quality": 100},
+        "jpeg": {"subsampling": "4:2:0", "quality": 75, "optimize": True},
+    },
+}
+
+DEFAULT_ENCODER_PROFILE = "balanced"
+
+_default_profile = DEFAULT_ENCODER_PROFILE
+
+
+def get_encoder_profiles() -> typing.List[str]:
+    '''The names of the available encoder profiles'''
+    return list(ENCODER_PROFILES)
+
+
+def get_default_encoder_profile() -> str:
+    '''The encoder profile used when a save doesn't ask for one'''
+    return _default_profile
+
+
+def set_default_encoder_profile(profile: str):
+    '''Set the encoder profile used when a save doesn't ask for one'''
+    # pylint: disable=global-statement
+    global _default_profile
+
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"unknown encoder profile '{profile}'")
+
+    _default_profile = profile
+
+
+def get_encoder_options(file_type: str, profile: typing.Optional[str] = None
+                        ) -> typing.Dict[str, typing.Any]:
+    '''
+    The options to pass to PIL's Image.save to write file_type with
+    an encoder profile, or the default one
+    '''
+    if profile is None:
+        profile = _default_profile
+
+    if profile not in ENCODER_PROFILES:
+        log.warning("unknown encoder profile '%s', using '%s'", profile, DEFAULT_ENCODER_PROFILE)
+        profile = DEFAULT_ENCODER_PROFILE
+
+    return dict(ENCODER_PROFILES[profile].get(file_type, {}))
+
+
+# The largest side of the sample the colours of an image are counted
+# on before counting the colours of the whole image
+PALETTE_SAMPLE_SIZE = 256
+
+_adaptive_palette = False
+
+
+def get_adaptive_palette() -> bool:
+    '''Whether PNGs with few enough colours are saved with a palette'''
+    return _adaptive_palette
+
+
+def set_adaptive_palette(enabled: bool):
+    '''Set whether PNGs with few enough colours are saved with a palette'''
+    # pylint: disable=global-statement
+    global _adaptive_palette
+
+    _adaptive_palette = enabled
+
+
+def to_lossless_palette(image: Image.Image) -> typing.Optional[Image.Image]:
+    '''
+    A paletted copy of an RGB image, or None if it has more colours
+    than a palette can hold.
+
+    The colours of a small sample are counted first, so an image with
+    far too many colours is turned down without looking at all of it.
+    '''
+    if image.mode != "RGB":
+        log.debug("not using a palette for a %s image", image.mode)
+        return None
+
+    sample = image
+    if max(image.size) > PALETTE_SAMPLE_SIZE:
+        sample = image.copy()
+        sample.thumbnail(
+            (PALETTE_SAMPLE_SIZE, PALETTE_SAMPLE_SIZE), get_pil_constant("Resampling", "NEAREST")
+        )
+
+    if sample.getcolors(256) is None:
+        log.debug("not using a palette: the sampled image has more than 256 colours")
+        return None
+
+    colors = image.getcolors(256)
+    if colors is None:
+        log.debug("not using a palette: the image has more than 256 colours")
+        return None
+
+    palette = [channel for _, color in colors for channel in color]
+    palette_image = Image.new("P", (1, 1))
+    # Pad with the first colour so no pixel maps to an unused entry
+    palette_image.putpalette(palette + palette[:3] * (256 - len(colors)))
+    paletted = image.quantize(palette=palette_image, dither=get_pil_constant("Dither", "NONE"))
+
+    if not _is_same_image(paletted, image):
+        # PIL maps pixels onto a given palette through a coarse lookup
+        # table, which can mix up colours a few steps apart (as in
+        # antialiased text). Max coverage is slower but gives each
+        # colour its own entry when there are no more colours than
+        # entries. That's checked rather than relied on.
+        paletted = image.quantize(len(colors), method=get_pil_constant("Quantize", "MAXCOVERAGE"))
+        if not _is_same_image(paletted, image):
+            log.debug("not using a palette: the %d colours weren't kept exactly", len(colors))
+            return None
+
+    log.debug("using a palette of %d colours", len(colors))
+    return paletted
+
+
+def _is_same_image(paletted: Image.Image, image: Image.Image) -> bool:
+    '''Whether a paletted image has exactly the pixels of an RGB image'''
+    return ImageChops.difference(paletted.convert("RGB"), image).getbbox() is None
+
+
+class EncoderService():
+    '''
+    Runs jobs which encode and write screenshots on worker threads, so
+    a frontend's main loop isn't blocked while a large image is saved.
+
+    Every job gets a future. A callback passed along with the job is
+    called with that future once the job is done, on the worker thread,
+    before wait() considers the job finished. A frontend should use it
+    to hand the result back to its main loop (for example with idle_add).
+    '''
+
+    _pending: int
+
+    def __init__(self, max_workers: int = 2):
+        '''constructor'''
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="gscreenshot-encoder"
+        )
+        self._condition = threading.Condition()
+        self._pending = 0
+
+    def submit(self, func: typing.Callable[..., T], *args,
+               callback: typing.Optional[typing.Callable[["Future[T]"], typing.Any]] = None,
+               **kwargs) -> "Future[T]":
+        '''Run func(*args, **kwargs) on a worker thread'''
+        with self._condition:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except RuntimeError:
+            self._finished(None, None)
+            raise
+
+        future.add_done_callback(lambda future: self._finished(future, callback))
+        return future
+
+    def pending(self) -> int:
+        '''The number of jobs which haven't finished yet'''
+        with self._condition:
+            return self._pending
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        '''
+        Wait until every submitted job and its callback has finished.
+        Returns False if the timeout passed first.
+        '''
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self):
+        '''Finish the submitted jobs and stop the workers'''
+        self._executor.shutdown(wait=True)
+
+    def _finished(self, future: typing.Optional[Future],
+                  callback: typing.Optional[typing.Callable[[Future], typing.Any]]):
+        '''
+        Run a job's callback and mark it done. An error in the callback
+        is logged by the future it was called from.
+        '''
+        try:
+            if future is not None and callback is not None:
+                callback(future)
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+
+_service_lock = threading.Lock()
+_service: typing.Optional[EncoderService] = None
+
+
+def get_encoder_service() -> EncoderService:
+    '''Get the encoder service shared by the whole process'''
+    # pylint: disable=global-statement
+    global _service
+
+    with _service_lock:
+        if _service is None:
+            _service = EncoderService()
+
+        return _service
@@ -6,12 +6,14 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from gscreenshot.screenshot.screenshot import Screenshot
 
-def interpolate_filename(filename:str, screenshot: typing.Optional["Screenshot"] = None) -> str:
+def interpolate_filename(filename:str, screenshot: typing.Optional["Screenshot"] = None,
+                         sequence: typing.Optional[int] = None) -> str:
     '''
     Does interpolation of a filename, as the following:
         $$   a literal '$'
         $a   system hostname
         $h   image's height in pixels
+        $n   sequence number in a burst or timelapse, padded to 4 digits
         $p   image's size in pixels
         $w   image's width in pixels
 
@@ -28,14 +30,16 @@ def interpolate_filename(filename:str, screenshot: typing.Optional["Screenshot"]
         '$a': platform.node()
     }
 
-    if screenshot:
-        image = screenshot.get_image()
-        if image is not None:
-            general_replacements.update({
-                '$h': str(image.height),
-                '$p': str(image.height * image.width),
-                '$w': str(image.width)
-            })
+    if screenshot and ("$h" in filename or "$p" in filename or "$w" in filename):
+        width, height = screenshot.get_size()
+        general_replacements.update({
+            '$h': str(height),
+            '$p': str(height * width),
+            '$w': str(width)
+        })
+
+    if sequence is not None:
+        general_replacements['$n'] = f"{sequence:04d}"
 
     for fmt, replacement in general_replacements.items():
         interpolated = interpolated.replace(fmt, replacement)
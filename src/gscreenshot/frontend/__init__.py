@@ -6,6 +6,7 @@ import logging.config
 import signal
 import sys
 from gscreenshot.frontend import cli
+from gscreenshot.frontend import daemon
 from gscreenshot.frontend import gtk
 from .cli.args import get_args
 
@@ -85,6 +86,10 @@ def delegate():
         }
         logging.config.dictConfig(logging_config)
 
+        if args.daemon:
+            daemon.main()
+            return
+
         app = gscreenshot.frontend.cli.main()
 
         if args.gui and GTK_CAPABLE:
@@ -37,6 +37,12 @@ class AbstractGscreenshotView():
         """
         return
 
+    def update_save_progress(self, saved: int, total: int):
+        """
+        Show how many of the screenshots being saved are done
+        """
+        return
+
     def notify_copy_complete(self):
         """
         Show an indication that copying the file completed
@@ -4,6 +4,8 @@ import gettext
 import logging
 import sys
 
+from gscreenshot.encoder import get_encoder_profiles
+
 _ = gettext.gettext
 
 
@@ -38,12 +40,15 @@ def enable_gui(params) -> bool:
     return params.gui
 
 
-def get_log_level():
-    '''Get the log level from sys.argv'''
-    if "-v" in sys.argv:
+def get_log_level(args = None):
+    '''Get the log level from the arguments, defaulting to sys.argv'''
+    if args is None:
+        args = sys.argv
+
+    if "-v" in args:
         return logging.INFO
 
-    if "-vv" in sys.argv or "-vvv" in sys.argv:
+    if "-vv" in args or "-vvv" in args:
         return logging.DEBUG
 
     return logging.WARN
@@ -128,6 +133,84 @@ def get_args(args = None):
             default='',
             help=_("Use a stored region with this name for the screenshot.")
     )
+    parser.add_argument(
+            '--output',
+            required=False,
+            default='',
+            help=_("Take a screenshot of only the output (monitor) with this name, such as 'DP-1'.")
+    )
+    parser.add_argument(
+            '--burst',
+            required=False,
+            type=int,
+            default=0,
+            help=_("Take this many screenshots in a row and save them to a folder (see -f). Works with the full screen, --use-region and --output.")
+    )
+    parser.add_argument(
+            '--interval',
+            required=False,
+            type=float,
+            default=0,
+            help=_("With --burst, the number of milliseconds between screenshots. Defaults to 0, as fast as possible.")
+    )
+    parser.add_argument(
+            '--timelapse',
+            required=False,
+            type=float,
+            default=0,
+            metavar='SECONDS',
+            help=_("Take a screenshot every SECONDS seconds until stopped, or until --max-frames or --max-duration is reached. Screenshots are saved as they're taken using -f, where $n is the sequence number. Works with the full screen, --use-region and --output.")
+    )
+    parser.add_argument(
+            '--max-frames',
+            required=False,
+            type=int,
+            default=None,
+            help=_("With --timelapse or --watch, stop after this many screenshots.")
+    )
+    parser.add_argument(
+            '--max-duration',
+            required=False,
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help=_("With --timelapse or --watch, stop after this many seconds.")
+    )
+    parser.add_argument(
+            '--catch-up',
+            required=False,
+            action='store_true',
+            help=_("With --timelapse, take screenshots that are running late as soon as possible instead of skipping them.")
+    )
+    parser.add_argument(
+            '--watch',
+            required=False,
+            type=float,
+            default=0,
+            metavar='SECONDS',
+            help=_("Check the stored region given by --use-region every SECONDS seconds and save a screenshot each time it changes, until stopped or until --max-frames or --max-duration is reached. Screenshots are saved as with --timelapse.")
+    )
+    parser.add_argument(
+            '--threshold',
+            required=False,
+            type=float,
+            default=1,
+            metavar='PERCENT',
+            help=_("With --watch, the percentage of the region that has to change for a screenshot to be saved. Defaults to 1.")
+    )
+    parser.add_argument(
+            '--encoder-profile',
+            required=False,
+            default=None,
+            choices=get_encoder_profiles(),
+            help=_("How to encode saved screenshots: 'fast' to save quickly, 'smallest' for smaller files, or 'balanced'. Defaults to the last profile stored in the gscreenshot cache, which is 'balanced' unless changed.")
+    )
+    parser.add_argument(
+            '--adaptive-palette',
+            required=False,
+            action='store_true',
+            help=_("Save PNG screenshots with at most 256 colours, such as terminals and flat interfaces, with a palette. This loses no colours and makes the files several times smaller.")
+    )
     parser.add_argument(
             '--gui',
             required=False,
@@ -146,6 +229,18 @@ def get_args(args = None):
             default=5,
             help=_("Optional. The thickness of the border of the region selection box.")
     )
+    parser.add_argument(
+            '--daemon',
+            required=False,
+            action='store_true',
+            help=_("Run in the background and take screenshots for gscreenshot-client, which accepts the same options as gscreenshot-cli. This avoids gscreenshot's startup time on every screenshot.")
+    )
+    parser.add_argument(
+            '--reprobe',
+            required=False,
+            action='store_true',
+            help=_("Detect the available screenshot backends again instead of using the results remembered from a previous run.")
+    )
     parser.add_argument(
             '-v',
             required=False,
@@ -156,6 +251,6 @@ def get_args(args = None):
     parsed_args = parser.parse_args(args)
 
     parsed_args.gui = enable_gui(parsed_args)
-    parsed_args.log_level = get_log_level()
+    parsed_args.log_level = get_log_level(args)
 
     return parsed_args
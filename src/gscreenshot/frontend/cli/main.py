@@ -10,9 +10,13 @@ import typing
 
 from gscreenshot import Gscreenshot
 from gscreenshot.actions import NotifyAction
+from gscreenshot.burst import BurstStats
+from gscreenshot.cache import BackendProbeCache
+from gscreenshot.encoder import get_encoder_service
 from gscreenshot.frontend.cli.view import GscreenshotCli
 from gscreenshot.frontend.presenter import Presenter
 from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+from gscreenshot.watch import WatchStats
 from .args import get_args
 
 
@@ -22,6 +26,7 @@ _ = gettext.gettext
 
 def resume(app: typing.Optional[Gscreenshot]):
     '''Resume or finish a CLI session'''
+    get_encoder_service().wait()
     if not app or app.session.get("error", False):
         sys.exit(1)
     sys.exit(0)
@@ -29,6 +34,12 @@ def resume(app: typing.Optional[Gscreenshot]):
 
 def main(app: typing.Optional[Gscreenshot] = None, args = None):
     '''Run the CLI frontend'''
+    if not args:
+        args = get_args()
+
+    if args.reprobe:
+        BackendProbeCache.clear()
+
     try:
         gscreenshot = app or Gscreenshot()
     except NoSupportedScreenshooterError as gscreenshot_error:
@@ -40,9 +51,6 @@ def main(app: typing.Optional[Gscreenshot] = None, args = None):
             log.error(", ".join(gscreenshot_error.required))
         return None
 
-    if not args:
-        args = get_args()
-
     logging.basicConfig(level=args.log_level)
     view = GscreenshotCli(args)
     presenter = Presenter(gscreenshot, view)
@@ -58,12 +66,66 @@ def main(app: typing.Optional[Gscreenshot] = None, args = None):
             f"invalid border weight '{args.select_border_weight}'",
         )
     gscreenshot.set_select_color(args.select_color)
+    if args.encoder_profile:
+        gscreenshot.set_encoder_profile(args.encoder_profile)
+    if args.adaptive_palette:
+        gscreenshot.set_adaptive_palette(True)
     presenter.delay_value_changed(args.delay)
     presenter.capture_cursor_toggled(args.pointer)
     presenter.selected_cursor_changed(args.pointer_glyph)
 
+    if args.watch > 0 and not args.use_region:
+        log.error(_("--watch needs a stored region, see --use-region."))
+        gscreenshot.session["error"] = True
+        return gscreenshot
+
+    if args.burst > 0 or args.timelapse > 0 or args.watch > 0:
+        stats: typing.Union[BurstStats, WatchStats]
+        if args.watch > 0:
+            watch_stats = presenter.take_watch(
+                args.use_region,
+                args.watch * 1000,
+                filename=args.filename or None,
+                threshold=args.threshold / 100,
+                max_frames=args.max_frames,
+                max_duration=args.max_duration,
+            )
+            if watch_stats is None:
+                gscreenshot.session["error"] = True
+                return gscreenshot
+            stats = watch_stats
+        elif args.timelapse > 0:
+            stats = presenter.take_timelapse(
+                args.timelapse * 1000,
+                filename=args.filename or None,
+                max_frames=args.max_frames,
+                max_duration=args.max_duration,
+                skip_if_behind=not args.catch_up,
+                region_name=args.use_region or None,
+                output_name=args.output or None,
+            )
+        else:
+            stats = presenter.take_burst(
+                args.burst,
+                args.interval,
+                foldername=args.filename or None,
+                region_name=args.use_region or None,
+                output_name=args.output or None,
+            )
+        print(stats.report(), file=sys.stderr)
+
+        if stats.frames_saved < 1:
+            log.error(_("No screenshot taken."))
+            gscreenshot.session["error"] = True
+        else:
+            print(stats.foldername)
+
+        return gscreenshot
+
     if args.use_region:
         presenter.on_stored_region_selected(args.use_region)
+    elif args.output:
+        presenter.on_output_selected(args.output)
     elif args.selection is not False:
         presenter.on_button_selectarea_clicked()
         if args.save_region_as:
@@ -84,7 +146,10 @@ def main(app: typing.Optional[Gscreenshot] = None, args = None):
                 log.warning(_("failed to show screenshot notification - is notify-send working?"))
 
         if args.filename is not False or (args.clip is False and not args.gui):
-            saved_screenshot = presenter.on_button_saveas_clicked()
+            # The CLI would ask for the same filename again
+            saved_screenshot = presenter.on_button_saveas_clicked(retry=False)
+            if not presenter.wait_for_saves():
+                saved_screenshot = False
             if not saved_screenshot:
                 gscreenshot.session["error"] = True
 
@@ -96,7 +161,8 @@ def main(app: typing.Optional[Gscreenshot] = None, args = None):
 
         if args.clip is not False:
             if not presenter.on_button_copy_clicked():
-                presenter.on_button_saveas_clicked()
+                presenter.on_button_saveas_clicked(retry=False)
+                presenter.wait_for_saves()
                 tmp_file = screenshot.get_saved_path()
 
                 if tmp_file is not None:
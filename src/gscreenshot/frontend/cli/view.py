@@ -131,9 +131,9 @@ class GscreenshotCli(AbstractGscreenshotView):
 
     def idle_add(self, callback):
         """
-        Passthrough for GLib.idle_add
+        The CLI has no main loop, so the callback is run right away
         """
-        return
+        callback()
 
     def handle_preview_click_event(self, widget, event, *args):
         '''
@@ -0,0 +1,218 @@
+'''
+Resident capture daemon for gscreenshot
+
+The daemon keeps a warm Gscreenshot instance (imports, locale, backend
+detection and cursor glyphs) behind a UNIX socket. The gscreenshot-client
+entry point forwards its command line to the daemon, which runs it through
+the regular CLI frontend and sends back the output and exit status.
+'''
+import contextlib
+import gettext
+import io
+import logging
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import typing
+
+from gscreenshot import Gscreenshot
+from gscreenshot.encoder import get_adaptive_palette, get_default_encoder_profile
+from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+from gscreenshot_client import get_socket_path, receive_message, send_message
+from .cli.args import get_args
+from .cli.main import main as cli_main
+
+
+_ = gettext.gettext
+log = logging.getLogger(__name__)
+
+# Paths which would be the daemon's own streams rather than the client's
+_PROCESS_STREAMS = ("/dev/stdin", "/dev/stdout", "/dev/stderr")
+_PROCESS_STREAM_DIRS = ("/dev/fd/", "/proc/self/fd/", "/proc/thread-self/fd/")
+
+
+class CaptureDaemon():
+    '''
+    Serves capture requests from gscreenshot-client. Connections are
+    accepted concurrently but every request goes through a single
+    capture queue, so only one capture runs at a time.
+
+    Each request starts with the encoder settings the daemon started
+    with, and its screenshots are dropped once it's finished.
+    '''
+
+    _app: Gscreenshot
+    _socket_path: str
+    _requests: "queue.Queue[typing.Tuple[dict, queue.Queue]]"
+    _encoder_profile: str
+    _adaptive_palette: bool
+
+    def __init__(self, app: Gscreenshot, socket_path: typing.Optional[str] = None):
+        self._app = app
+        self._socket_path = socket_path or get_socket_path()
+        self._requests = queue.Queue()
+        self._encoder_profile = get_default_encoder_profile()
+        self._adaptive_palette = get_adaptive_palette()
+
+    def serve_forever(self):
+        '''Listen on the socket until the process is stopped'''
+        self._remove_stale_socket()
+
+        daemon = self
+
+        class RequestHandler(socketserver.BaseRequestHandler):
+            '''Passes a request to the capture queue and waits for it'''
+            def handle(self):
+                daemon.handle_connection(self.request)
+
+        worker = threading.Thread(target=self._process_requests, daemon=True)
+        worker.start()
+
+        old_umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self._socket_path, RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+        server.daemon_threads = True
+        log.info("gscreenshot daemon listening on '%s'", self._socket_path)
+
+        try:
+            with server:
+                server.serve_forever()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._socket_path)
+
+    def handle_connection(self, connection: socket.socket):
+        '''Read one request from a client and reply with its result'''
+        try:
+            request = receive_message(connection)
+        except ValueError as exc:
+            log.info("ignoring malformed request: %s", exc)
+            return
+
+        if request is None:
+            return
+
+        reply: queue.Queue = queue.Queue(maxsize=1)
+        self._requests.put((request, reply))
+        send_message(connection, reply.get())
+
+    def _process_requests(self):
+        '''Capture queue worker'''
+        while True:
+            request, reply = self._requests.get()
+            try:
+                reply.put(self.run_request(request.get("argv", []), request.get("cwd")))
+            # Whatever a request runs into, its client gets a reply and
+            # the daemon carries on with the next one.
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                log.warning("daemon request failed: %s", exc)
+                reply.put({"status": 1, "stdout": "", "stderr": f"{exc}\n"})
+
+    def run_request(self, argv: typing.List[str], cwd: typing.Optional[str] = None) -> dict:
+        '''
+        Run a command line through the CLI frontend using the warm
+        Gscreenshot instance.
+
+        Returns {"status": int, "stdout": str, "stderr": str}
+        '''
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                args = get_args(argv)
+        except SystemExit as exc:
+            # argparse exits on --help and on invalid arguments
+            status = exc.code if isinstance(exc.code, int) else 0
+            return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+        args.gui = False
+        args.daemon = False
+
+        if args.filename and is_process_stream(args.filename, cwd):
+            return {
+                "status": 2,
+                "stdout": "",
+                "stderr": _("gscreenshot-client can't write screenshots to '{0}'. "
+                            "Use gscreenshot-cli instead.").format(args.filename) + "\n",
+            }
+
+        self._app.session.pop("error", None)
+        self._app.set_encoder_profile(self._encoder_profile)
+        self._app.set_adaptive_palette(self._adaptive_palette)
+
+        log_handler = logging.StreamHandler(stderr)
+        log_handler.setLevel(args.log_level)
+        log_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
+        logging.getLogger().addHandler(log_handler)
+
+        # The working directory is shared by the whole daemon, so each
+        # request gets its client's and it's put back afterwards
+        old_cwd = os.getcwd()
+        status = 0
+        try:
+            if cwd:
+                os.chdir(cwd)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                result = cli_main(app=self._app, args=args)
+            if result is None or self._app.session.get("error", False):
+                status = 1
+        except SystemExit as exc:
+            status = exc.code if isinstance(exc.code, int) else 0
+        finally:
+            logging.getLogger().removeHandler(log_handler)
+            self._app.get_screenshot_collection().clear()
+            os.chdir(old_cwd)
+
+        return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+    def _remove_stale_socket(self):
+        '''Remove a socket left behind by a daemon that is no longer running'''
+        if not os.path.exists(self._socket_path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self._socket_path)
+            except OSError:
+                os.unlink(self._socket_path)
+                return
+
+        raise OSError(f"a gscreenshot daemon is already listening on '{self._socket_path}'")
+
+
+def is_process_stream(filename: str, cwd: typing.Optional[str] = None) -> bool:
+    '''
+    Whether filename is one of the process's own streams, such as
+    /dev/stdout. In the daemon these are its streams, not the client's.
+    '''
+    path = os.path.normpath(os.path.join(cwd or os.getcwd(), os.path.expanduser(filename)))
+    return path in _PROCESS_STREAMS or path.startswith(_PROCESS_STREAM_DIRS)
+
+
+def main(app: typing.Optional[Gscreenshot] = None):
+    '''Run the capture daemon'''
+    try:
+        gscreenshot = app or Gscreenshot()
+    except NoSupportedScreenshooterError as gscreenshot_error:
+        log.error(_("No supported screenshot backend is available."))
+        if gscreenshot_error.required is not None:
+            log.error(_("Please install one of the following to use gscreenshot:"))
+            log.error(", ".join(gscreenshot_error.required))
+        sys.exit(1)
+
+    # Warm up anything that's otherwise loaded lazily on the first capture
+    gscreenshot.get_available_cursors()
+    gscreenshot.get_capabilities()
+
+    try:
+        CaptureDaemon(gscreenshot).serve_forever()
+    except OSError as exc:
+        log.error("%s", exc)
+        sys.exit(1)
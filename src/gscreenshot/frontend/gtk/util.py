@@ -1,6 +1,7 @@
 #pylint: disable=wrong-import-order
 #pylint: disable=wrong-import-position
 import io
+import logging
 from gi import require_version
 
 require_version('Gtk', '3.0')
@@ -8,7 +9,47 @@ from gi.repository import GLib # type: ignore
 from gi.repository import GdkPixbuf # type: ignore
 
 
+log = logging.getLogger(__name__)
+
+
 def image_to_pixbuf(image):
+    '''
+    Converts a PIL image to a GdkPixbuf by handing its pixels straight
+    to GdkPixbuf, falling back to encoding and decoding it with an
+    image format if that fails.
+    '''
+    try:
+        return image_to_pixbuf_raw(image)
+    except (GLib.GError, TypeError, ValueError) as exc:
+        log.debug("falling back to encoding the pixbuf: %s", exc)
+
+    return image_to_pixbuf_encoded(image)
+
+
+def image_to_pixbuf_raw(image):
+    '''Converts a PIL image to a GdkPixbuf from its raw pixels'''
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    mode = "RGBA" if has_alpha else "RGB"
+    if image.mode != mode:
+        image = image.convert(mode)
+
+    width, height = image.size
+    # PIL packs rows without padding, so a row is exactly its pixels
+    rowstride = width * len(mode)
+
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new(image.tobytes()),
+        GdkPixbuf.Colorspace.RGB,
+        has_alpha,
+        8,
+        width,
+        height,
+        rowstride
+    )
+
+
+def image_to_pixbuf_encoded(image):
+    '''Converts a PIL image to a GdkPixbuf by encoding it and loading that'''
     pixbuf = None
     for img_format in [("pnm", "ppm"), ("png", "png"), ("jpeg", "jpeg")]:
         try:
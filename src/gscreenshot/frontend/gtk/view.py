@@ -7,7 +7,6 @@ View class for the GTK frontend
 '''
 
 import gettext
-import io
 import threading
 from time import sleep
 import typing
@@ -34,7 +33,6 @@ require_version('Gtk', '3.0')
 from gi.repository import Gdk # type: ignore
 from gi.repository import GLib # type: ignore
 from gi.repository import Gtk # type: ignore
-from gi.repository import GdkPixbuf # type: ignore
 
 i18n = gettext.gettext
 
@@ -218,6 +216,20 @@ class View(AbstractGscreenshotView):
         """
         self._flash_status_icon("document-save")
 
+    def update_save_progress(self, saved: int, total: int):
+        """
+        Show how many of the screenshots being saved are done
+        """
+        if self._header_bar is None:
+            return
+
+        if saved < total:
+            self._header_bar.set_subtitle(
+                i18n("Saving {0} of {1}").format(saved + 1, total)
+            )
+        else:
+            self._header_bar.set_subtitle(None)
+
     def notify_copy_complete(self):
         """
         Show an indication that copying the file completed
@@ -312,19 +324,12 @@ class View(AbstractGscreenshotView):
         for cursor_name in cursors:
             if cursors[cursor_name] is not None:
                 current_idx += 1
-                descriptor = io.BytesIO()
                 image = cursors[cursor_name].copy()
                 image.thumbnail((
                     self._cursor_selection_dropdown.get_allocation().height*.42,
                     self._cursor_selection_dropdown.get_allocation().width*.42
                 ))
-                image.save(descriptor, "png")
-                contents = descriptor.getvalue()
-                descriptor.close()
-                loader = GdkPixbuf.PixbufLoader.new_with_type("png")
-                loader.write(contents)
-                pixbuf = loader.get_pixbuf()
-                loader.close()
+                pixbuf = image_to_pixbuf(image)
 
                 i18n_name = i18n(f"cursor-{cursor_name}")
                 if i18n_name == f"cursor-{cursor_name}":
@@ -539,7 +544,7 @@ class View(AbstractGscreenshotView):
         """
         clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
         display = Gdk.Display.get_default()
-        img = screenshot.get_image()
+        img = screenshot.get_rendered_image()
 
         if display.supports_clipboard_persistence():
             clipboard.set_image(image_to_pixbuf(img))
@@ -6,13 +6,18 @@
 '''
 Classes for the GTK gscreenshot frontend
 '''
+from concurrent.futures import Future
 import gettext
 import threading
 import typing
 from gscreenshot import Gscreenshot
+from gscreenshot.burst import BurstStats
 from gscreenshot.cache import GscreenshotCache
+from gscreenshot.encoder import get_encoder_service
 from gscreenshot.filename import get_time_filename
 from gscreenshot.frontend.abstract_view import AbstractGscreenshotView
+from gscreenshot.frontend.preview import PreviewRenderer
+from gscreenshot.screenshot import Screenshot
 from gscreenshot.screenshot.actions import (
     CopyAction,
     ScreenshotActionError,
@@ -23,6 +28,7 @@ from gscreenshot.screenshot.actions.save import SaveAction
 from gscreenshot.screenshot.effects import CropEffect
 
 from gscreenshot.util import get_supported_formats
+from gscreenshot.watch import WatchStats
 
 i18n = gettext.gettext
 
@@ -32,7 +38,8 @@ class Presenter():
 
     __slots__ = ('_delay', '_app', '_hide',
             '_view', '_keymappings', '_capture_cursor',
-            '_cursor_selection', '_overwrite_mode')
+            '_cursor_selection', '_overwrite_mode', '_preview_renderer',
+            '_save_failed')
 
     _delay: int
     _app: Gscreenshot
@@ -42,16 +49,20 @@ class Presenter():
     _capture_cursor: bool
     _overwrite_mode: bool
     _cursor_selection: typing.Optional[str]
+    _preview_renderer: PreviewRenderer
+    _save_failed: bool
 
     def __init__(self, application: Gscreenshot, view: AbstractGscreenshotView):
         self._app = application
         self._view = view
+        self._preview_renderer = PreviewRenderer(self._view.idle_add)
         self._delay = 0
         self._hide = True
         self._capture_cursor = False
         self._show_preview()
         self._keymappings = {}
         self._overwrite_mode = True
+        self._save_failed = False
 
         cursors = self._app.get_available_cursors()
         cursors[i18n("custom")] = None
@@ -193,6 +204,97 @@ class Presenter():
             self._app.screenshot_full_display
             )
 
+    def on_output_selected(self, output_name):
+        '''Take a screenshot of a single output (monitor)'''
+        output_name = self._view.widget_str_value(output_name)
+        if not output_name:
+            return
+
+        self.take_screenshot(
+            self._app.screenshot_output,
+            output=output_name
+            )
+
+    def take_burst(self, count: int, interval_ms: float = 0,
+                   foldername: typing.Optional[str] = None,
+                   region_name: typing.Optional[str] = None,
+                   output_name: typing.Optional[str] = None) -> BurstStats:
+        '''
+        Take a burst of screenshots of the full screen, a stored
+        region or an output and save them to a folder
+        '''
+        return self._app.screenshot_burst(
+            count,
+            interval_ms,
+            foldername,
+            delay=self._delay,
+            capture_cursor=self._capture_cursor,
+            cursor_name=self._cursor_selection,
+            region=self._get_stored_region(region_name),
+            output=output_name,
+        )
+
+    #pylint: disable=too-many-arguments
+    def take_timelapse(self, interval_ms: float, filename: typing.Optional[str] = None,
+                       max_frames: typing.Optional[int] = None,
+                       max_duration: typing.Optional[float] = None,
+                       skip_if_behind: bool = True,
+                       region_name: typing.Optional[str] = None,
+                       output_name: typing.Optional[str] = None) -> BurstStats:
+        '''
+        Take a screenshot of the full screen, a stored region or
+        an output at a fixed interval and save each one
+        '''
+        return self._app.screenshot_timelapse(
+            interval_ms,
+            filename,
+            max_frames=max_frames,
+            max_duration=max_duration,
+            skip_if_behind=skip_if_behind,
+            delay=self._delay,
+            capture_cursor=self._capture_cursor,
+            cursor_name=self._cursor_selection,
+            region=self._get_stored_region(region_name),
+            output=output_name,
+        )
+
+    #pylint: disable=too-many-arguments
+    def take_watch(self, region_name: str, interval_ms: float,
+                   filename: typing.Optional[str] = None, threshold: float = 0.01,
+                   max_frames: typing.Optional[int] = None,
+                   max_duration: typing.Optional[float] = None
+                   ) -> typing.Optional[WatchStats]:
+        '''
+        Watch a stored region and save a screenshot of it each
+        time enough of it changes
+        '''
+        region = self._get_stored_region(region_name)
+        if region is None:
+            return None
+
+        return self._app.screenshot_watch(
+            region,
+            interval_ms,
+            filename,
+            threshold=threshold,
+            max_frames=max_frames,
+            max_duration=max_duration,
+            delay=self._delay,
+            capture_cursor=self._capture_cursor,
+            cursor_name=self._cursor_selection,
+        )
+
+    def _get_stored_region(self, region_name: typing.Optional[str]):
+        '''Look up a stored region, warning if it doesn't exist'''
+        if not region_name:
+            return None
+
+        region = self._app.get_available_regions().get(region_name)
+        if region is None:
+            self._view.show_warning(i18n("No stored region named '{0}'").format(region_name))
+
+        return region
+
     def on_button_window_clicked(self, *args):
         '''Take a screenshot of a window'''
         self._button_select_area_or_window_clicked(args)
@@ -250,10 +352,7 @@ class Presenter():
         region = None
 
         if last_screenshot is not None:
-            effects = last_screenshot.get_effects()
-            crop_effect = next((i for i in effects if isinstance(i, CropEffect)), None)
-            if crop_effect and "region" in crop_effect.meta:
-                region = crop_effect.meta["region"]
+            region = self._get_screen_region(last_screenshot)
 
         if region:
             self.take_screenshot(
@@ -297,8 +396,12 @@ class Presenter():
 
         self._show_preview()
 
-    def on_button_saveas_clicked(self, *_) -> bool:
-        '''Handle the saveas button'''
+    def on_button_saveas_clicked(self, *_, retry: bool = True) -> bool:
+        '''
+        Handle the saveas button. The save happens in the background:
+        if it fails, the user is asked where to save it again unless
+        retry is False.
+        '''
         saved = False
         cancelled = False
 
@@ -315,41 +418,88 @@ class Presenter():
             saved = False
             if fname is not None:
                 try:
-                    saved = SaveAction(
+                    SaveAction(
                         filename=fname, update_cache=True
-                    ).execute(screenshot) is not None
+                    ).execute_async(
+                        screenshot,
+                        callback=lambda future: self._view.idle_add(
+                            lambda: self._end_save(future, retry)
+                        )
+                    )
+                    saved = True
                 except ScreenshotActionError:
                     self._view.show_warning(i18n("Failed to save screenshot!"))
             else:
                 cancelled = True
 
+        return saved
+
+    def _end_save(self, future: "Future[typing.Optional[str]]", retry: bool = False) -> bool:
+        '''Report a save started by on_button_saveas_clicked'''
+        try:
+            saved = future.result() is not None
+        except ScreenshotActionError:
+            saved = False
+
         if saved:
             self._view.update_gallery_controls(self._app.get_screenshot_collection())
             self._view.notify_save_complete()
-            return True
+        else:
+            self._view.show_warning(i18n("Failed to save screenshot!"))
+            if not retry or not self.on_button_saveas_clicked():
+                self._save_failed = True
 
+        # Don't repeat, when called by GLib.idle_add
         return False
 
     def on_button_save_all_clicked(self, *_):
         '''Handle the "save all" button'''
-        saved = False
-        cancelled = False
+        fname = self._view.ask_for_save_directory(
+            self._app.get_time_foldername(),
+            GscreenshotCache.load().last_save_dir,
+        )
+        if fname is None:
+            return
 
-        while not (saved or cancelled):
-            fname = self._view.ask_for_save_directory(
-                self._app.get_time_foldername(),
-                GscreenshotCache.load().last_save_dir,
-            )
-            if fname is not None:
-                self._view.set_busy()
-                saved = self._app.save_screenshot_collection(fname)
-                self._view.set_ready()
-            else:
-                cancelled = True
+        self._view.set_busy()
+        self._app.save_screenshot_collection_async(
+            fname,
+            callback=lambda future: self._view.idle_add(
+                lambda: self._end_save_all(future)
+            ),
+            progress=lambda saved, total: self._view.idle_add(
+                lambda: self._view.update_save_progress(saved, total)
+            ),
+        )
+
+    def _end_save_all(self, future: "Future[bool]") -> bool:
+        '''Report a save started by on_button_save_all_clicked'''
+        self._view.set_ready()
+
+        try:
+            saved = future.result()
+        except ScreenshotActionError:
+            saved = False
 
         if saved:
             self._view.update_gallery_controls(self._app.get_screenshot_collection())
             self._view.notify_save_complete()
+        else:
+            self._save_failed = True
+            self._view.show_warning(i18n("Failed to save screenshot!"))
+
+        return False
+
+    def wait_for_saves(self, timeout: typing.Optional[float] = None) -> bool:
+        '''
+        Wait for every save in progress to finish. Returns False if
+        any save failed since the last call, or the timeout passed.
+        '''
+        finished = get_encoder_service().wait(timeout)
+        failed = self._save_failed
+        self._save_failed = False
+
+        return finished and not failed
 
     def on_button_openwith_clicked(self, *_):
         '''Handle the "open with" button'''
@@ -486,10 +636,7 @@ class Presenter():
         region = None
 
         if last_screenshot is not None:
-            effects = last_screenshot.get_effects()
-            crop_effect = next((i for i in effects if isinstance(i, CropEffect)), None)
-            if crop_effect and crop_effect.enabled and "region" in crop_effect.meta:
-                region = crop_effect.meta["region"]
+            region = self._get_screen_region(last_screenshot, enabled_only=True)
 
         if not region:
             return
@@ -526,7 +673,7 @@ class Presenter():
             if crop_effect:
                 screenshot.remove_effect(crop_effect)
 
-            screenshot.add_effect(CropEffect(region))
+            screenshot.add_effect(CropEffect(screenshot.translate_region(region)))
             self._show_preview()
 
     def on_settings_clicked(self, *_):
@@ -562,9 +709,29 @@ class Presenter():
             if isinstance(effect, CropEffect):
                 effect.disable()
 
-        screenshot.add_effect(CropEffect(region=region))
+        screenshot.add_effect(CropEffect(region=screenshot.translate_region(region)))
         self._show_preview()
 
+    @staticmethod
+    def _get_screen_region(screenshot: Screenshot, enabled_only: bool = False
+                           ) -> typing.Optional[typing.Tuple[int, int, int, int]]:
+        '''
+        Get the region of the screen a screenshot shows, whether it
+        was cropped from the full screen or only the region was captured
+        '''
+        effects = screenshot.get_effects()
+        crop_effect = next((i for i in effects if isinstance(i, CropEffect)), None)
+        if crop_effect and "region" in crop_effect.meta:
+            if crop_effect.enabled or not enabled_only:
+                left, upper, right, lower = crop_effect.meta["region"]
+                capture_region = screenshot.get_capture_region()
+                if capture_region is not None:
+                    left, upper = left + capture_region[0], upper + capture_region[1]
+                    right, lower = right + capture_region[0], lower + capture_region[1]
+                return (left, upper, right, lower)
+
+        return screenshot.get_capture_region()
+
     def quit(self, *args, skip_warning=False):
         '''Exit the app'''
         if skip_warning:
@@ -589,5 +756,9 @@ class Presenter():
         height, width = self._view.get_preview_dimensions()
 
         if height > 0 and width > 0:
-            preview_img = self._app.current_always.get_preview(width, height, with_border=True)
+            # Show a rough preview straight away and swap in a
+            # better one when it's ready
+            screenshot = self._app.current_always
+            preview_img = screenshot.get_preview(width, height, with_border=True, quick=True)
             self._view.update_preview(preview_img)
+            self._preview_renderer.request(screenshot, width, height, self._view.update_preview)
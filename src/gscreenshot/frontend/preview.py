@@ -0,0 +1,114 @@
+'''
+Background preview rendering for gscreenshot frontends
+'''
+import logging
+import threading
+import typing
+
+from PIL import Image
+
+from gscreenshot.screenshot import Screenshot
+
+
+log = logging.getLogger(__name__)
+
+
+class PreviewRenderer():
+    '''
+    Renders full quality previews on a worker thread so the frontend
+    stays responsive while a large screenshot is scaled.
+
+    The latest request wins: a request replaces any request which
+    hasn't been started yet, and a finished preview is thrown away if
+    a newer one was requested while it was being rendered.
+
+    Finished previews are handed to their callback through
+    run_on_main_thread, which should be the frontend's idle_add.
+    '''
+
+    _generation: int
+    _pending: typing.Optional[typing.Tuple[int, Screenshot, int, int,
+                                           typing.Callable[[Image.Image], None]]]
+    _busy: bool
+    _thread: typing.Optional[threading.Thread]
+
+    def __init__(self, run_on_main_thread: typing.Callable[[typing.Callable], typing.Any]):
+        '''constructor'''
+        self._run_on_main_thread = run_on_main_thread
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._pending = None
+        self._busy = False
+        self._thread = None
+
+    def request(self, screenshot: Screenshot, width: int, height: int,
+                callback: typing.Callable[[Image.Image], None]):
+        '''Render a preview of a screenshot and pass it to callback'''
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, screenshot, width, height, callback)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._render_previews, daemon=True)
+                self._thread.start()
+
+            self._condition.notify_all()
+
+    def cancel(self):
+        '''Drop any preview which is waiting or being rendered'''
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+            self._condition.notify_all()
+
+    def wait(self, timeout: typing.Optional[float] = None) -> bool:
+        '''
+        Wait until there's nothing left to render. Returns False if
+        the timeout passed first.
+        '''
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def _is_current(self, generation: int) -> bool:
+        '''Whether no newer preview was requested'''
+        with self._condition:
+            return generation == self._generation
+
+    def _render_previews(self):
+        '''Worker thread'''
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None)
+                assert self._pending is not None
+                generation, screenshot, width, height, callback = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                preview = screenshot.get_preview(width, height, with_border=True)
+            except (OSError, ValueError, MemoryError) as exc:
+                log.warning("failed to render preview: %s", exc)
+                preview = None
+
+            if preview is not None and self._is_current(generation):
+                self._run_on_main_thread(
+                    lambda generation=generation, preview=preview, callback=callback:
+                        self._deliver(generation, preview, callback)
+                )
+            else:
+                log.debug("dropping outdated preview %s", generation)
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def _deliver(self, generation: int, preview: Image.Image,
+                 callback: typing.Callable[[Image.Image], None]) -> bool:
+        '''Main thread side of handing over a finished preview'''
+        if self._is_current(generation):
+            callback(preview)
+
+        # Don't repeat, when called by GLib.idle_add
+        return False
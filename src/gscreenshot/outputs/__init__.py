@@ -0,0 +1,9 @@
+"""Functions for finding the outputs (monitors) of the display"""
+
+from .output_layout import Output, get_output, get_outputs
+
+__all__ = [
+    "Output",
+    "get_output",
+    "get_outputs",
+]
@@ -0,0 +1,165 @@
+"""Find the outputs (monitors) that make up the display"""
+
+from dataclasses import dataclass
+import json
+import logging
+import subprocess
+import typing
+
+from gscreenshot.util import find_executable, session_is_wayland
+
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Output():
+    """
+    An output and its place in the display layout.
+
+    Positions and sizes are in layout coordinates. On X11 these are
+    pixels. On Wayland they are logical pixels, which the output's
+    scale turns into image pixels.
+    """
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    scale: float = 1.0
+
+    def get_region(self, scale: typing.Optional[float] = None
+                   ) -> typing.Tuple[int, int, int, int]:
+        """
+        Get the region of a full screen screenshot this output covers,
+        as (left, upper, right, lower). Full screen screenshots are
+        rendered at a single scale, which defaults to this output's.
+        """
+        if scale is None:
+            scale = self.scale
+
+        return (
+            round(self.x * scale),
+            round(self.y * scale),
+            round((self.x + self.width) * scale),
+            round((self.y + self.height) * scale),
+        )
+
+
+def get_outputs() -> typing.List[Output]:
+    """Get the enabled outputs of the display"""
+    methods = [get_outputs_from_xrandr]
+
+    if session_is_wayland():
+        methods = [get_outputs_from_wlr_randr]
+
+    for method in methods:
+        try:
+            outputs = method()
+            if outputs:
+                log.debug("got outputs = %s from %s", outputs, method.__name__)
+                return outputs
+        except (subprocess.CalledProcessError, OSError, ValueError, KeyError, TypeError) as exc:
+            log.info("unable to get outputs: %s", exc)
+
+    return []
+
+
+def get_output(name: str) -> typing.Optional[Output]:
+    """Get an enabled output by name"""
+    return next((i for i in get_outputs() if i.name == name), None)
+
+
+def get_outputs_from_wlr_randr() -> typing.List[Output]:
+    """Get the outputs from wlr-randr"""
+    if find_executable('wlr-randr') is None:
+        return []
+
+    randr_output = subprocess.check_output(
+        ['wlr-randr', '--json'], text=True, stderr=subprocess.PIPE
+    )
+
+    return parse_wlr_randr_json(randr_output)
+
+
+def parse_wlr_randr_json(randr_output: str) -> typing.List[Output]:
+    """Parse the output of wlr-randr --json"""
+    outputs = []
+
+    for head in json.loads(randr_output):
+        if not head.get("enabled", False):
+            continue
+
+        mode = next((i for i in head.get("modes", []) if i.get("current")), None)
+        if mode is None:
+            continue
+
+        scale = float(head.get("scale", 1.0)) or 1.0
+        width, height = mode["width"], mode["height"]
+
+        # Rotated outputs swap their width and height in the layout
+        if head.get("transform", "normal") in ("90", "270", "flipped-90", "flipped-270"):
+            width, height = height, width
+
+        outputs.append(Output(
+            name=head["name"],
+            x=head["position"]["x"],
+            y=head["position"]["y"],
+            width=round(width / scale),
+            height=round(height / scale),
+            scale=scale,
+        ))
+
+    return outputs
+
+
+def get_outputs_from_xrandr() -> typing.List[Output]:
+    """Get the outputs from the X server's RandR extension"""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from Xlib import display
+        from Xlib.error import DisplayError, XError
+    except ImportError:
+        log.debug("python-xlib is unavailable, unable to get outputs from xrandr")
+        return []
+
+    try:
+        xdisplay = display.Display()
+    except DisplayError as exc:
+        log.info("unable to open the display: %s", exc)
+        return []
+
+    outputs = []
+
+    try:
+        if not xdisplay.has_extension('RANDR'):
+            return []
+
+        resources = xdisplay.screen().root.xrandr_get_screen_resources()
+        timestamp = resources.config_timestamp
+
+        for output in resources.outputs:
+            info = xdisplay.xrandr_get_output_info(output, timestamp)
+            if not info.crtc:
+                # Disconnected or disabled
+                continue
+
+            crtc = xdisplay.xrandr_get_crtc_info(info.crtc, timestamp)
+            name = info.name
+            if isinstance(name, bytes):
+                name = name.decode(errors="replace")
+
+            outputs.append(Output(
+                name=name,
+                x=crtc.x,
+                y=crtc.y,
+                width=crtc.width,
+                height=crtc.height,
+            ))
+    except XError as exc:
+        log.info("unable to get outputs from xrandr: %s", exc)
+        return []
+    finally:
+        xdisplay.close()
+
+    return outputs
@@ -4,7 +4,7 @@ import logging
 import os
 import typing
 
-from gscreenshot.util import session_is_wayland
+from gscreenshot.util import find_executable, session_is_wayland
 
 
 log = logging.getLogger(__name__)
@@ -105,6 +105,12 @@ def get_scaling_from_wlr_randr() -> typing.Optional[typing.Tuple[str, float]]:
     """Get scaling from wlr-randr"""
     # pylint: disable=import-outside-toplevel
     import subprocess
+
+    # The scale is a user setting which can change at any time, so
+    # only the lookup of the executable is worth skipping the call for
+    if find_executable('wlr-randr') is None:
+        return None
+
     try:
         output = subprocess.check_output(['wlr-randr'], text=True, stderr=subprocess.PIPE)
         for line in output.splitlines():
@@ -120,13 +126,17 @@ def get_scaling_from_xft_dpi() -> typing.Optional[typing.Tuple[str, float]]:
     """Get scaling factor from xrdb"""
     # pylint: disable=import-outside-toplevel
     import subprocess
+
+    if find_executable('xrdb') is None:
+        return None
+
     try:
         output = subprocess.check_output(['xrdb', '-query'], stderr=subprocess.PIPE).decode('utf-8')
         for line in output.split('\n'):
             if line.startswith('Xft.dpi:'):
                 dpi = float(line.split(':')[1].strip())
                 return "xrdb", dpi / 96  # Assuming 96 DPI as the base
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, OSError):
         return None
 
     return None
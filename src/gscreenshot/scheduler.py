@@ -0,0 +1,86 @@
+'''
+Scheduling for repeated captures (bursts and timelapses)
+'''
+import threading
+import time
+import typing
+
+
+class IntervalScheduler():
+    '''
+    Produces frame numbers at a fixed interval.
+
+    Every frame is scheduled from the start time on the monotonic clock,
+    so time spent capturing a frame doesn't push the frames after it
+    back and the schedule doesn't drift over a long run.
+
+    If skip_if_behind is set, frames which are already a full interval
+    late when their turn comes (for example because the previous capture
+    was slow) are skipped to get back on schedule. Otherwise they're
+    taken one after another until the schedule catches up.
+
+    The schedule stops after max_frames frames, after max_duration
+    seconds, or when stop() is called - whichever comes first.
+    '''
+
+    max_frames: typing.Optional[int]
+    max_duration: typing.Optional[float]
+    skip_if_behind: bool
+    frames: int
+    skipped: int
+    elapsed: float
+
+    def __init__(self, interval_ms: float = 0, max_frames: typing.Optional[int] = None,
+                 max_duration: typing.Optional[float] = None, skip_if_behind: bool = True):
+        '''constructor'''
+        self._interval = max(interval_ms, 0) / 1000
+        self._stopped = threading.Event()
+        self.max_frames = max_frames
+        self.max_duration = max_duration
+        self.skip_if_behind = skip_if_behind
+        self.frames = 0
+        self.skipped = 0
+        self.elapsed = 0
+
+    @property
+    def interval_ms(self) -> float:
+        '''The interval between frames in milliseconds'''
+        return self._interval * 1000
+
+    def stop(self):
+        '''Stop the schedule, waking it up if it's waiting for the next frame'''
+        self._stopped.set()
+
+    def __iter__(self) -> typing.Iterator[int]:
+        '''Yields 1, 2, 3... as each frame is due'''
+        start = time.monotonic()
+        tick = 0
+
+        try:
+            while not self._stopped.is_set():
+                if self.max_frames is not None and self.frames >= self.max_frames:
+                    return
+
+                scheduled = start + tick * self._interval
+                now = time.monotonic()
+
+                behind = now - scheduled
+                if self.skip_if_behind and 0 < self._interval <= behind:
+                    missed = int(behind // self._interval)
+                    self.skipped += missed
+                    tick += missed
+                    scheduled = start + tick * self._interval
+
+                if self.max_duration is not None and \
+                        max(scheduled, now) - start >= self.max_duration:
+                    return
+
+                wait = scheduled - time.monotonic()
+                if wait > 0 and self._stopped.wait(wait):
+                    return
+
+                tick += 1
+                self.frames += 1
+                yield self.frames
+        finally:
+            self.elapsed = time.monotonic() - start
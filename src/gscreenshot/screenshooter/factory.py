@@ -10,6 +10,7 @@ from .imlib_2 import Imlib2
 from .pil import PILWrapper
 from .scrot import Scrot
 from .xdg_desktop_portal import XdgDesktopPortal
+from .xlib import XlibScreenshooter
 from .exceptions import NoSupportedScreenshooterError
 from .screenshooter import Screenshooter
 
@@ -28,6 +29,7 @@ class ScreenshooterFactory():
     def __init__(self, screenshooter:typing.Optional[Screenshooter]=None):
         self.screenshooter:typing.Optional[Screenshooter] = screenshooter
         self.xorg_screenshooters = [
+                XlibScreenshooter,
                 Scrot,
                 ImageMagick,
                 PILWrapper,
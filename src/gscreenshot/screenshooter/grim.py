@@ -1,14 +1,26 @@
 '''
 Integration for the grim screenshot utility
 '''
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+from time import monotonic, sleep
 import subprocess
 import typing
 
+from PIL import Image
+from gscreenshot.cache import cached_probe
+from gscreenshot.outputs import Output, get_outputs
+from gscreenshot.scaling import get_scaling_factor
+from gscreenshot.screenshot import Screenshot
 from gscreenshot.util import find_executable, GSCapabilities
+from .exceptions import ScreenshotError
 from .screenshooter import Screenshooter
 
 
+log = logging.getLogger(__name__)
+
+
 class Grim(Screenshooter):
     """
     Python class wrapper for the grim screenshooter utility
@@ -16,11 +28,17 @@ class Grim(Screenshooter):
 
     __utilityname__ = "grim"
 
+    # How long, in seconds, a display layout is reused for, so that
+    # bursts and repeated captures don't run wlr-randr for every frame
+    OUTPUT_LAYOUT_TTL = 5.0
+
     def __init__(self):
         """
         constructor
         """
         Screenshooter.__init__(self)
+        self._outputs: typing.Optional[typing.List[Output]] = None
+        self._outputs_checked = 0.0
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """
@@ -30,12 +48,114 @@ class Grim(Screenshooter):
             int delay, in seconds
         """
         sleep(delay)
-        params = [self._tempfile]
+
+        # With several outputs, each one is captured (and encoded) by its
+        # own grim at the same time. Outputs with different scales are
+        # left to grim, which knows how it would like to compose them.
+        outputs = self._get_outputs()
+        if len(outputs) > 1 and len({i.scale for i in outputs}) == 1:
+            self._screenshot = None
+            image = self._grab_outputs(outputs, capture_cursor)
+            if image is not None:
+                self._screenshot = Screenshot(image)
+                return
+
+            # The layout may have changed since it was checked
+            self._outputs = None
+
+        params = ['-t', self.CAPTURE_FORMAT, '-']
 
         if capture_cursor:
-            params = ['-c', self._tempfile]
+            params = ['-c'] + params
+
+        self._call_screenshooter('grim', params, stream=True)
+
+    def grab_output(self, output_name, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a single output with a given delay
+
+        Parameters:
+            output_name: the name of the output
+            int delay, in seconds
+        """
+        sleep(delay)
+        self._call_screenshooter('grim', self._get_output_params(output_name, capture_cursor),
+                                 stream=True)
+
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        sleep(delay)
+
+        # Regions are in image pixels but grim expects layout coordinates
+        scaling_factor = get_scaling_factor()
+        x_pos, y_pos, width, height = (
+            round(i / scaling_factor) for i in self._get_region_geometry(region)
+        )
 
-        self._call_screenshooter('grim', params)
+        params = ['-g', f"{x_pos},{y_pos} {width}x{height}", '-t', self.CAPTURE_FORMAT, '-']
+
+        if capture_cursor:
+            params = ['-c'] + params
+
+        self._call_screenshooter('grim', params, stream=True)
+
+    def _grab_outputs(self, outputs: typing.List[Output], capture_cursor: bool=False
+                      ) -> typing.Optional[Image.Image]:
+        """
+        Captures each output concurrently and composes them into
+        one image. The outputs must share a scale.
+        """
+        def grab(output: Output) -> Image.Image:
+            params = self._get_output_params(output.name, capture_cursor)
+            return self._capture_image('grim', params)
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(outputs)) as executor:
+                images = list(executor.map(grab, outputs))
+        except (subprocess.CalledProcessError, OSError, ScreenshotError) as exc:
+            log.info("failed to capture outputs separately: %s", exc)
+            return None
+
+        scale = outputs[0].scale
+        left = min(i.x for i in outputs)
+        upper = min(i.y for i in outputs)
+        right = max(i.x + i.width for i in outputs)
+        lower = max(i.y + i.height for i in outputs)
+
+        composed = Image.new(
+            "RGB", (round((right - left) * scale), round((lower - upper) * scale))
+        )
+        for output, image in zip(outputs, images):
+            composed.paste(
+                image, (round((output.x - left) * scale), round((output.y - upper) * scale))
+            )
+
+        return composed
+
+    def _get_outputs(self) -> typing.List[Output]:
+        """The display layout, reused for OUTPUT_LAYOUT_TTL seconds"""
+        now = monotonic()
+        if self._outputs is None or now - self._outputs_checked > self.OUTPUT_LAYOUT_TTL:
+            self._outputs = get_outputs()
+            self._outputs_checked = now
+
+        return self._outputs
+
+    def _get_output_params(self, output_name: str, capture_cursor: bool=False
+                           ) -> typing.List[str]:
+        """Parameters for capturing a single output"""
+        params = ['-o', output_name, '-t', self.CAPTURE_FORMAT, '-']
+
+        if capture_cursor:
+            params = ['-c'] + params
+
+        return params
 
     @staticmethod
     def can_run() -> bool:
@@ -45,17 +165,30 @@ class Grim(Screenshooter):
 
         # Grim doesn't work in all situations. In some we would rather
         # use the xdg-desktop-portal method so we'll do another check
-        try:
-            subprocess.check_output(["grim", "-"], stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError:
-            return False
+        def probe_grim() -> bool:
+            try:
+                subprocess.check_output(["grim", "-"], stderr=subprocess.STDOUT)
+            except (subprocess.CalledProcessError, OSError):
+                return False
+
+            return True
+
+        # Whether grim works depends on the compositor, so the
+        # result is only reused on the same desktop and display.
+        desktop = os.environ.get('XDG_CURRENT_DESKTOP', '')
+        display = os.environ.get('WAYLAND_DISPLAY', '')
+        return bool(cached_probe(f"grim:{desktop}:{display}", ["grim"], probe_grim))
 
-        return True
+    def get_capture_formats(self) -> typing.List[str]:
+        """Formats grim can write"""
+        return ['ppm', 'png']
 
     def get_capabilities(self) -> typing.Dict[str, str]:
         """
         Get supported features
         """
         return {
-            GSCapabilities.CURSOR_CAPTURE: self.__utilityname__
+            GSCapabilities.CURSOR_CAPTURE: self.__utilityname__,
+            GSCapabilities.REGION_CAPTURE: self.__utilityname__,
+            GSCapabilities.OUTPUT_CAPTURE: self.__utilityname__,
         }
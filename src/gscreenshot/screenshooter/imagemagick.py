@@ -30,7 +30,30 @@ class ImageMagick(Screenshooter):
             int delay, in seconds
         """
         sleep(delay)
-        self._call_screenshooter('import', ['-window', 'root', self._tempfile])
+        self._call_screenshooter(
+            'import',
+            ['-window', 'root', '-depth', '8', f'{self.CAPTURE_FORMAT}:-'],
+            stream=True
+        )
+
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        sleep(delay)
+        x_pos, y_pos, width, height = self._get_region_geometry(region)
+        self._call_screenshooter(
+            'import',
+            [
+                '-window', 'root', '-crop', f'{width}x{height}+{x_pos}+{y_pos}', '+repage',
+                '-depth', '8', f'{self.CAPTURE_FORMAT}:-'
+            ],
+            stream=True
+        )
 
     def _grab_selection_fallback(self, delay=0, capture_cursor=False):
         """
@@ -40,13 +63,22 @@ class ImageMagick(Screenshooter):
             int delay, in seconds
         """
         sleep(delay)
-        self._call_screenshooter('import', [self._tempfile])
+        self._call_screenshooter(
+            'import',
+            ['-depth', '8', f'{self.CAPTURE_FORMAT}:-'],
+            stream=True
+        )
+
+    def get_capture_formats(self) -> typing.List[str]:
+        """Formats import can write"""
+        return ['ppm', 'bmp', 'png']
 
     def get_capabilities(self) -> typing.Dict[str, str]:
         '''List of capabilities'''
         return {
             GSCapabilities.REGION_SELECTION: self.__utilityname__,
-            GSCapabilities.WINDOW_SELECTION: self.__utilityname__
+            GSCapabilities.WINDOW_SELECTION: self.__utilityname__,
+            GSCapabilities.REGION_CAPTURE: self.__utilityname__,
         }
 
     @staticmethod
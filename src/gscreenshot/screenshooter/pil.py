@@ -2,7 +2,9 @@
 Integration for the PIL screenshot functionality
 '''
 from time import sleep
+import typing
 from gscreenshot.screenshot import Screenshot
+from gscreenshot.util import GSCapabilities
 from .screenshooter import Screenshooter
 
 
@@ -38,6 +40,26 @@ class PILWrapper(Screenshooter):
         sleep(delay)
         self._screenshot = Screenshot(ImageGrab.grab(None))
 
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        sleep(delay)
+        x_pos, y_pos, width, height = self._get_region_geometry(region)
+        self._screenshot = Screenshot(
+            ImageGrab.grab(bbox=(x_pos, y_pos, x_pos + width, y_pos + height))
+        )
+
+    def get_capabilities(self) -> typing.Dict[str, str]:
+        '''List of capabilities'''
+        return {
+            GSCapabilities.REGION_CAPTURE: self.__utilityname__
+        }
+
     @staticmethod
     def can_run():
         '''Whether this utility is available'''
@@ -1,6 +1,7 @@
 '''
 Interface class for integrating a screenshot utility
 '''
+import io
 import logging
 import os
 import subprocess
@@ -8,6 +9,7 @@ import tempfile
 import typing
 import PIL.Image
 from gscreenshot.cursor_locator.factory import get_cursor_locator
+from gscreenshot.outputs import Output, get_outputs
 
 from gscreenshot.screenshot import Screenshot
 from gscreenshot.screenshot.effects import CropEffect
@@ -22,6 +24,12 @@ from .exceptions import ScreenshotError
 log = logging.getLogger(__name__)
 
 
+# Image formats a screenshot utility may hand over to gscreenshot,
+# cheapest to produce and decode first. The uncompressed formats
+# skip a deflate in the utility and an inflate in gscreenshot.
+CAPTURE_FORMAT_COSTS = ['ppm', 'bmp', 'png']
+
+
 class Screenshooter():
     """
     Python interface for a screenshooter
@@ -30,6 +38,10 @@ class Screenshooter():
     __slots__ = ('_tempfile', '_selector', '_screenshot')
     __utilityname__: str = "default"
 
+    # Placeholder for use in _call_screenshooter params. It is replaced
+    # with the capture format chosen by get_capture_format.
+    CAPTURE_FORMAT = "%CAPTURE_FORMAT%"
+
     _screenshot: typing.Optional[Screenshot]
     _tempfile: str
     _selector: typing.Optional[RegionSelector]
@@ -84,6 +96,28 @@ class Screenshooter():
         """
         return {}
 
+    def get_capture_formats(self) -> typing.List[str]:
+        """
+        Get the image formats this utility is able to output.
+        Utilities that can produce an uncompressed format should
+        override this so gscreenshot can avoid a compression round trip.
+
+        Returns:
+            [str]
+        """
+        return ['png']
+
+    def get_capture_format(self) -> str:
+        """
+        Get the cheapest image format this utility is able to output
+        """
+        supported = self.get_capture_formats()
+        for capture_format in CAPTURE_FORMAT_COSTS:
+            if capture_format in supported:
+                return capture_format
+
+        return supported[0] if supported else 'png'
+
     def get_capabilities_(self) -> typing.Dict[str, str]:
         """
         Get supported features. This should not be overridden by extending
@@ -122,12 +156,8 @@ class Screenshooter():
             self.grab_fullscreen(delay, capture_cursor)
         else:
             self.grab_fullscreen(delay, capture_cursor=False)
-            if capture_cursor and use_cursor and self._screenshot:
-                cursor_position = self.get_cursor_position()
-                if cursor_position is not None:
-                    stamp = StampEffect(use_cursor, cursor_position)
-                    stamp.set_alias("cursor")
-                    self._screenshot.add_effect(stamp)
+            if capture_cursor and use_cursor:
+                self._add_cursor_stamp(use_cursor)
 
     def grab_fullscreen(self, delay: int=0, capture_cursor: bool=False):
         """
@@ -164,11 +194,7 @@ class Screenshooter():
             delay, capture_cursor, use_cursor
         )
         if region is not None:
-            self.grab_fullscreen_(delay, capture_cursor, use_cursor)
-            if self._screenshot is not None:
-                crop = CropEffect(region)
-                crop.set_alias("region")
-                self._screenshot.add_effect(crop)
+            self.grab_region_(region, delay, capture_cursor, use_cursor)
             return
 
         if self._selector is None:
@@ -193,13 +219,203 @@ class Screenshooter():
             self.grab_fullscreen_(delay, capture_cursor, use_cursor)
             return
 
+        self.grab_region_(crop_box, delay, capture_cursor, use_cursor)
+
+    def grab_region_(self, region: typing.Tuple[int, int, int, int], delay: int=0,
+                     capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None):
+        '''
+        Internal API method for grabbing a known region of the screen. This
+        should not be overridden by extending classes. Implement grab_region
+        and advertise GSCapabilities.REGION_CAPTURE instead.
+
+        Utilities that can capture a region only capture that region.
+        Otherwise the full screen is captured and cropped to the region.
+
+        Parameters:
+            region: (left, upper, right, lower)
+        '''
+        log.debug(
+            "grabbing region: region = %s delay = %s capture_cursor = %s, use_cursor = %s",
+            region, delay, capture_cursor, use_cursor
+        )
+        capabilities = self.get_capabilities()
+
+        if GSCapabilities.REGION_CAPTURE in capabilities:
+            if use_cursor is None and GSCapabilities.CURSOR_CAPTURE in capabilities:
+                self.grab_region(region, delay, capture_cursor)
+            else:
+                self.grab_region(region, delay, capture_cursor=False)
+                if capture_cursor and use_cursor:
+                    self._add_cursor_stamp(
+                        use_cursor, origin=(region[0], region[1]),
+                        screen_size=self._get_screen_size(get_outputs())
+                    )
+
+            if self._screenshot is not None:
+                self._screenshot.set_capture_region(region)
+                return
+
+            log.info("region capture failed, capturing the full screen instead")
+
         self.grab_fullscreen_(delay, capture_cursor, use_cursor)
+        if self._screenshot is not None:
+            crop = CropEffect(region)
+            crop.set_alias("region")
+            self._screenshot.add_effect(crop)
 
+    def grab_region(self, region: typing.Tuple[int, int, int, int], delay: int=0,
+                    capture_cursor: bool=False):
+        """
+        Takes a screenshot of only the given region of the screen.
+        Utilities that implement this should advertise
+        GSCapabilities.REGION_CAPTURE. By default the full screen is
+        captured and cropped to the region.
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        self.grab_fullscreen(delay, capture_cursor)
         if self._screenshot is not None:
-            crop = CropEffect(crop_box)
+            crop = CropEffect(region)
             crop.set_alias("region")
             self._screenshot.add_effect(crop)
 
+    def grab_output_(self, output_name: str, delay: int=0, capture_cursor: bool=False,
+                     use_cursor: typing.Optional[PIL.Image.Image]=None):
+        '''
+        Internal API method for grabbing a single output (monitor). This
+        should not be overridden by extending classes. Implement grab_output
+        and advertise GSCapabilities.OUTPUT_CAPTURE instead.
+
+        Utilities that can't capture an output by name capture the
+        region of the screen the output covers.
+
+        Parameters:
+            output_name: the name of the output, such as "DP-1"
+        '''
+        log.debug(
+            "grabbing output: output = %s delay = %s capture_cursor = %s, use_cursor = %s",
+            output_name, delay, capture_cursor, use_cursor
+        )
+        self._screenshot = None
+
+        outputs = get_outputs()
+        output = next((i for i in outputs if i.name == output_name), None)
+        if output is None:
+            log.warning(
+                "output '%s' not found. Available outputs: %s",
+                output_name, ", ".join(i.name for i in outputs) or "none found"
+            )
+            return
+
+        # A full screen screenshot is rendered at the largest output scale
+        image_scale = max(i.scale for i in outputs)
+        region = output.get_region(image_scale)
+        capabilities = self.get_capabilities()
+
+        if GSCapabilities.OUTPUT_CAPTURE not in capabilities:
+            self.grab_region_(region, delay, capture_cursor, use_cursor)
+            return
+
+        if use_cursor is None and GSCapabilities.CURSOR_CAPTURE in capabilities:
+            self.grab_output(output_name, delay, capture_cursor)
+        else:
+            self.grab_output(output_name, delay, capture_cursor=False)
+            if capture_cursor and use_cursor:
+                # The output is captured at its own scale
+                self._add_cursor_stamp(
+                    use_cursor, (region[0], region[1]), output.scale / image_scale,
+                    self._get_screen_size(outputs)
+                )
+
+        if self._screenshot is not None:
+            self._screenshot.set_capture_region(region)
+
+    def grab_output(self, output_name: str, delay: int=0, capture_cursor: bool=False):
+        """
+        Takes a screenshot of a single output. Utilities that
+        implement this should advertise GSCapabilities.OUTPUT_CAPTURE.
+        By default the region of the screen the output covers is
+        captured.
+
+        Parameters:
+            output_name: the name of the output
+            int delay, in seconds
+        """
+        self._screenshot = None
+
+        outputs = get_outputs()
+        output = next((i for i in outputs if i.name == output_name), None)
+        if output is None:
+            log.warning("output '%s' not found", output_name)
+            return
+
+        image_scale = max(i.scale for i in outputs)
+        self.grab_region(output.get_region(image_scale), delay, capture_cursor)
+
+    def _add_cursor_stamp(self, use_cursor: PIL.Image.Image,
+                          origin: typing.Tuple[int, int] = (0, 0), scale: float = 1.0,
+                          screen_size: typing.Optional[typing.Tuple[int, int]] = None):
+        """
+        Stamps a cursor glyph onto the last screenshot where the cursor is.
+        origin is the position of the screenshot on the screen and scale
+        converts screen pixels into screenshot pixels.
+
+        The glyph is sized for a screenshot of screen_size, so it's the
+        same size whether the whole screen or a part of it was captured.
+        Without it, it's sized for the screenshot.
+        """
+        if self._screenshot is None:
+            return
+
+        cursor_position = self.get_cursor_position()
+        if cursor_position is None:
+            return
+
+        if screen_size is None:
+            stamp = StampEffect(use_cursor, (
+                int((cursor_position[0] - origin[0]) * scale),
+                int((cursor_position[1] - origin[1]) * scale)
+            ))
+        else:
+            stamp = StampEffect(
+                use_cursor,
+                (int(cursor_position[0] * scale), int(cursor_position[1] * scale)),
+                reference_size=(round(screen_size[0] * scale), round(screen_size[1] * scale)),
+                offset=(int(origin[0] * scale), int(origin[1] * scale))
+            )
+
+        stamp.set_alias("cursor")
+        self._screenshot.add_effect(stamp)
+
+    @staticmethod
+    def _get_screen_size(outputs: typing.List[Output]) -> typing.Optional[typing.Tuple[int, int]]:
+        """
+        The size of a full screen screenshot of these outputs,
+        or None if there aren't any
+        """
+        if not outputs:
+            return None
+
+        image_scale = max(i.scale for i in outputs)
+        regions = [i.get_region(image_scale) for i in outputs]
+        return (
+            max(i[2] for i in regions) - min(i[0] for i in regions),
+            max(i[3] for i in regions) - min(i[1] for i in regions),
+        )
+
+    @staticmethod
+    def _get_region_geometry(region: typing.Tuple[int, int, int, int]
+                             ) -> typing.Tuple[int, int, int, int]:
+        """
+        Converts a (left, upper, right, lower) region, which may contain
+        floats after scaling, into a whole pixel (x, y, width, height)
+        """
+        left, upper, right, lower = (round(i) for i in region)
+        return left, upper, max(right - left, 1), max(lower - upper, 1)
+
     def grab_window_(self, delay: int=0, capture_cursor: bool=False,
                      use_cursor: typing.Optional[PIL.Image.Image]=None,
                     select_color_rgba: typing.Optional[str]=None,
@@ -274,28 +490,90 @@ class Screenshooter():
         self.grab_fullscreen(delay, capture_cursor)
 
     def _call_screenshooter(self, screenshooter: str,
-                            params: typing.Optional[typing.List[str]]= None) -> bool:
+                            params: typing.Optional[typing.List[str]]= None,
+                            stream: bool = False) -> bool:
+        """
+        Runs a screenshot utility and loads the image it produced.
+
+        By default the utility is expected to write to self._tempfile.
+        Utilities that can write the image to stdout should pass stream=True,
+        in which case the output is decoded from memory and no file is used.
+
+        Any occurrence of Screenshooter.CAPTURE_FORMAT in the params is
+        replaced with the format chosen by get_capture_format.
+        """
 
         # This is safer than defaulting to []
         if params is None:
             params = []
 
-        params = [screenshooter] + params
+        params = self._fill_capture_format(params)
+
         self._screenshot = None
         try:
+            if stream:
+                self._screenshot = Screenshot.from_bytes(
+                    self._capture_bytes(screenshooter, params)
+                )
+                return True
+
+            params = [screenshooter] + params
             log.debug("calling screenshotter: %s", params)
             screenshot_output = subprocess.check_output(params)
+
             if not os.path.exists(self._tempfile):
                 if len(screenshot_output.decode()) > 0:
                     raise ScreenshotError(f"screenshot failed: {screenshot_output.decode()}")
                 raise ScreenshotError("screenshot failed but provided no output")
 
-            self._screenshot = Screenshot(PIL.Image.open(self._tempfile))
+            with open(self._tempfile, "rb") as captured:
+                self._screenshot = Screenshot.from_bytes(captured.read())
             os.unlink(self._tempfile)
         except (subprocess.CalledProcessError, IOError, OSError, ScreenshotError) as exc:
             log.warning("failed to call screenshotter: %s", exc)
 
         return self._screenshot is not None
 
+    def _capture_image(self, screenshooter: str, params: typing.List[str]
+                       ) -> PIL.Image.Image:
+        """
+        Runs a screenshot utility which writes the image to stdout and
+        decodes it. This doesn't touch the screenshooter's state, so it's
+        safe to call from several threads at once.
+
+        Raises subprocess.CalledProcessError, OSError or ScreenshotError
+        """
+        image = PIL.Image.open(io.BytesIO(self._capture_bytes(screenshooter, params)))
+        image.load()
+        return image
+
+    def _capture_bytes(self, screenshooter: str, params: typing.List[str]) -> bytes:
+        """
+        Runs a screenshot utility which writes the image to stdout and
+        returns the encoded image. Like _capture_image, this is safe to
+        call from several threads at once.
+
+        Raises subprocess.CalledProcessError, OSError or ScreenshotError
+        """
+        params = [screenshooter] + self._fill_capture_format(params)
+        log.debug("calling screenshotter: %s", params)
+        screenshot_output = subprocess.check_output(params)
+
+        if len(screenshot_output) == 0:
+            raise ScreenshotError("screenshot failed but provided no output")
+
+        return screenshot_output
+
+    def _fill_capture_format(self, params: typing.List[str]) -> typing.List[str]:
+        """
+        Replaces Screenshooter.CAPTURE_FORMAT in the params with the
+        format chosen by get_capture_format
+        """
+        if any(self.CAPTURE_FORMAT in param for param in params):
+            capture_format = self.get_capture_format()
+            params = [param.replace(self.CAPTURE_FORMAT, capture_format) for param in params]
+
+        return params
+
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}(selector={self._selector})'
@@ -1,9 +1,11 @@
 '''
 Integration for the Scrot screenshot utility
 '''
+import re
 import subprocess
 import typing
 
+from gscreenshot.cache import cached_probe
 from gscreenshot.util import GSCapabilities
 from .screenshooter import Screenshooter
 
@@ -14,6 +16,8 @@ class Scrot(Screenshooter):
     """
 
     _supports_native_cursor_capture = False
+    _supports_stdout = False
+    _supports_autoselect = False
     __utilityname__ = "scrot"
 
     def __init__(self):
@@ -29,11 +33,26 @@ class Scrot(Screenshooter):
         Parameters:
             int delay, in seconds
         """
-        params = ['-z', self._tempfile, '-d', str(int(delay))]
+        params = ['-d', str(int(delay))]
         if capture_cursor and Scrot._supports_native_cursor_capture:
             params.append('-p')
 
-        self._call_screenshooter('scrot', params)
+        self._call_scrot(params)
+
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        x_pos, y_pos, width, height = self._get_region_geometry(region)
+        params = ['-d', str(int(delay)), '-a', f"{x_pos},{y_pos},{width},{height}"]
+        if capture_cursor and Scrot._supports_native_cursor_capture:
+            params.append('-p')
+
+        self._call_scrot(params)
 
     def get_capabilities(self) -> typing.Dict[str, str]:
         '''List of capabilities'''
@@ -45,31 +64,63 @@ class Scrot(Screenshooter):
         if self._supports_native_cursor_capture:
             capabilities[GSCapabilities.CURSOR_CAPTURE] = self.__utilityname__
 
+        if self._supports_autoselect:
+            capabilities[GSCapabilities.REGION_CAPTURE] = self.__utilityname__
+
         return capabilities
 
     @staticmethod
     def can_run() -> bool:
         """Whether scrot is available"""
-        try:
-            scrot_version_output = subprocess.check_output(['scrot', '--version'])
-            scrot_version_str = scrot_version_output.decode().strip().rsplit('.', maxsplit=1)[-1]
+        def probe_scrot() -> typing.Optional[str]:
+            try:
+                return subprocess.check_output(['scrot', '--version']).decode()
+            except (subprocess.CalledProcessError, IOError, OSError):
+                return None
+
+        scrot_version_output = cached_probe("scrot-version", ["scrot"], probe_scrot)
+        if scrot_version_output is None:
+            return False
 
-            if float(scrot_version_str) >= 1:
-                Scrot._supports_native_cursor_capture = True
-            else:
-                Scrot._supports_native_cursor_capture = False
+        scrot_version = Scrot._parse_version(scrot_version_output)
 
-            return True
-        except (subprocess.CalledProcessError, IOError, OSError):
-            return False
+        Scrot._supports_native_cursor_capture = scrot_version >= (1, 0)
+        # Writing to stdout with '-' as the filename arrived in scrot 1.7
+        Scrot._supports_stdout = scrot_version >= (1, 7)
+        # Capturing a given rectangle with --autoselect arrived in scrot 1.2
+        Scrot._supports_autoselect = scrot_version >= (1, 2)
+
+        return True
 
     def _grab_selection_fallback(self, delay=0, capture_cursor=False):
         """
         Fallback for selection which uses scrot's builtin
         region selection
         """
-        params =  ['-z', self._tempfile, '-d', str(int(delay)), '-s']
+        params =  ['-d', str(int(delay)), '-s']
         if capture_cursor and Scrot._supports_native_cursor_capture:
             params.append('-p')
 
-        self._call_screenshooter('scrot', params)
+        self._call_scrot(params)
+
+    def _call_scrot(self, params: typing.List[str]) -> bool:
+        """
+        Runs scrot, streaming the image through stdout if this
+        version of scrot is able to
+        """
+        if Scrot._supports_stdout:
+            return self._call_screenshooter('scrot', ['-z', '-'] + params, stream=True)
+
+        return self._call_screenshooter('scrot', ['-z', self._tempfile] + params)
+
+    @staticmethod
+    def _parse_version(version_output: str) -> typing.Tuple[int, ...]:
+        """
+        Parses the output of scrot --version (e.g. "scrot 1.10.0"
+        or "scrot version 0.8") into a comparable tuple
+        """
+        match = re.search(r'(\d+)\.(\d+)', version_output)
+        if match is None:
+            return (0, 0)
+
+        return (int(match.group(1)), int(match.group(2)))
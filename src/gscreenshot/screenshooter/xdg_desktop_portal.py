@@ -9,18 +9,29 @@ module for gscreenshot and an executable script that takes
 a screenshot with xdg-desktop-portal. The module runs the
 script as a subprocess due to issues with the DBus loop and
 async call.
+
+Run with a destination path, the script takes one screenshot and
+exits. Run with --serve, it keeps the bus connection and main loop
+open and takes one destination path per line on stdin, answering
+each with a line of "ok" or "error <reason>" on stdout.
 '''
 try:
     import dbus
 except ImportError:
     dbus = None
 
+import atexit
 import binascii
+import logging
 import re
 import os
+import select
 import sys
 import shutil
 import subprocess
+import threading
+import time
+import typing
 
 from random import SystemRandom
 from time import sleep
@@ -34,7 +45,11 @@ except ImportError:
 # This MUST be an absolute import path or we either get a circular import
 # or the script doesn't work
 from gscreenshot.screenshooter.screenshooter import Screenshooter
-from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError
+from gscreenshot.screenshooter.exceptions import NoSupportedScreenshooterError, ScreenshotError
+from gscreenshot.screenshot import Screenshot
+
+
+log = logging.getLogger(__name__)
 
 
 class XdgPortalScreenshot:
@@ -43,19 +58,25 @@ class XdgPortalScreenshot:
     is called directly.
     '''
 
-    def __init__(self):
+    def __init__(self, main_loop, serve: bool = False):
         '''constructor'''
         if DBusGMainLoop is None or dbus is None:
             raise NoSupportedScreenshooterError('python-dbus is unavailable')
 
+        self.loop = main_loop
+        self.serve = serve
+        self.destination: typing.Optional[str] = None
+        self.receiver = None
+
         DBusGMainLoop(set_as_default = True)
         self.bus = dbus.SessionBus()
         self.portal = self.bus.get_object(
             'org.freedesktop.portal.Desktop', '/org/freedesktop/portal/desktop'
         )
 
-    def request(self, parent_window = ''):
+    def request(self, destination: str, parent_window = ''):
         '''Requests a screenshot. Note that xdg-desktop-portal is asynchronous'''
+        self.destination = destination
 
         # The following three lines perform the same
         # logic as secrets.token_hex without requiring
@@ -77,7 +98,7 @@ class XdgPortalScreenshot:
 
         options = { 'handle_token': request_token, 'interactive': False }
 
-        self.bus.add_signal_receiver(
+        self.receiver = self.bus.add_signal_receiver(
             self.callback,
             'Response',
             'org.freedesktop.portal.Request',
@@ -85,19 +106,21 @@ class XdgPortalScreenshot:
             self.get_request_handle(request_token)
         )
 
-        self.portal.Screenshot(
-            parent_window,
-            options,
-            dbus_interface='org.freedesktop.portal.Screenshot'
-        )
+        try:
+            self.portal.Screenshot(
+                parent_window,
+                options,
+                dbus_interface='org.freedesktop.portal.Screenshot'
+            )
+        except dbus.exceptions.DBusException as exc:
+            self.finish(f"error {exc.get_dbus_name()}")
 
     def get_request_handle(self, token) -> str:
         '''get a request handle name'''
         sender_name = re.sub(r'\.', '_', self.bus.get_unique_name()).lstrip(':')
         return f"/org/freedesktop/portal/desktop/request/{sender_name}/{token}"
 
-    @staticmethod
-    def callback(response, result):
+    def callback(self, response, result):
         '''
         callback function when a screenshot is completed
         Do not raise exceptions or exit in this function - this is a dbus callback
@@ -106,11 +129,157 @@ class XdgPortalScreenshot:
         if response == 0:
             uri = result["uri"]
             path = uri.replace("file://", "")
-            shutil.move(path, sys.argv[1])
+            try:
+                shutil.move(path, self.destination)
+                self.finish("ok")
+            except OSError as exc:
+                self.finish(f"error {exc}")
         else:
-            print(response, result)
+            self.finish(f"error {response} {result}")
 
-        loop.quit()
+    def finish(self, status: str):
+        '''Report the result of the current request'''
+        if self.receiver is not None:
+            self.receiver.remove()
+            self.receiver = None
+
+        if not self.serve:
+            if status != "ok":
+                print(status)
+            self.loop.quit()
+            return
+
+        sys.stdout.write(status + "\n")
+        sys.stdout.flush()
+
+    def on_stdin(self, _fd, condition) -> bool:
+        '''
+        Reads the next destination path when running with --serve.
+        The helper is sent one request at a time and answers it before
+        getting the next, so a line is all that's waiting here.
+        '''
+        line = sys.stdin.readline() if condition & GLib.IO_IN else ''
+        if not line:
+            # gscreenshot closed the pipe or went away
+            self.loop.quit()
+            return False
+
+        destination = line.strip()
+        if destination:
+            self.request(destination)
+
+        return True
+
+
+class _PortalHelper:
+    '''
+    Runs this script with --serve and passes capture requests to it,
+    so the interpreter, the bus connection and the main loop are only
+    set up once rather than for every screenshot. The helper is
+    restarted if it dies or stops responding.
+    '''
+
+    def __init__(self, command: typing.List[str], timeout: float):
+        self._command = command
+        self._timeout = timeout
+        self._process: typing.Optional[subprocess.Popen] = None
+        self._buffer = b''
+        self._lock = threading.Lock()
+
+    def capture(self, destination: str) -> bool:
+        '''
+        Ask the helper to save a screenshot to destination.
+        Returns whether it succeeded.
+        '''
+        with self._lock:
+            # A helper left over from an earlier request may have died in
+            # the meantime, so a broken pipe gets one retry with a fresh one.
+            for attempt in range(2):
+                try:
+                    return self._request(destination)
+                except BrokenPipeError:
+                    log.debug("xdg-desktop-portal helper exited, restarting (attempt %s)",
+                              attempt + 1)
+                    self.stop()
+                except (OSError, ScreenshotError) as exc:
+                    log.warning("xdg-desktop-portal helper failed: %s", exc)
+                    self.stop()
+                    return False
+
+        return False
+
+    def stop(self):
+        '''Stop the helper if it's running'''
+        if self._process is None:
+            return
+
+        process = self._process
+        self._process = None
+        self._buffer = b''
+
+        try:
+            if process.stdin:
+                process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+
+        if process.stdout:
+            process.stdout.close()
+
+    def _request(self, destination: str) -> bool:
+        '''Send one request and wait for its reply'''
+        if self._process is None or self._process.poll() is not None:
+            self._start()
+
+        # mypy doesn't know _start always sets this
+        assert self._process is not None and self._process.stdin is not None
+
+        self._process.stdin.write(destination.encode() + b"\n")
+        self._process.stdin.flush()
+
+        reply = self._read_line(time.monotonic() + self._timeout)
+        if reply == "ok":
+            return True
+
+        log.warning("xdg-desktop-portal screenshot failed: %s", reply)
+        return False
+
+    def _start(self):
+        '''Start the helper'''
+        self.stop()
+        log.debug("starting xdg-desktop-portal helper: %s", self._command)
+        # The helper outlives this call and is reused for every request
+        # until stop(), so it can't be managed with a with block.
+        # pylint: disable-next=consider-using-with
+        self._process = subprocess.Popen(
+            self._command, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def _read_line(self, deadline: float) -> str:
+        '''Read a line from the helper, giving up after the deadline'''
+        # mypy doesn't know _start always sets this
+        assert self._process is not None and self._process.stdout is not None
+        stdout = self._process.stdout.fileno()
+
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ScreenshotError("timed out waiting for xdg-desktop-portal")
+
+            readable, _, _ = select.select([stdout], [], [], remaining)
+            if not readable:
+                continue
+
+            chunk = os.read(stdout, 4096)
+            if not chunk:
+                raise ScreenshotError("xdg-desktop-portal helper exited unexpectedly")
+
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode(errors="replace").strip()
 
 
 class XdgDesktopPortal(Screenshooter):
@@ -120,20 +289,35 @@ class XdgDesktopPortal(Screenshooter):
 
     __utilityname__ = "xdg-desktop-portal"
 
+    # Seconds to wait for the portal to answer a single request
+    REQUEST_TIMEOUT = 30
+
     def __init__(self):
         """constructor"""
         Screenshooter.__init__(self)
+        script_path = os.path.realpath(__file__)
+        py_call = "python3"
+        if sys.version_info.major < 3:
+            py_call = "python2"
+
+        self._helper = _PortalHelper([py_call, script_path, "--serve"], self.REQUEST_TIMEOUT)
+        atexit.register(self._helper.stop)
 
     def grab_fullscreen(self, delay=0, capture_cursor=False):
         """grabs a full screen screenshot"""
 
         sleep(delay)
-        script_path = os.path.realpath(__file__)
-        py_call = "python3"
-        if sys.version_info.major < 3:
-            py_call = "python2"
+        self._screenshot = None
+
+        if not self._helper.capture(self._tempfile):
+            return
 
-        self._call_screenshooter(py_call, [script_path, self._tempfile])
+        try:
+            with open(self._tempfile, "rb") as tempfile:
+                self._screenshot = Screenshot.from_bytes(tempfile.read())
+            os.unlink(self._tempfile)
+        except OSError as exc:
+            log.warning("failed to load xdg-desktop-portal screenshot: %s", exc)
 
     @staticmethod
     def can_run() -> bool:
@@ -141,6 +325,8 @@ class XdgDesktopPortal(Screenshooter):
         if dbus is None:
             return False
 
+        # Whether the portal is running can change at any time, and
+        # pidof is cheap, so this isn't cached.
         try:
             subprocess.check_output(["pidof", "xdg-desktop-portal"])
         except (subprocess.CalledProcessError, OSError):
@@ -151,7 +337,17 @@ class XdgDesktopPortal(Screenshooter):
 
 if __name__ == "__main__":
     loop = GLib.MainLoop()
-    XdgPortalScreenshot().request()
+
+    if sys.argv[1] == "--serve":
+        portal_screenshot = XdgPortalScreenshot(loop, serve=True)
+        GLib.io_add_watch(
+            sys.stdin.fileno(),
+            GLib.PRIORITY_DEFAULT,
+            GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR,
+            portal_screenshot.on_stdin
+        )
+    else:
+        XdgPortalScreenshot(loop).request(sys.argv[1])
 
     try:
         loop.run()
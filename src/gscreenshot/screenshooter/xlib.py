@@ -0,0 +1,210 @@
+'''
+Integration for in-process X11 screenshots using python-xlib
+'''
+import array
+import logging
+import os
+import sys
+from time import sleep
+import typing
+
+from PIL import Image
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.util import GSCapabilities
+from .screenshooter import Screenshooter
+
+try:
+    from Xlib import X, display
+    from Xlib.error import XError, DisplayError
+    xlib_available = True
+except ImportError:
+    xlib_available = False
+
+
+log = logging.getLogger(__name__)
+
+
+class XlibScreenshooter(Screenshooter):
+    """
+    Reads the root window directly from the X server. This avoids
+    running a subprocess and round-tripping the image through a
+    PNG file for every screenshot.
+    """
+
+    __utilityname__ = "python-xlib"
+
+    def __init__(self):
+        """
+        constructor
+        """
+        Screenshooter.__init__(self)
+        self._display = None
+
+    def grab_fullscreen(self, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of the full screen with a given delay
+
+        Parameters:
+            int delay, in seconds
+        """
+        self._grab(None, delay, capture_cursor)
+
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        """
+        Takes a screenshot of a region of the screen with a given delay
+
+        Parameters:
+            region: (left, upper, right, lower)
+            int delay, in seconds
+        """
+        self._grab(self._get_region_geometry(region), delay, capture_cursor)
+
+    def _grab(self, box: typing.Optional[typing.Tuple[int, int, int, int]],
+              delay=0, capture_cursor=False):
+        """
+        Reads a rectangle of the screen, or all of it if box is None.
+        box is (x, y, width, height).
+        """
+        sleep(delay)
+        self._screenshot = None
+
+        try:
+            xdisplay = self._get_display()
+            root = xdisplay.screen().root
+            geometry = root.get_geometry()
+
+            if box is None:
+                box = (0, 0, geometry.width, geometry.height)
+
+            # The X server refuses to read outside of the root window
+            # so only the visible part of the box is read.
+            x_pos, y_pos, width, height = box
+            visible = (
+                max(x_pos, 0),
+                max(y_pos, 0),
+                min(x_pos + width, geometry.width) - max(x_pos, 0),
+                min(y_pos + height, geometry.height) - max(y_pos, 0),
+            )
+
+            if visible[2] < 1 or visible[3] < 1:
+                log.info("region %s is outside of the screen", box)
+                return
+
+            image = self._get_root_image(xdisplay, root, visible)
+        except (XError, DisplayError, OSError) as exc:
+            log.warning("failed to read the root window: %s", exc)
+            self._display = None
+            return
+
+        if image is None:
+            return
+
+        if visible != box:
+            padded = Image.new("RGB", (width, height))
+            padded.paste(image, (visible[0] - x_pos, visible[1] - y_pos))
+            image = padded
+
+        if capture_cursor:
+            self._stamp_cursor(xdisplay, root, image, (x_pos, y_pos))
+
+        self._screenshot = Screenshot(image)
+
+    def get_capabilities(self) -> typing.Dict[str, str]:
+        '''List of capabilities'''
+        capabilities = {}
+
+        try:
+            if self._get_display().has_extension('XFIXES'):
+                capabilities[GSCapabilities.CURSOR_CAPTURE] = self.__utilityname__
+            capabilities[GSCapabilities.REGION_CAPTURE] = self.__utilityname__
+        except (XError, DisplayError, OSError):
+            pass
+
+        return capabilities
+
+    @staticmethod
+    def can_run() -> bool:
+        '''
+        Whether this utility is available and can read the root
+        window's pixel format
+        '''
+        if not xlib_available or not os.environ.get('DISPLAY'):
+            return False
+
+        try:
+            xdisplay = display.Display()
+        except (XError, DisplayError, OSError) as exc:
+            log.debug("unable to open the display: %s", exc)
+            return False
+
+        try:
+            depth = xdisplay.screen().root_depth
+            if not XlibScreenshooter._is_supported_format(xdisplay, depth):
+                log.debug("the root window's pixel format isn't supported, depth = %s", depth)
+                return False
+        finally:
+            xdisplay.close()
+
+        return True
+
+    def _get_display(self):
+        '''Get (and keep) the connection to the X server'''
+        if self._display is None:
+            self._display = display.Display()
+
+        return self._display
+
+    @staticmethod
+    def _get_root_image(xdisplay, root, box: typing.Tuple[int, int, int, int]
+                        ) -> typing.Optional[Image.Image]:
+        '''
+        Read a rectangle of the root window as an RGB image.
+        box is (x, y, width, height).
+        '''
+        x_pos, y_pos, width, height = box
+        reply = root.get_image(x_pos, y_pos, width, height, X.ZPixmap, 0xffffffff)
+
+        if not XlibScreenshooter._is_supported_format(xdisplay, reply.depth):
+            log.info("unsupported root window format: depth = %s", reply.depth)
+            return None
+
+        # The pixel data is laid out as 32 bit words in the server's
+        # byte order, so the channel order flips with it.
+        raw_mode = "BGRX" if xdisplay.info.image_byte_order == X.LSBFirst else "XRGB"
+        return Image.frombuffer("RGB", (width, height), reply.data, "raw", raw_mode, 0, 1)
+
+    @staticmethod
+    def _is_supported_format(xdisplay, depth: int) -> bool:
+        '''Whether images of this depth are 24 bit colour in 32 bit words'''
+        bits_per_pixel = next(
+            (f.bits_per_pixel for f in xdisplay.info.pixmap_formats if f.depth == depth),
+            None
+        )
+
+        return depth in (24, 32) and bits_per_pixel == 32
+
+    @staticmethod
+    def _stamp_cursor(xdisplay, root, image: Image.Image,
+                      origin: typing.Tuple[int, int] = (0, 0)):
+        '''Draw the real cursor onto the image using XFIXES'''
+        try:
+            xdisplay.xfixes_query_version()
+            cursor = root.xfixes_get_cursor_image()
+        except (AttributeError, XError) as exc:
+            log.info("unable to get the cursor image: %s", exc)
+            return
+
+        if cursor.width < 1 or cursor.height < 1:
+            return
+
+        # Each pixel is a 32 bit ARGB value in native byte order
+        pixels = array.array('I', cursor.cursor_image)
+        raw_mode = "BGRA" if sys.byteorder == "little" else "ARGB"
+        glyph = Image.frombytes(
+            "RGBA", (cursor.width, cursor.height), pixels.tobytes(), "raw", raw_mode
+        )
+
+        image.paste(glyph, (
+            cursor.x - cursor.xhot - origin[0],
+            cursor.y - cursor.yhot - origin[1]
+        ), glyph)
@@ -1,12 +1,12 @@
 """copy action"""
 
-import io
 import subprocess
 from typing import Optional, TYPE_CHECKING
 from gscreenshot.screenshot.actions.screenshot_action import (
     ScreenshotActionError,
     ScreenshotAction,
 )
+from gscreenshot.screenshot.actions.save import get_encoded_image
 from gscreenshot.util import session_is_wayland
 
 if TYPE_CHECKING:
@@ -30,11 +30,6 @@ class CopyAction(ScreenshotAction[bool]):
         if screenshot is None:
             return False
 
-        image = screenshot.get_image()
-
-        if image is None:
-            return False
-
         params = [
             'xclip',
             '-selection',
@@ -52,21 +47,22 @@ class CopyAction(ScreenshotAction[bool]):
                 ]
             clipper_name = "wl-copy"
 
-        with io.BytesIO() as png_data:
-            image.save(png_data, "PNG")
+        # Shared with saving and opening the screenshot, so copying
+        # something which has already been saved doesn't encode it again
+        png_data = get_encoded_image(screenshot, "png")
 
-            try:
-                with subprocess.Popen(
-                    params,
-                    close_fds=True,
-                    stdin=subprocess.PIPE,
-                    stdout=None,
-                    stderr=None) as xclip:
+        try:
+            with subprocess.Popen(
+                params,
+                close_fds=True,
+                stdin=subprocess.PIPE,
+                stdout=None,
+                stderr=None) as xclip:
 
-                    xclip.communicate(input=png_data.getvalue())
-                    return True
-            except (OSError, subprocess.CalledProcessError) as exc:
-                #pylint: disable=raise-missing-from
-                raise ScreenshotActionError(
-                    f"failed to clip screenshot with clipper = '{clipper_name}': {exc}"
-                )
+                xclip.communicate(input=png_data)
+                return True
+        except (OSError, subprocess.CalledProcessError) as exc:
+            #pylint: disable=raise-missing-from
+            raise ScreenshotActionError(
+                f"failed to clip screenshot with clipper = '{clipper_name}': {exc}"
+            )
@@ -1,10 +1,22 @@
 """save action"""
+from concurrent.futures import Executor, Future
 from dataclasses import dataclass
 from datetime import datetime
+import io
 import logging
 import os
-from typing import Optional, TYPE_CHECKING
+import struct
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union, TYPE_CHECKING
 from gscreenshot.cache import GscreenshotCache
+from gscreenshot.encoder import (
+    DEFAULT_ENCODER_PROFILE,
+    EncoderService,
+    get_adaptive_palette,
+    get_encoder_options,
+    get_encoder_service,
+    to_lossless_palette,
+)
 from gscreenshot.filename import get_time_filename, interpolate_filename
 from gscreenshot.util import get_supported_formats
 from gscreenshot.screenshot.actions.screenshot_action import (
@@ -14,6 +26,7 @@ from gscreenshot.screenshot.actions.screenshot_action import (
 )
 
 if TYPE_CHECKING:
+    from PIL import Image
     from gscreenshot.screenshot import Screenshot
 
 log = logging.getLogger(name=__name__)
@@ -28,6 +41,12 @@ class SaveActionParams():
 
     update_cache: Optional[bool] = False
 
+    sequence: Optional[int] = None
+
+    encoder_profile: Optional[str] = None
+
+    adaptive_palette: Optional[bool] = None
+
 
 class SaveAction(ScreenshotAction[str | None]):
     """save action"""
@@ -39,11 +58,62 @@ class SaveAction(ScreenshotAction[str | None]):
     # generated using piexif
     EXIF_TEMPLATE = b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x02\x011\x00\x02\x00\x00\x00\x15\x00\x00\x00&\x87i\x00\x04\x00\x00\x00\x01\x00\x00\x00;\x00\x00\x00\x00gscreenshot [[VERSION]]\x00\x00\x01\x90\x03\x00\x02\x00\x00\x00\x14\x00\x00\x00I[[CREATE_DATE]]\x00' #pylint: disable=line-too-long
 
-    #pylint:disable=too-many-branches
     def execute(self, screenshot: Optional["Screenshot"]) -> Optional[str]:
         '''
         method for saving an image to a file
         '''
+        target = self._get_target(screenshot)
+        if screenshot is None or target is None:
+            return None
+
+        return self._write(screenshot, *target)
+
+    def execute_async(self, screenshot: Optional["Screenshot"],
+                      callback: Optional[Callable[["Future[Optional[str]]"], Any]] = None,
+                      service: Optional[EncoderService] = None
+                      ) -> "Future[Optional[str]]":
+        '''
+        Saves an image to a file with the encoder service.
+
+        The filename is worked out straight away, so a bad filename
+        raises ScreenshotActionError here rather than through the future.
+        '''
+        target = self._get_target(screenshot)
+        if screenshot is None or target is None:
+            future: "Future[Optional[str]]" = Future()
+            future.set_result(None)
+            if callback is not None:
+                callback(future)
+            return future
+
+        if service is None:
+            service = get_encoder_service()
+
+        # Take what's to be written now, as the effects may change before
+        # the job runs and the filename was already worked out for them
+        filename, file_type = target
+        key = self._get_artifact_key(file_type)
+        version = screenshot.get_version()
+        snapshot: Union[bytes, "Image.Image"]
+        if has_encoded_image(screenshot, key):
+            snapshot = get_encoded_image(
+                screenshot, file_type, self.params.encoder_profile, self.params.adaptive_palette
+            )
+        else:
+            # Normally already rendered for the preview
+            snapshot = screenshot.get_rendered_image()
+
+        return service.submit(
+            self._write_snapshot, screenshot, filename, file_type, version, snapshot,
+            callback=callback
+        )
+
+    #pylint:disable=too-many-branches
+    def _get_target(self, screenshot: Optional["Screenshot"]) -> Optional[Tuple[str, str]]:
+        '''
+        Works out the filename and image format to save to, or None if
+        there's nothing to save
+        '''
         if not self.params:
             raise ScreenshotActionInvalid
 
@@ -55,7 +125,7 @@ class SaveAction(ScreenshotAction[str | None]):
         if filename is None:
             filename = get_time_filename(screenshot=screenshot)
         else:
-            filename = interpolate_filename(filename, screenshot)
+            filename = interpolate_filename(filename, screenshot, self.params.sequence)
 
         file_type = "png"
 
@@ -98,33 +168,105 @@ class SaveAction(ScreenshotAction[str | None]):
         if file_type not in get_supported_formats():
             raise ScreenshotActionError(f"unrecognized image format '{file_type}'")
 
+        return filename, file_type
+
+    def execute_in(self, screenshot: Optional["Screenshot"], executor: Executor
+                   ) -> "Future[Optional[str]]":
+        '''
+        Saves an image to a file, encoding it with executor. The
+        executor may be a process pool: it's only given the rendered
+        image, and the screenshot is updated here once it's written.
+        '''
+        future: "Future[Optional[str]]" = Future()
+
+        target = self._get_target(screenshot)
+        if screenshot is None or target is None:
+            future.set_result(None)
+            return future
+
+        filename, file_type = target
+        key = self._get_artifact_key(file_type)
+        if has_encoded_image(screenshot, key):
+            # Nothing to encode, so there's nothing to gain from the executor
+            try:
+                future.set_result(self._write(screenshot, filename, file_type))
+            except ScreenshotActionError as exc:
+                future.set_exception(exc)
+            return future
+
+        version = screenshot.get_version()
+
+        def finished(encoding: Future):
+            if encoding.cancelled():
+                future.cancel()
+                return
+
+            # Whatever went wrong is passed on through the future
+            exc = encoding.exception()
+            if isinstance(exc, IOError):
+                exc = ScreenshotActionError(str(exc))
+            if exc is not None:
+                future.set_exception(exc)
+                return
+
+            data = encoding.result()
+            screenshot.set_artifact(key, data, version)
+            screenshot.set_artifact_path(key, filename, version)
+            self._saved(screenshot, filename, file_type)
+            future.set_result(filename)
+
+        _, options, palette = key
+        executor.submit(
+            write_image, screenshot.get_rendered_image(), filename, file_type, get_exif_data(),
+            dict(options), palette
+        ).add_done_callback(finished)
+
+        return future
+
+    def _write(self, screenshot: "Screenshot", filename: str, file_type: str) -> str:
+        '''Encodes the screenshot and writes it to filename'''
+        key = self._get_artifact_key(file_type)
+        version = screenshot.get_version()
+
         try:
-            # add exif data. This is sketchy but we don't need to
-            # dynamically generate it, just find and replace.
-            # This avoids needing an external library for such a simple
-            # thing.
-            exif_data = self.EXIF_TEMPLATE.replace(
-                '[[VERSION]]'.encode(),
-                '3.x.x'.encode()
-            )
-            exif_data = exif_data.replace(
-                '[[CREATE_DATE]]'.encode(),
-                datetime.now().strftime("%Y:%m:%d %H:%M:%S").encode()
+            data = get_encoded_image(
+                screenshot, file_type, self.params.encoder_profile, self.params.adaptive_palette
             )
+            write_encoded(filename, file_type, data, get_exif_data())
+        except IOError as exc:
+            raise ScreenshotActionError from exc
+
+        screenshot.set_artifact_path(key, filename, version)
+        self._saved(screenshot, filename, file_type)
+        return filename
 
-            # open(... , 'w*') truncates the file, so this is not vulnerable
-            # to the 2023 android and windows 11 problem of leaking data from
-            # cropped screenshots.
-            with open(filename, "wb") as file_pointer:
-                screenshot.get_image().save(
-                    file_pointer, file_type.upper(), exif=exif_data
-                )
+    def _write_snapshot(self, screenshot: "Screenshot", filename: str, file_type: str,
+                        version: int, snapshot: Union[bytes, "Image.Image"]) -> str:
+        '''
+        Writes the screenshot as it was when get_version returned version:
+        either its encoding, or its rendered image to encode
+        '''
+        key = self._get_artifact_key(file_type)
 
+        try:
+            if isinstance(snapshot, bytes):
+                data = snapshot
+            else:
+                cached = screenshot.get_artifact(key, version)
+                data = cached if cached is not None else _encode_artifact(snapshot, key)
+                screenshot.set_artifact(key, data, version)
+
+            write_encoded(filename, file_type, data, get_exif_data())
         except IOError as exc:
             raise ScreenshotActionError from exc
 
-        if screenshot is not None:
-            screenshot.set_saved_path(filename)
+        screenshot.set_artifact_path(key, filename, version)
+        self._saved(screenshot, filename, file_type)
+        return filename
+
+    def _saved(self, screenshot: "Screenshot", filename: str, file_type: str):
+        '''Records that the screenshot was written to filename'''
+        screenshot.set_saved_path(filename)
 
         if self.params.update_cache:
             cache = GscreenshotCache.load()
@@ -134,4 +276,183 @@ class SaveAction(ScreenshotAction[str | None]):
                 last_save_type=file_type,
             )
 
-        return filename
+    def _get_artifact_key(self, file_type: str) -> Tuple[str, Tuple, bool]:
+        '''The artifact key of the encoding this action saves with'''
+        return get_artifact_key(
+            file_type, self.params.encoder_profile, self.params.adaptive_palette
+        )
+
+
+def get_artifact_key(file_type: str, encoder_profile: Optional[str] = None,
+                     adaptive_palette: Optional[bool] = None) -> Tuple[str, Tuple, bool]:
+    '''
+    The key a screenshot encoded in file_type with an encoder profile
+    is kept under (see Screenshot.get_artifact). Unset options mean the
+    defaults.
+    '''
+    options = get_encoder_options(file_type, encoder_profile)
+
+    palette = False
+    if file_type == "png":
+        palette = get_adaptive_palette() if adaptive_palette is None else adaptive_palette
+
+    return file_type, tuple(sorted(options.items())), palette
+
+
+def has_encoded_image(screenshot: "Screenshot", key: Tuple[str, Tuple, bool]) -> bool:
+    '''Whether get_encoded_image can return without encoding anything'''
+    return _get_passthrough(screenshot, key) is not None or \
+        screenshot.get_artifact(key) is not None
+
+
+def get_encoded_image(screenshot: "Screenshot", file_type: str = "png",
+                      encoder_profile: Optional[str] = None,
+                      adaptive_palette: Optional[bool] = None) -> bytes:
+    '''
+    Gets a screenshot encoded in file_type. The encoding is kept with
+    the screenshot, so the image is only encoded once however many
+    times it's asked for.
+
+    PNGs come without exif data, which write_encoded adds. Other
+    formats include the exif data from when they were first encoded.
+    '''
+    key = get_artifact_key(file_type, encoder_profile, adaptive_palette)
+
+    # A PNG straight from the screenshot backend with nothing
+    # changed is used as-is instead of being decoded and
+    # encoded again.
+    data = _get_passthrough(screenshot, key)
+    if data is not None:
+        return data
+
+    data = screenshot.get_artifact(key)
+    if data is not None:
+        log.debug("reusing the %s encoding of %s", file_type, screenshot)
+        return data
+
+    version = screenshot.get_version()
+    data = _encode_artifact(screenshot.get_rendered_image(), key)
+    screenshot.set_artifact(key, data, version)
+
+    return data
+
+
+def _encode_artifact(image: "Image.Image", key: Tuple[str, Tuple, bool]) -> bytes:
+    '''Encodes an image as the artifact with this key'''
+    file_type, options, palette = key
+    return encode_image(
+        image, file_type, dict(options), palette,
+        None if file_type == "png" else get_exif_data()
+    )
+
+
+def _get_passthrough(screenshot: "Screenshot", key: Tuple[str, Tuple, bool]
+                     ) -> Optional[bytes]:
+    '''
+    The encoded screenshot, if it can be used without encoding it.
+    Backends compress about as much as the default profile does, so
+    other profiles always encode the screenshot themselves.
+    '''
+    file_type, options, palette = key
+    if file_type != "png" or palette:
+        return None
+
+    if dict(options) != get_encoder_options(file_type, DEFAULT_ENCODER_PROFILE):
+        return None
+
+    return screenshot.get_encoded(file_type)
+
+
+def get_exif_data() -> bytes:
+    '''The exif data to save with a screenshot'''
+    # add exif data. This is sketchy but we don't need to
+    # dynamically generate it, just find and replace.
+    # This avoids needing an external library for such a simple
+    # thing.
+    exif_data = SaveAction.EXIF_TEMPLATE.replace(
+        '[[VERSION]]'.encode(),
+        '3.x.x'.encode()
+    )
+    return exif_data.replace(
+        '[[CREATE_DATE]]'.encode(),
+        datetime.now().strftime("%Y:%m:%d %H:%M:%S").encode()
+    )
+
+
+def add_png_exif(png: bytes, exif_data: bytes) -> bytes:
+    '''
+    Adds an eXIf chunk to an encoded PNG right after its header,
+    replacing any eXIf chunk it already has.
+    '''
+    # PNG stores the TIFF data without the marker JPEG uses
+    if exif_data.startswith(b"Exif\x00\x00"):
+        exif_data = exif_data[6:]
+
+    exif_chunk = (
+        struct.pack(">I", len(exif_data)) + b"eXIf" + exif_data
+        + struct.pack(">I", zlib.crc32(b"eXIf" + exif_data))
+    )
+
+    chunks = [png[:8]]
+    position = 8
+    while position < len(png):
+        length, chunk_type = struct.unpack(">I4s", png[position:position + 8])
+        end = position + length + 12
+
+        if chunk_type != b"eXIf":
+            chunks.append(png[position:end])
+        if chunk_type == b"IHDR":
+            chunks.append(exif_chunk)
+
+        position = end
+
+    return b"".join(chunks)
+
+
+def encode_image(image: "Image.Image", file_type: str, options: Optional[Dict[str, Any]] = None,
+                 palette: bool = False, exif_data: Optional[bytes] = None) -> bytes:
+    '''
+    Encodes an image, passing options on to the encoder. If palette is
+    set, a PNG is encoded with a palette if that doesn't lose any colours.
+    '''
+    if palette:
+        paletted = to_lossless_palette(image)
+        if paletted is not None:
+            image = paletted
+
+    options = dict(options or {})
+    if exif_data is not None:
+        options["exif"] = exif_data
+
+    with io.BytesIO() as data:
+        image.save(data, file_type.upper(), **options)
+        return data.getvalue()
+
+
+def write_encoded(filename: str, file_type: str, data: bytes, exif_data: bytes):
+    '''
+    Writes an image encoded by encode_image to filename, adding
+    exif_data to PNGs
+    '''
+    if file_type == "png":
+        data = add_png_exif(data, exif_data)
+
+    # open(... , 'w*') truncates the file, so this is not vulnerable
+    # to the 2023 android and windows 11 problem of leaking data from
+    # cropped screenshots.
+    with open(filename, "wb") as file_pointer:
+        file_pointer.write(data)
+
+
+def write_image(image: "Image.Image", filename: str, file_type: str, exif_data: bytes,
+                options: Optional[Dict[str, Any]] = None, palette: bool = False) -> bytes:
+    '''
+    Encodes an image and writes it to filename, and returns the encoding
+    as get_encoded_image would. This is a plain function so it can be
+    run in a worker process.
+    '''
+    data = encode_image(
+        image, file_type, options, palette, None if file_type == "png" else exif_data
+    )
+    write_encoded(filename, file_type, data, exif_data)
+    return data
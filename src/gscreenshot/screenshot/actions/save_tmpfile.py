@@ -3,7 +3,7 @@ import os
 import tempfile
 from typing import Optional, TYPE_CHECKING
 from gscreenshot.filename import get_time_filename
-from .save import SaveAction
+from .save import SaveAction, get_artifact_key
 
 from .screenshot_action import ScreenshotAction
 
@@ -21,10 +21,23 @@ class SaveTmpfileAction(ScreenshotAction[str | None]):
         if not screenshot:
             return None
 
+        # The file may be moved or changed by whatever it's handed to,
+        # so it's always a temporary copy and never a file the user
+        # saved. A copy made earlier is reused if it's still as written.
+        key = ("tmpfile", get_artifact_key("png"))
+        path = screenshot.get_artifact_path(key)
+        if path is not None:
+            return path
+
         filename = os.path.join(
                 tempfile.gettempdir(),
                 get_time_filename(screenshot)
             )
 
+        version = screenshot.get_version()
         save_action = SaveAction(filename=filename)
-        return save_action.execute(screenshot)
+        path = save_action.execute(screenshot)
+        if path is not None:
+            screenshot.set_artifact_path(key, path, version)
+
+        return path
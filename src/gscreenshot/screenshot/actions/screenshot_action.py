@@ -3,8 +3,10 @@ base class for screenshot actions
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Any, Generic, Optional, TypeVar, TYPE_CHECKING
+from typing import Any, Callable, Generic, Optional, TypeVar, TYPE_CHECKING
+from gscreenshot.encoder import EncoderService, get_encoder_service
 
 if TYPE_CHECKING:
     from gscreenshot.screenshot import Screenshot
@@ -33,6 +35,18 @@ class ScreenshotAction(ABC, Generic[R]):
         """run this action on the provided screenshot"""
         raise NotImplementedError
 
+    def execute_async(self, screenshot: Optional["Screenshot"],
+                      callback: Optional[Callable[["Future[R]"], Any]] = None,
+                      service: Optional[EncoderService] = None) -> "Future[R]":
+        """
+        run this action on the provided screenshot with the encoder
+        service. callback is called with the future once it's done.
+        """
+        if service is None:
+            service = get_encoder_service()
+
+        return service.submit(self.execute, screenshot, callback=callback)
+
 
 class ScreenshotActionError(Exception):
     pass
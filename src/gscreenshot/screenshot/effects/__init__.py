@@ -1,10 +1,15 @@
 from .screenshot_effect import ScreenshotEffect
 from .crop import CropEffect
 from .stamp import StampEffect
+from .planner import plan_effects
+from .glyphs import get_glyph, get_scaled_glyph
 
 
 __all__ = [
     "CropEffect",
     "ScreenshotEffect",
     "StampEffect",
+    "get_glyph",
+    "get_scaled_glyph",
+    "plan_effects",
 ]
@@ -1,7 +1,7 @@
 '''
 Crop effect
 '''
-
+import typing
 from PIL import Image
 from .screenshot_effect import ScreenshotEffect
 
@@ -20,5 +20,15 @@ class CropEffect(ScreenshotEffect):
         '''apply the effect'''
         return screenshot.crop(self._meta["region"])
 
+    @property
+    def returns_new_image(self) -> bool:
+        '''cropping always makes a new image'''
+        return True
+
+    def get_output_size(self, size: typing.Tuple[int, int]) -> typing.Tuple[int, int]:
+        '''the size of the region, which is padded if it's outside of the image'''
+        left, upper, right, lower = (round(i) for i in self._meta["region"])
+        return max(right - left, 0), max(lower - upper, 0)
+
     def __repr__(self):
         return f"CropEffect({self._meta['region']})"
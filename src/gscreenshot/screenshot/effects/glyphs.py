@@ -0,0 +1,106 @@
+'''
+Process-wide cache of cursor glyphs
+'''
+import collections
+import os
+import threading
+import typing
+import weakref
+from PIL import Image
+from gscreenshot.compat import get_pil_constant
+
+
+# How many scaled variants of each glyph to keep. A glyph is normally
+# only stamped onto screenshots of a handful of sizes (one per display).
+SCALED_VARIANTS_PER_GLYPH = 8
+
+# Reentrant, since a glyph may be collected (and its weakref callback
+# run) while the lock is held
+_lock = threading.RLock()
+_glyphs: typing.Dict[typing.Tuple[str, float], Image.Image] = {}
+_scaled: typing.Dict[
+    int,
+    typing.Tuple[
+        "weakref.ref[Image.Image]",
+        "collections.OrderedDict[typing.Tuple[int, int], Image.Image]"
+    ]
+] = {}
+
+
+def get_glyph(path: typing.Union[str, os.PathLike]) -> Image.Image:
+    '''
+    Get the glyph stored in an image file, decoded and converted to
+    RGBA. Every call for the same unchanged file returns the same
+    image, so it must not be modified.
+    '''
+    path = os.fspath(path)
+    key = (path, os.path.getmtime(path))
+
+    with _lock:
+        glyph = _glyphs.get(key)
+
+    if glyph is not None:
+        return glyph
+
+    with Image.open(path) as image:
+        glyph = image.convert("RGBA")
+
+    with _lock:
+        return _glyphs.setdefault(key, glyph)
+
+
+def get_scaled_glyph(glyph: Image.Image, max_size: typing.Tuple[int, int]) -> Image.Image:
+    '''
+    Get a copy of a glyph scaled down to fit within max_size, keeping
+    its aspect ratio. Scaled copies are kept for as long as the glyph
+    is alive, so they must not be modified.
+    '''
+    with _lock:
+        entry = _scaled.get(id(glyph))
+        if entry is not None and entry[0]() is glyph:
+            variants = entry[1]
+            if max_size in variants:
+                variants.move_to_end(max_size)
+                return variants[max_size]
+
+    scaled = glyph.copy()
+    scaled.thumbnail(max_size, get_pil_constant("Resampling", "LANCZOS"))
+
+    with _lock:
+        entry = _scaled.get(id(glyph))
+        if entry is None or entry[0]() is not glyph:
+            # The id of a collected glyph can be reused by a new one, so
+            # the entry is dropped when the glyph goes away.
+            key = id(glyph)
+            entry = (weakref.ref(glyph, _get_forget_callback(key)), collections.OrderedDict())
+            _scaled[key] = entry
+
+        variants = entry[1]
+        variants[max_size] = scaled
+        while len(variants) > SCALED_VARIANTS_PER_GLYPH:
+            variants.popitem(last=False)
+
+    return scaled
+
+
+def clear_glyph_cache():
+    '''Drop every cached glyph and scaled variant'''
+    with _lock:
+        _glyphs.clear()
+        _scaled.clear()
+
+
+def _get_forget_callback(key: int) -> typing.Callable[["weakref.ref[Image.Image]"], None]:
+    '''A weakref callback which drops the scaled variants of the glyph with this key'''
+    def forget(_: "weakref.ref[Image.Image]"):
+        _forget_scaled(key)
+
+    return forget
+
+
+def _forget_scaled(key: int):
+    '''Drop the scaled variants of a glyph which has been collected'''
+    with _lock:
+        entry = _scaled.get(key)
+        if entry is not None and entry[0]() is None:
+            del _scaled[key]
@@ -0,0 +1,111 @@
+'''
+Plans how the effects of a screenshot are applied
+
+Effects are added in the order the user (or a screenshooter) asks for
+them, which is rarely the cheapest order to run them in. A cursor stamp
+added when the screenshot is taken would be drawn onto the full screen
+before a crop throws most of it away.
+
+The planner moves crops in front of the stamps before them, translating
+the stamps into the cropped image and dropping the ones that end up
+outside of it. Crops which follow each other are fused into one. Any
+other kind of effect is kept where it is and nothing is moved past it.
+'''
+import logging
+import typing
+
+from .crop import CropEffect
+from .screenshot_effect import ScreenshotEffect
+from .stamp import StampEffect
+
+
+log = logging.getLogger(__name__)
+
+
+def plan_effects(effects: typing.List[ScreenshotEffect], size: typing.Tuple[int, int]
+                 ) -> typing.List[ScreenshotEffect]:
+    '''
+    Plan the enabled effects for an image of this size. Applying the
+    returned effects in order gives the same image as applying the
+    enabled effects in order.
+
+    Effects in the plan may be new effects rather than the ones passed
+    in. The effects passed in are never changed.
+    '''
+    plan: typing.List[ScreenshotEffect] = []
+
+    for effect in effects:
+        if not effect.enabled:
+            continue
+
+        if isinstance(effect, StampEffect):
+            stamp = effect
+            if stamp.reference_size is None:
+                # The glyph is scaled to the image it's stamped on,
+                # which won't be this size if it's moved past a crop
+                stamp = effect.translated((0, 0), size)
+
+            if _is_outside(stamp, size):
+                log.debug("skipping %s, it's outside of the screenshot", stamp)
+            else:
+                plan.append(stamp)
+
+        elif isinstance(effect, CropEffect):
+            _plan_crop(plan, effect, size)
+
+        else:
+            plan.append(effect)
+
+        size = effect.get_output_size(size)
+
+    return plan
+
+
+def _plan_crop(plan: typing.List[ScreenshotEffect], crop: CropEffect,
+               size: typing.Tuple[int, int]):
+    '''Add a crop to the plan in front of the stamps before it'''
+    stamps: typing.List[StampEffect] = []
+    while plan:
+        last = plan[-1]
+        if not isinstance(last, StampEffect):
+            break
+        stamps.insert(0, last)
+        plan.pop()
+
+    left, upper, right, lower = (round(i) for i in crop.meta["region"])
+
+    previous = plan[-1] if plan else None
+    if isinstance(previous, CropEffect) and _is_within((left, upper, right, lower), size):
+        # Cropping inside of a crop is the same as one crop of the
+        # original. A crop reaching outside of the previous one can't
+        # be fused: the padding would show the original instead.
+        plan.pop()
+        previous_left, previous_upper = (round(i) for i in previous.meta["region"][:2])
+        crop = CropEffect((
+            previous_left + left,
+            previous_upper + upper,
+            previous_left + right,
+            previous_upper + lower,
+        ))
+
+    plan.append(crop)
+
+    cropped_size = (max(right - left, 0), max(lower - upper, 0))
+    for stamp in stamps:
+        translated = stamp.translated((left, upper), size)
+        if _is_outside(translated, cropped_size):
+            log.debug("skipping %s, it's outside of the crop", translated)
+        else:
+            plan.append(translated)
+
+
+def _is_within(region: typing.Tuple[int, int, int, int], size: typing.Tuple[int, int]) -> bool:
+    '''Whether a region is entirely inside of an image of this size'''
+    left, upper, right, lower = region
+    return 0 <= left <= right <= size[0] and 0 <= upper <= lower <= size[1]
+
+
+def _is_outside(stamp: StampEffect, size: typing.Tuple[int, int]) -> bool:
+    '''Whether a stamp misses an image of this size entirely'''
+    left, upper, right, lower = stamp.get_bounds(size)
+    return right <= 0 or lower <= 0 or left >= size[0] or upper >= size[1]
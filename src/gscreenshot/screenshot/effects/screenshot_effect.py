@@ -17,11 +17,30 @@ class ScreenshotEffect():
     _enabled: bool
     _alias: typing.Optional[str]
     _meta: dict
+    _change_listeners: typing.List[typing.Callable[[], None]]
 
     def __init__(self):
         self._meta = {}
         self._alias = None
         self._enabled = True
+        self._change_listeners = []
+
+    def add_change_listener(self, listener: typing.Callable[[], None]):
+        '''
+        Call listener whenever this effect changes how it
+        applies to a screenshot
+        '''
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: typing.Callable[[], None]):
+        '''Stop calling a listener added with add_change_listener'''
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def _changed(self):
+        '''Notify the listeners that this effect changed'''
+        for listener in list(self._change_listeners):
+            listener()
 
     def set_alias(self, alias: typing.Optional[str]):
         '''
@@ -35,14 +54,18 @@ class ScreenshotEffect():
         Set this effect to enabled (it will be applied to
         the screenshot)
         '''
-        self._enabled = True
+        if not self._enabled:
+            self._enabled = True
+            self._changed()
 
     def disable(self):
         '''
         Set this effect to disabled (it will NOT be applied
         to the screenshot)
         '''
-        self._enabled = False
+        if self._enabled:
+            self._enabled = False
+            self._changed()
 
     def apply_to(self, screenshot: Image.Image) -> Image.Image:
         '''
@@ -50,6 +73,22 @@ class ScreenshotEffect():
         '''
         return screenshot
 
+    def get_output_size(self, size: typing.Tuple[int, int]) -> typing.Tuple[int, int]:
+        '''
+        The size of the image this effect produces from an image of
+        the given size, without applying it
+        '''
+        return size
+
+    @property
+    def returns_new_image(self) -> bool:
+        '''
+        Whether apply_to leaves the image it's given alone and returns
+        a new one. Effects which draw onto the image they're given
+        need it to be a copy.
+        '''
+        return False
+
     @property
     def enabled(self) -> bool:
         '''Returns whether this effect is enabled'''
@@ -3,42 +3,98 @@ Stamp effect
 '''
 import typing
 from PIL import Image
+from .glyphs import get_scaled_glyph
 from .screenshot_effect import ScreenshotEffect
 
 
 class StampEffect(ScreenshotEffect):
     '''
-    Stamps another image onto the screenshot
+    Stamps another image onto the screenshot.
+
+    The glyph is scaled to the size of the screenshot it's applied to.
+    A stamp which has been moved onto a cropped copy of the screenshot
+    keeps the size of the original in reference_size, and offset is
+    the position of the crop in the original.
     '''
 
-    def __init__(self, glyph: Image.Image, position: typing.Tuple[int, int]):
+    _placement: typing.Optional[
+        typing.Tuple[typing.Tuple[int, int], Image.Image, typing.Tuple[int, int]]
+    ]
+
+    def __init__(self, glyph: Image.Image, position: typing.Tuple[int, int],
+                 reference_size: typing.Optional[typing.Tuple[int, int]] = None,
+                 offset: typing.Tuple[int, int] = (0, 0)):
         '''constructor'''
         super().__init__()
         self._glyph = glyph
         self._position = position
+        self._reference_size = reference_size
+        self._offset = offset
+        self._placement = None
+
+    @property
+    def reference_size(self) -> typing.Optional[typing.Tuple[int, int]]:
+        '''The size of the screenshot the glyph is scaled to, if fixed'''
+        return self._reference_size
+
+    def translated(self, offset: typing.Tuple[int, int],
+                   reference_size: typing.Tuple[int, int]) -> "StampEffect":
+        '''
+        A copy of this stamp for a screenshot cropped at offset
+        from one of reference_size
+        '''
+        return StampEffect(
+            self._glyph,
+            self._position,
+            self._reference_size or reference_size,
+            (self._offset[0] + offset[0], self._offset[1] + offset[1])
+        )
+
+    def get_bounds(self, size: typing.Tuple[int, int]) -> typing.Tuple[int, int, int, int]:
+        '''
+        The box the glyph covers when stamped onto a screenshot of
+        this size
+        '''
+        glyph, (x_pos, y_pos) = self._get_placement(self._reference_size or size)
+        x_pos -= self._offset[0]
+        y_pos -= self._offset[1]
+        return x_pos, y_pos, x_pos + glyph.size[0], y_pos + glyph.size[1]
 
     def apply_to(self, screenshot: Image.Image) -> Image.Image:
         '''apply the effect'''
+        cursor_img = self._get_placement(self._reference_size or screenshot.size)[0]
+        left, upper = self.get_bounds(screenshot.size)[:2]
+
+        # Passing cursor_img twice is intentional. The second time it's used
+        # as a mask (PIL uses the alpha channel) so the cursor doesn't have
+        # a black box.
+        screenshot.paste(cursor_img, (left, upper), cursor_img)
+        return screenshot
+
+    def get_output_size(self, size: typing.Tuple[int, int]) -> typing.Tuple[int, int]:
+        '''stamping doesn't change the size'''
+        return size
+
+    def _get_placement(self, screenshot_size: typing.Tuple[int, int]
+                       ) -> typing.Tuple[Image.Image, typing.Tuple[int, int]]:
+        '''The scaled glyph and where it goes on a screenshot of this size'''
+        if self._placement is not None and self._placement[0] == screenshot_size:
+            return self._placement[1], self._placement[2]
 
         cursor_pos = self._position
-        cursor_img = self._glyph.copy()
+        glyph_width, glyph_height = self._glyph.size
 
-        screenshot_width, screenshot_height = screenshot.size
+        screenshot_width, screenshot_height = screenshot_size
 
         # scale the cursor stamp to a reasonable size
         cursor_size_ratio = min(max(screenshot_width / 2000, .3), max(screenshot_height / 2000, .3))
 
         # In some rare cases this could result in a decimal (0.xxxxx) which
         # causes a division by 0 error in PIL. Max creates a safe minimum.
-        cursor_height = max(cursor_img.size[0] * cursor_size_ratio, 2)
-        cursor_width = max(cursor_img.size[1] * cursor_size_ratio, 2)
+        cursor_height = max(glyph_width * cursor_size_ratio, 2)
+        cursor_width = max(glyph_height * cursor_size_ratio, 2)
 
-        try:
-            antialias_algo = Image.Resampling.LANCZOS
-        except AttributeError: # PIL < 9.0
-            antialias_algo = Image.ANTIALIAS # type: ignore
-
-        cursor_img.thumbnail((int(cursor_width), int(cursor_height)), antialias_algo)
+        cursor_img = get_scaled_glyph(self._glyph, (int(cursor_width), int(cursor_height)))
 
         # If the cursor glyph is square, center it
         if cursor_img.size[0] == cursor_img.size[1]:
@@ -50,11 +106,14 @@ class StampEffect(ScreenshotEffect):
             )
             cursor_pos = adjusted_pos
 
-        # Passing cursor_img twice is intentional. The second time it's used
-        # as a mask (PIL uses the alpha channel) so the cursor doesn't have
-        # a black box.
-        screenshot.paste(cursor_img, cursor_pos, cursor_img)
-        return screenshot
+        self._placement = (screenshot_size, cursor_img, cursor_pos)
+        return cursor_img, cursor_pos
 
     def __repr__(self):
-        return f"StampEffect({self._glyph}, {self._position})"
+        if self._reference_size is None:
+            return f"StampEffect({self._glyph}, {self._position})"
+
+        return (
+            f"StampEffect({self._glyph}, {self._position}, "
+            f"reference_size={self._reference_size}, offset={self._offset})"
+        )
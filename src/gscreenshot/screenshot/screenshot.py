@@ -1,11 +1,16 @@
 '''
 Screenshot container classes for gscreenshot
 '''
+from dataclasses import dataclass
+import io
 import os
+import threading
 import typing
+import zlib
 from PIL import Image
+from gscreenshot.compat import get_pil_constant
 
-from .effects import ScreenshotEffect
+from .effects import ScreenshotEffect, plan_effects
 
 
 class Screenshot():
@@ -13,24 +18,179 @@ class Screenshot():
     Represents a screenshot taken via Gscreenshot.
 
     This stores various runtime metadata about the
-    individual screenshot whose PIL.Image.Image it contains
+    individual screenshot whose PIL.Image.Image it contains.
+
+    A screenshot made with from_bytes holds on to the image as the
+    screenshot backend encoded it and only decodes it when the pixels
+    are first needed.
+
+    Encoded copies of the image (artifacts) and the files they were
+    written to can be kept with the screenshot, so saving, copying and
+    opening it only encode it once. They're keyed by whatever
+    describes the encoding (format, encoder options...) and are
+    dropped when the effects change.
     '''
 
-    _image: Image.Image
+    # Encoded images in these formats are kept after decoding so they
+    # can be saved again as-is. Uncompressed formats aren't worth
+    # keeping next to their pixels.
+    KEEP_ENCODED_FORMATS = ["png"]
+
+    # Preview levels are halved until their longest side would be
+    # smaller than this
+    PREVIEW_LEVEL_MIN_SIZE = 128
+
+    # Image modes which can be spilled to disk as their raw pixels
+    RAW_SPILL_MODES = ["1", "L", "RGB", "RGBA", "RGBX"]
+
+    _image: typing.Optional[Image.Image]
+    _size: typing.Tuple[int, int]
+    _encoded: typing.Optional[bytes]
+    _encoded_format: typing.Optional[str]
+    _decode_lock: threading.Lock
+    _spilled: typing.Optional["_SpilledImage"]
     _saved_to: typing.Optional[str]
     _effects: typing.List[ScreenshotEffect]
+    _capture_region: typing.Optional[typing.Tuple[int, int, int, int]]
+    _rendered: typing.Optional[Image.Image]
+    _preview_levels: typing.Optional[typing.List[Image.Image]]
+    _stale_preview_levels: typing.Optional[typing.List[Image.Image]]
+    _effects_version: int
+    _render_lock: threading.Lock
+    _rendering_lock: threading.Lock
+    _artifacts: typing.Dict[typing.Hashable, bytes]
+    _artifact_paths: typing.Dict[typing.Hashable, typing.Tuple[str, float, int]]
 
     def __init__(self, image: Image.Image):
         '''Constructor'''
         self._image = image
+        self._size = image.size
+        self._encoded = None
+        self._encoded_format = None
+        self._decode_lock = threading.Lock()
+        self._spilled = None
         self._saved_to = None
         self._effects = []
+        self._capture_region = None
+        self._rendered = None
+        self._preview_levels = None
+        self._stale_preview_levels = None
+        self._effects_version = 0
+        self._render_lock = threading.Lock()
+        # Held while rendering, so a render in progress is waited
+        # for rather than repeated
+        self._rendering_lock = threading.Lock()
+        self._artifacts = {}
+        self._artifact_paths = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Screenshot":
+        '''
+        Make a screenshot from an encoded image. Only the header is read
+        here, the image is decoded on first use.
+
+        Raises OSError (PIL.UnidentifiedImageError) if the image format
+        isn't recognized
+        '''
+        with Image.open(io.BytesIO(data)) as header:
+            screenshot = cls(header)
+            image_format = (header.format or "").lower()
+
+        screenshot._image = None
+        screenshot._encoded = data
+        screenshot._encoded_format = image_format
+        return screenshot
+
+    def get_encoded(self, image_format: str) -> typing.Optional[bytes]:
+        '''
+        Gets the image as the screenshot backend encoded it, if it was
+        encoded in this format and get_image would return the same
+        image. Saving these bytes skips decoding and encoding the image.
+        '''
+        if self._spilled is not None:
+            self.restore()
+
+        if self._encoded is None or self._encoded_format != image_format.lower():
+            return None
+
+        if self.get_effect_plan():
+            return None
+
+        return self._encoded
+
+    def get_version(self) -> int:
+        '''
+        A number which changes whenever the image get_rendered_image
+        returns does. Read it before rendering to store an artifact of the render.
+        '''
+        with self._render_lock:
+            return self._effects_version
+
+    def get_artifact(self, key: typing.Hashable,
+                     version: typing.Optional[int] = None) -> typing.Optional[bytes]:
+        '''
+        Gets an encoded copy of the current image, if one was kept. If
+        version is given, only a copy of the image from that version is.
+        '''
+        with self._render_lock:
+            if version is not None and version != self._effects_version:
+                return None
+
+            return self._artifacts.get(key)
+
+    def set_artifact(self, key: typing.Hashable, data: bytes, version: int):
+        '''
+        Keeps an encoded copy of the image get_image returned when
+        get_version returned version. It's ignored if the image has
+        changed since.
+        '''
+        with self._render_lock:
+            if version == self._effects_version:
+                self._artifacts[key] = data
+
+    def get_artifact_path(self, key: typing.Hashable) -> typing.Optional[str]:
+        '''
+        Gets a file the current image was written to as the artifact
+        with this key, if the file hasn't changed since
+        '''
+        with self._render_lock:
+            written = self._artifact_paths.get(key)
+
+        if written is None:
+            return None
+
+        path, mtime, size = written
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_mtime != mtime or stat.st_size != size:
+            return None
+
+        return path
+
+    def set_artifact_path(self, key: typing.Hashable, path: str, version: int):
+        '''
+        Records that the image get_image returned when get_version
+        returned version was written to path as the artifact with this key
+        '''
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+
+        with self._render_lock:
+            if version == self._effects_version:
+                self._artifact_paths[key] = (path, stat.st_mtime, stat.st_size)
 
     def add_effect(self, effect: ScreenshotEffect):
         '''
         Add another overlay effect to this screenshot
         '''
         self._effects.append(effect)
+        effect.add_change_listener(self._effects_changed)
+        self._effects_changed()
 
     def remove_effect(self, effect: ScreenshotEffect):
         '''
@@ -39,6 +199,8 @@ class Screenshot():
         being removed.
         '''
         self._effects.remove(effect)
+        effect.remove_change_listener(self._effects_changed)
+        self._effects_changed()
 
     def get_effects(self) -> typing.List[ScreenshotEffect]:
         '''
@@ -47,16 +209,229 @@ class Screenshot():
         return self._effects
 
     def get_image(self) -> Image.Image:
-        '''Gets the underlying PIL.Image.Image'''
-        image = self._image.copy()
+        '''
+        Gets the underlying PIL.Image.Image with the enabled effects
+        applied. The image is a copy which the caller is free to modify.
+        '''
+        return self.get_rendered_image().copy()
+
+    def get_rendered_image(self) -> Image.Image:
+        '''
+        Gets the image get_image would copy. It's kept until the effects
+        change, so repeated calls are cheap, and the same image is
+        returned each time: it must not be modified.
+        '''
+        with self._render_lock:
+            if self._rendered is not None:
+                return self._rendered
+
+        with self._rendering_lock:
+            with self._render_lock:
+                if self._rendered is not None:
+                    return self._rendered
+                version = self._effects_version
+
+            return self._render(version)
+
+    def _render(self, version: int) -> Image.Image:
+        '''Apply the effects to the original image. The rendering lock must be held.'''
+        plan = self.get_effect_plan()
+
+        original = self._get_original()
+        image = original
+        if plan and not plan[0].returns_new_image:
+            image = image.copy()
 
+        for effect in plan:
+            image = effect.apply_to(image)
+
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        with self._render_lock:
+            # Only keep it if the effects didn't change while rendering
+            if version == self._effects_version:
+                self._rendered = image
+
+        return image
+
+    def get_effect_plan(self) -> typing.List[ScreenshotEffect]:
+        '''
+        Gets the effects get_image applies, in the order it applies
+        them. See plan_effects.
+        '''
+        return plan_effects(self._effects, self._size)
+
+    def get_size(self) -> typing.Tuple[int, int]:
+        '''
+        Gets the (width, height) of the image get_image would return,
+        without rendering it
+        '''
+        with self._render_lock:
+            if self._rendered is not None:
+                return self._rendered.size
+
+        size = self._size
         for effect in self._effects:
             if effect.enabled:
-                image = effect.apply_to(image)
+                size = effect.get_output_size(size)
+
+        return size
+
+    def get_memory_usage(self) -> int:
+        '''Roughly how many bytes of image data this screenshot holds in memory'''
+        usage = 0
+
+        encoded = self._encoded
+        if encoded is not None:
+            usage += len(encoded)
+
+        image = self._image
+        if image is not None:
+            usage += _get_image_bytes(image)
+
+        rendered = self._rendered
+        if rendered is not None and rendered is not image:
+            usage += _get_image_bytes(rendered)
+
+        preview_levels = self._preview_levels
+        if preview_levels is not None:
+            usage += sum(_get_image_bytes(level) for level in preview_levels[1:])
 
-        return image.convert("RGB")
+        stale_preview_levels = self._stale_preview_levels
+        if stale_preview_levels is not None:
+            usage += sum(_get_image_bytes(level) for level in stale_preview_levels)
 
-    def get_preview(self, width: int, height: int, with_border=False) -> Image.Image:
+        usage += sum(len(data) for data in list(self._artifacts.values()))
+
+        return usage
+
+    def spill(self, path: str) -> int:
+        '''
+        Move the image data of this screenshot to a file at path and drop
+        it from memory. It's read back the next time it's needed.
+
+        Returns the size of the file, or 0 if there was nothing to spill.
+        Raises OSError if the file can't be written.
+        '''
+        with self._decode_lock, self._render_lock:
+            if self._spilled is not None:
+                return 0
+
+            raw = False
+            if self._encoded is not None:
+                data = self._encoded
+            elif self._image is not None and self._image.mode in self.RAW_SPILL_MODES:
+                # Fast compression, the point is to get it out of memory
+                data = zlib.compress(self._image.tobytes(), 1)
+                raw = True
+            elif self._image is not None:
+                buffer = io.BytesIO()
+                self._image.save(buffer, "PNG", compress_level=1)
+                data = buffer.getvalue()
+            else:
+                return 0
+
+            with open(path, "wb") as spill_file:
+                spill_file.write(data)
+
+            mode = self._image.mode if self._image is not None else ""
+            self._spilled = _SpilledImage(path, raw, mode, len(data))
+            self._image = None
+            self._encoded = None
+            self._rendered = None
+            self._preview_levels = None
+            self._stale_preview_levels = None
+            self._artifacts = {}
+
+            return len(data)
+
+    def restore(self):
+        '''
+        Read the image data back into memory if it was spilled to disk.
+
+        Raises OSError if the spilled file can't be read.
+        '''
+        with self._decode_lock:
+            self._restore()
+
+    def delete_spilled(self):
+        '''
+        Delete the file this screenshot was spilled to, if it was. The
+        image can't be read back afterwards, so this is only for
+        screenshots which are being thrown away.
+        '''
+        spilled = self._spilled
+        if spilled is None:
+            return
+
+        try:
+            os.unlink(spilled.path)
+        except OSError:
+            pass
+
+    def is_spilled(self) -> bool:
+        '''Whether the image data of this screenshot is on disk'''
+        return self._spilled is not None
+
+    def get_spilled_size(self) -> int:
+        '''The size of the file this screenshot was spilled to, if it was'''
+        spilled = self._spilled
+        return spilled.size if spilled is not None else 0
+
+    def _restore(self):
+        '''Read spilled image data back. The decode lock must be held.'''
+        spilled = self._spilled
+        if spilled is None:
+            return
+
+        with open(spilled.path, "rb") as spill_file:
+            data = spill_file.read()
+
+        if spilled.raw:
+            self._image = Image.frombytes(spilled.mode, self._size, zlib.decompress(data))
+        else:
+            self._encoded = data
+
+        self._spilled = None
+
+        try:
+            os.unlink(spilled.path)
+        except OSError:
+            pass
+
+    def _get_original(self) -> Image.Image:
+        '''The image as captured, decoding it if it's not yet'''
+        with self._decode_lock:
+            self._restore()
+
+            if self._image is None:
+                assert self._encoded is not None
+                with Image.open(io.BytesIO(self._encoded)) as image:
+                    image.load()
+                self._image = image
+
+                if self._encoded_format not in self.KEEP_ENCODED_FORMATS:
+                    self._encoded = None
+
+            return self._image
+
+    def _effects_changed(self):
+        '''Drop the rendered image after the effects change'''
+        with self._render_lock:
+            self._effects_version += 1
+            self._rendered = None
+            if self._preview_levels is not None:
+                # Quick previews are made from these until the new
+                # levels are ready. The full size level is dropped,
+                # it's the old render.
+                self._stale_preview_levels = self._preview_levels[1:] or self._preview_levels
+            self._preview_levels = None
+            self._artifacts = {}
+            self._artifact_paths = {}
+
+    def get_preview(self, width: int, height: int, with_border=False,
+                    quick=False) -> Image.Image:
         '''
         Gets a preview of the image.
 
@@ -64,20 +439,46 @@ class Screenshot():
             width: int
             height: int
             with_border: bool, whether to add a drop shadow for visibility
+            quick: bool, make a rough preview as fast as possible, using
+                nearest neighbour scaling from whatever is at hand. This
+                never renders the image: if the effects changed, the
+                preview may be of the image from before the change, and
+                if there's nothing at hand it's blank.
         Returns:
             Image
         '''
-        thumbnail = self.get_image().copy()
+        if quick:
+            levels = self._get_quick_preview_levels()
+            if levels is None:
+                return self._get_blank_preview(width, height, with_border)
+            resample = get_pil_constant("Resampling", "NEAREST")
+        else:
+            levels = self._get_preview_levels()
+            resample = get_pil_constant("Resampling", "LANCZOS")
 
-        try:
-            antialias_algo = Image.Resampling.LANCZOS
-        except AttributeError: # PIL < 9.0
-            antialias_algo = Image.ANTIALIAS # type: ignore
+        image = levels[0]
 
-        if thumbnail.height/height < .1 and thumbnail.width/width < .1:
-            thumbnail = thumbnail.resize((thumbnail.width*10, thumbnail.height*10))
+        if image.height/height < .1 and image.width/width < .1:
+            thumbnail = image.resize((image.width*10, image.height*10))
+            thumbnail.thumbnail((width, height), resample)
+        else:
+            # Start from the smallest level that's still at least as
+            # big as the preview
+            scale = min(width / image.width, height / image.height)
+            for level in reversed(levels):
+                if level.width >= image.width * scale and level.height >= image.height * scale:
+                    image = level
+                    break
 
-        thumbnail.thumbnail((width, height), antialias_algo)
+            if quick:
+                scale = min(width / image.width, height / image.height, 1)
+                thumbnail = image.resize(
+                    (max(round(image.width * scale), 1), max(round(image.height * scale), 1)),
+                    resample
+                )
+            else:
+                thumbnail = image.copy()
+                thumbnail.thumbnail((width, height), resample)
 
         if with_border:
             shadow = Image.new(
@@ -90,6 +491,80 @@ class Screenshot():
 
         return thumbnail
 
+    def _get_quick_preview_levels(self) -> typing.Optional[typing.List[Image.Image]]:
+        '''The closest thing to preview levels there is without rendering'''
+        with self._render_lock:
+            if self._preview_levels is not None:
+                return self._preview_levels
+
+            if self._rendered is not None:
+                return [self._rendered]
+
+            image = self._image
+            if image is not None and not any(effect.enabled for effect in self._effects):
+                return [image]
+
+            return self._stale_preview_levels
+
+    def _get_blank_preview(self, width: int, height: int, with_border: bool) -> Image.Image:
+        '''A placeholder the size of the preview of the image'''
+        image_width, image_height = self.get_size()
+        scale = min(width / max(image_width, 1), height / max(image_height, 1))
+        size = (max(round(image_width * scale), 1), max(round(image_height * scale), 1))
+
+        if with_border:
+            size = (size[0] + 4, size[1] + 4)
+
+        return Image.new("RGBA", size, (0, 0, 0, 0))
+
+    def _get_preview_levels(self) -> typing.List[Image.Image]:
+        '''
+        The image followed by copies of it, each half the size of the
+        one before. They're made once and kept until the effects change.
+        '''
+        with self._render_lock:
+            if self._preview_levels is not None:
+                return self._preview_levels
+            version = self._effects_version
+
+        levels = [self.get_rendered_image()]
+        while max(levels[-1].size) // 2 >= self.PREVIEW_LEVEL_MIN_SIZE:
+            levels.append(levels[-1].reduce(2))
+
+        with self._render_lock:
+            if version == self._effects_version:
+                self._preview_levels = levels
+                self._stale_preview_levels = None
+
+        return levels
+
+    def set_capture_region(self, region: typing.Optional[typing.Tuple[int, int, int, int]]):
+        '''
+        Set the region of the screen this screenshot was captured
+        from, if only a region was captured
+        '''
+        self._capture_region = region
+
+    def get_capture_region(self) -> typing.Optional[typing.Tuple[int, int, int, int]]:
+        '''
+        Get the region of the screen this screenshot was captured from.
+        This is None for a screenshot of the full screen.
+        '''
+        return self._capture_region
+
+    def translate_region(self, region: typing.Tuple[int, int, int, int]
+                         ) -> typing.Tuple[int, int, int, int]:
+        '''
+        Translate a region of the screen into a region of this
+        screenshot's image. Parts of the region which weren't
+        captured will be empty when cropped.
+        '''
+        if self._capture_region is None:
+            return region
+
+        left, upper = self._capture_region[0], self._capture_region[1]
+        return (region[0] - left, region[1] - upper, region[2] - left, region[3] - upper)
+
     def set_saved_path(self, path: typing.Optional[str]):
         '''Set the path this screenshot image was saved to'''
         self._saved_to = path
@@ -108,5 +583,29 @@ class Screenshot():
         return os.path.exists(saved_path)
 
     def __repr__(self) -> str:
-        return f'''{self.__class__.__name__}(image={self._image})
+        image = self._image
+        if self._spilled is not None:
+            image = f"<{self._size[0]}x{self._size[1]}, spilled to {self._spilled.path}>"
+        elif image is None:
+            image = f"<{self._encoded_format} {self._size[0]}x{self._size[1]}, not decoded>"
+
+        return f'''{self.__class__.__name__}(image={image})
         '''
+
+
+@dataclass
+class _SpilledImage():
+    '''
+    Where a screenshot's image data went when it was spilled to disk.
+    raw is whether the file holds compressed pixels in this mode
+    rather than an encoded image.
+    '''
+    path: str
+    raw: bool
+    mode: str
+    size: int
+
+
+def _get_image_bytes(image: Image.Image) -> int:
+    '''Roughly how many bytes the pixels of an image take'''
+    return image.width * image.height * len(image.getbands())
@@ -1,25 +1,63 @@
 '''
 Screenshot container classes for gscreenshot
 '''
+from dataclasses import dataclass
+import itertools
+import logging
+import os
+import shutil
+import tempfile
 import typing
+import weakref
 
 from gscreenshot.meta import get_app_icon
 from .screenshot import Screenshot
 
 
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryStats():
+    '''
+    How much image data a ScreenshotCollection holds, in bytes
+
+    budget: the memory budget, if there is one
+    resident_bytes: image data held in memory
+    spilled_bytes: image data spilled to disk
+    '''
+    budget: typing.Optional[int]
+    resident_bytes: int = 0
+    spilled_bytes: int = 0
+    resident: int = 0
+    spilled: int = 0
+
+
 class ScreenshotCollection():
     '''
     The collection of screenshots taken by gscreenshot
     during the active session
+
+    If memory_budget (in bytes) is set and the screenshots use more
+    memory than that, the least recently viewed ones are spilled to
+    a private temporary directory. A spilled screenshot is read back
+    when the cursor reaches it, or whenever its image is needed.
     '''
 
     _screenshots: typing.List[Screenshot]
     _cursor: int
+    _memory_budget: typing.Optional[int]
+    _recent: typing.List[Screenshot]
+    _spill_dir: typing.Optional[str]
 
-    def __init__(self):
+    def __init__(self, memory_budget: typing.Optional[int] = None):
         '''constructor'''
         self._screenshots = []
         self._cursor = 0
+        self._memory_budget = memory_budget
+        self._recent = []
+        self._spill_dir = None
+        self._spill_names = itertools.count()
 
     def __len__(self) -> int:
         '''length'''
@@ -39,15 +77,26 @@ class ScreenshotCollection():
     def append(self, item: Screenshot):
         '''adds a screenshot to the end of the collection'''
         self._screenshots.append(item)
+        self._touch(item)
 
     def remove(self, item: Screenshot):
         '''removes a screenshot'''
         self._screenshots.remove(item)
+        self._discard(item)
         if not self.has_next():
             self.cursor_to_end()
         elif not self.has_previous():
             self.cursor_to_start()
 
+    def clear(self):
+        '''removes every screenshot'''
+        screenshots = self._screenshots
+        self._screenshots = []
+        self._cursor = 0
+
+        for screenshot in screenshots:
+            self._discard(screenshot)
+
     def replace(self, replacement: Screenshot, idx: int = -2):
         '''replaces a screenshot at the cursor or provided index'''
         if idx == -2:
@@ -58,10 +107,15 @@ class ScreenshotCollection():
             return
 
         try:
+            replaced = self._screenshots[idx]
             self._screenshots[idx] = replacement
         except IndexError:
+            replaced = self._screenshots[self._cursor]
             self._screenshots[self._cursor] = replacement
 
+        self._discard(replaced)
+        self._touch(replacement)
+
     def insert(self, screenshot: Screenshot):
         '''
         Inserts a screenshot at the cursor
@@ -75,6 +129,7 @@ class ScreenshotCollection():
                 [screenshot] + self._screenshots[self._cursor + 1:]
 
             self._cursor = self._cursor + 1
+            self._touch(screenshot)
 
         except IndexError:
             self.append(screenshot)
@@ -100,7 +155,7 @@ class ScreenshotCollection():
         '''
         if self.has_next():
             self._cursor += 1
-            return self[self._cursor]
+            return self._touch(self[self._cursor])
 
         return None
 
@@ -110,7 +165,7 @@ class ScreenshotCollection():
         '''
         if self.has_previous():
             self._cursor -= 1
-            return self[self._cursor]
+            return self._touch(self[self._cursor])
 
         return None
 
@@ -137,11 +192,98 @@ class ScreenshotCollection():
     def cursor_to_start(self):
         '''move the cursor to index 0'''
         self._cursor = 0
+        if self._screenshots:
+            self._touch(self._screenshots[self._cursor])
 
     def cursor_to_end(self):
         '''move the cursor to the last (highest) index'''
         self._cursor = len(self._screenshots) - 1
+        if self._screenshots:
+            self._touch(self._screenshots[self._cursor])
 
     def has_unsaved(self):
         '''returns True if there are unsaved screenshots'''
         return not all(s.saved() for s in self._screenshots)
+
+    def get_memory_stats(self) -> MemoryStats:
+        '''How much of the collection is in memory and how much is on disk'''
+        stats = MemoryStats(budget=self._memory_budget)
+        for screenshot in self._screenshots:
+            if screenshot.is_spilled():
+                stats.spilled += 1
+                stats.spilled_bytes += screenshot.get_spilled_size()
+            else:
+                stats.resident += 1
+                stats.resident_bytes += screenshot.get_memory_usage()
+
+        return stats
+
+    def _touch(self, screenshot: Screenshot) -> Screenshot:
+        '''
+        Mark a screenshot as the most recently viewed, reading it back
+        if it was spilled, then spill others if that's over the budget
+        '''
+        self._forget(screenshot)
+        self._recent.append(screenshot)
+
+        if screenshot.is_spilled():
+            try:
+                screenshot.restore()
+            except OSError as exc:
+                log.warning("failed to read back spilled screenshot: %s", exc)
+
+        self._enforce_memory_budget()
+        return screenshot
+
+    def _forget(self, screenshot: Screenshot):
+        '''Stop tracking when a screenshot was viewed'''
+        if screenshot in self._recent:
+            self._recent.remove(screenshot)
+
+    def _discard(self, screenshot: Screenshot):
+        '''
+        Stop tracking a screenshot which left the collection, and delete
+        the file it was spilled to so the spill directory doesn't grow
+        '''
+        if screenshot in self._screenshots:
+            return
+
+        self._forget(screenshot)
+        screenshot.delete_spilled()
+
+    def _enforce_memory_budget(self):
+        '''Spill the least recently viewed screenshots until within the budget'''
+        if self._memory_budget is None:
+            return
+
+        usage = sum(screenshot.get_memory_usage() for screenshot in self._screenshots)
+        current = self.cursor_current()
+
+        for screenshot in list(self._recent):
+            if usage <= self._memory_budget:
+                return
+
+            if screenshot is current or screenshot is self._recent[-1]:
+                continue
+
+            memory = screenshot.get_memory_usage()
+            if memory == 0:
+                continue
+
+            try:
+                path = os.path.join(self._get_spill_dir(), f"{next(self._spill_names)}.spill")
+                spilled = screenshot.spill(path)
+            except OSError as exc:
+                log.warning("failed to spill screenshot to disk: %s", exc)
+                return
+
+            log.debug("spilled %s bytes to %s bytes on disk", memory, spilled)
+            usage -= memory
+
+    def _get_spill_dir(self) -> str:
+        '''The private directory spilled screenshots go to, which is made on first use'''
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="gscreenshot-")
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+        return self._spill_dir
@@ -26,6 +26,8 @@ class GSCapabilities():
     ALTERNATE_CURSOR = "alternate_cursor"
     CAPTURE_FULLSCREEN = "capture_full_screen"
     SCALING_DETECTION = "scaling_detection"
+    REGION_CAPTURE = "region_capture"
+    OUTPUT_CAPTURE = "output_capture"
 
 
 # This is a direct copy and paste of distutil.spawn.is_executable.
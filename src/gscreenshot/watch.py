@@ -0,0 +1,300 @@
+'''
+Change-triggered capture for gscreenshot
+
+A watch polls a region of the screen and only saves a screenshot when
+enough of it changed since the last one that was saved. Polling is kept
+cheap in two ways:
+
+ * On X11 with the DAMAGE extension, the X server tells gscreenshot
+   which parts of the screen were redrawn, so the region is only
+   captured after something was drawn over it.
+ * Captures are compared against the last saved frame on a downsampled
+   greyscale copy split into tiles. Tiles with an unchanged hash are
+   skipped and only the changed tiles are compared pixel by pixel.
+'''
+from dataclasses import dataclass
+import logging
+import math
+import os
+import typing
+import zlib
+
+from PIL import Image, ImageChops
+
+from gscreenshot.filename import interpolate_filename
+from gscreenshot.scheduler import IntervalScheduler
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.actions import SaveAction, ScreenshotActionError
+from gscreenshot.util import session_is_wayland
+
+try:
+    from Xlib import display
+    from Xlib.ext import damage
+    from Xlib.error import DisplayError, XError
+    xlib_available = True
+except ImportError:
+    xlib_available = False
+
+
+log = logging.getLogger(__name__)
+
+
+class TileChangeDetector():
+    '''
+    Measures how much of an image changed compared to a reference image.
+
+    Images are reduced so their longest side is at most max_side pixels,
+    converted to greyscale and split into tile_size tiles. A pixel counts
+    as changed if it differs from the reference by more than tolerance,
+    which hides compression noise and subpixel rendering differences.
+    '''
+
+    _reference: typing.Optional[Image.Image]
+    _reference_hashes: typing.List[int]
+
+    def __init__(self, tile_size: int = 16, max_side: int = 256, tolerance: int = 16):
+        '''constructor'''
+        self._tile_size = tile_size
+        self._max_side = max_side
+        self._tolerance = tolerance
+        self._reference = None
+        self._reference_hashes = []
+
+    def changed_fraction(self, image: Image.Image) -> float:
+        '''
+        The fraction (0 to 1) of the image which differs from the
+        reference. Without a reference, everything has changed.
+        '''
+        small = self._downsample(image)
+        if self._reference is None or self._reference.size != small.size:
+            return 1.0
+
+        hashes = self._tile_hashes(small)
+        changed_pixels = 0
+
+        for box, tile_hash, reference_hash in zip(
+                self._get_tiles(small.size), hashes, self._reference_hashes):
+            if tile_hash == reference_hash:
+                continue
+
+            difference = ImageChops.difference(small.crop(box), self._reference.crop(box))
+            changed = difference.point(lambda value: 255 if value > self._tolerance else 0)
+            changed_pixels += changed.histogram()[255]
+
+        return changed_pixels / (small.width * small.height)
+
+    def set_reference(self, image: Image.Image):
+        '''Set the image later images are compared with'''
+        self._reference = self._downsample(image)
+        self._reference_hashes = self._tile_hashes(self._reference)
+
+    def _downsample(self, image: Image.Image) -> Image.Image:
+        '''Reduce an image to a small greyscale copy'''
+        factor = max(1, math.ceil(max(image.size) / self._max_side))
+        small = image.convert("L")
+        if factor > 1:
+            small = small.reduce(factor)
+
+        return small
+
+    def _get_tiles(self, size: typing.Tuple[int, int]
+                   ) -> typing.List[typing.Tuple[int, int, int, int]]:
+        '''The boxes of the tiles an image of this size is split into'''
+        width, height = size
+        return [
+            (left, upper, min(left + self._tile_size, width), min(upper + self._tile_size, height))
+            for upper in range(0, height, self._tile_size)
+            for left in range(0, width, self._tile_size)
+        ]
+
+    def _tile_hashes(self, small: Image.Image) -> typing.List[int]:
+        '''A checksum of each tile of an image'''
+        return [zlib.crc32(small.crop(box).tobytes()) for box in self._get_tiles(small.size)]
+
+
+class XDamageMonitor():
+    '''
+    Tracks which parts of an X11 screen were redrawn using the
+    DAMAGE extension
+    '''
+
+    def __init__(self, xdisplay):
+        '''constructor'''
+        self._display = xdisplay
+        self._root = xdisplay.screen().root
+        self._display.damage_query_version()
+        self._damage = self._root.damage_create(damage.DamageReportDeltaRectangles)
+        # Anything drawn before the watch started is of no interest
+        self._display.damage_subtract(self._damage)
+        self._display.flush()
+
+    @staticmethod
+    def create() -> typing.Optional["XDamageMonitor"]:
+        '''Create a monitor, or None if DAMAGE isn't available'''
+        if not xlib_available or session_is_wayland() or not os.environ.get('DISPLAY'):
+            return None
+
+        try:
+            xdisplay = display.Display()
+            if not xdisplay.has_extension('DAMAGE'):
+                xdisplay.close()
+                return None
+
+            return XDamageMonitor(xdisplay)
+        except (XError, DisplayError, OSError) as exc:
+            log.info("unable to monitor the screen with DAMAGE: %s", exc)
+            return None
+
+    def damaged(self, region: typing.Tuple[int, int, int, int]) -> bool:
+        '''
+        Whether any part of the region was redrawn since the last
+        call. region is (left, upper, right, lower).
+        '''
+        left, upper, right, lower = region
+        was_damaged = False
+
+        while self._display.pending_events():
+            event = self._display.next_event()
+            if not isinstance(event, damage.DamageNotify):
+                continue
+
+            area = event.area
+            if (area.x < right and area.x + area.width > left
+                    and area.y < lower and area.y + area.height > upper):
+                was_damaged = True
+
+        self._display.damage_subtract(self._damage)
+        self._display.flush()
+
+        return was_damaged
+
+    def close(self):
+        '''Stop monitoring'''
+        try:
+            self._display.damage_destroy(self._damage)
+            self._display.close()
+        except (XError, DisplayError, OSError):
+            pass
+
+
+@dataclass
+class WatchStats():
+    '''
+    Results of a watch
+
+    foldername: where the screenshots were saved, once the watch has run
+    polls: how many times the region was due to be checked
+    skipped: polls where nothing was redrawn over the region, so
+             there was no need to capture it
+    captures: how many times the region was captured and compared
+    '''
+    foldername: str = ""
+    polls: int = 0
+    skipped: int = 0
+    captures: int = 0
+    frames_saved: int = 0
+    frames_failed: int = 0
+    elapsed: float = 0
+
+    def report(self) -> str:
+        '''A human readable summary of the watch'''
+        return (
+            f"{self.frames_saved} frames saved in {self.elapsed:.2f}s: {self.polls} polls, "
+            f"{self.skipped} skipped without changes, {self.captures} captures compared, "
+            f"{self.frames_failed} failed"
+        )
+
+
+class RegionWatcher():
+    '''
+    Watches a region, saving a screenshot each time more than threshold
+    (0 to 1) of it changed since the last screenshot saved. The first
+    screenshot is always saved.
+
+    capture is called to take a screenshot of the region. Screenshots
+    are saved to filename, where "$n" is the sequence number.
+    '''
+
+    #pylint: disable=too-many-arguments
+    def __init__(self, capture: typing.Callable[[], typing.Optional[Screenshot]],
+                 region: typing.Tuple[int, int, int, int], filename: str,
+                 scheduler: IntervalScheduler, threshold: float = 0.01,
+                 max_frames: typing.Optional[int] = None,
+                 damage_monitor: typing.Optional[XDamageMonitor] = None):
+        '''constructor'''
+        self._capture = capture
+        self._region = region
+        self._filename = filename
+        self._scheduler = scheduler
+        self._threshold = threshold
+        self._max_frames = max_frames
+        self._damage_monitor = damage_monitor
+        self._detector = TileChangeDetector()
+        self._stats = WatchStats(foldername=os.path.dirname(filename))
+
+    def run(self) -> WatchStats:
+        '''Watch until the scheduler stops, max_frames are saved or Ctrl+C'''
+        foldername = interpolate_filename(self._stats.foldername)
+        if foldername and not os.path.exists(foldername):
+            try:
+                os.makedirs(foldername)
+            except (IOError, OSError) as exc:
+                log.info("failed to make tree '%s': %s", foldername, exc)
+
+        # Report the folder the screenshots actually went to
+        self._stats.foldername = foldername or os.curdir
+
+        try:
+            for _ in self._scheduler:
+                self._poll()
+                if self._max_frames is not None and self._stats.frames_saved >= self._max_frames:
+                    self._scheduler.stop()
+        except KeyboardInterrupt:
+            log.info("stopping watch")
+        finally:
+            if self._damage_monitor is not None:
+                self._damage_monitor.close()
+
+        self._stats.elapsed = self._scheduler.elapsed
+        return self._stats
+
+    def _poll(self):
+        '''Check the region once'''
+        self._stats.polls += 1
+
+        # The damage monitor only knows about changes after it's created,
+        # so the first frame is always captured
+        if self._damage_monitor is not None and self._stats.captures > 0:
+            if not self._damage_monitor.damaged(self._region):
+                self._stats.skipped += 1
+                return
+
+        screenshot = self._capture()
+        if screenshot is None:
+            self._stats.frames_failed += 1
+            return
+
+        self._stats.captures += 1
+        image = screenshot.get_rendered_image()
+        changed = self._detector.changed_fraction(image)
+
+        if changed < self._threshold:
+            log.debug("region changed by %.4f, below the threshold", changed)
+            return
+
+        log.debug("region changed by %.4f, saving", changed)
+
+        try:
+            saved = SaveAction(
+                filename=self._filename, overwrite=False, sequence=self._stats.frames_saved + 1
+            ).execute(screenshot)
+        except ScreenshotActionError as exc:
+            log.warning("failed to save screenshot: %s", exc)
+            saved = None
+
+        if saved is None:
+            self._stats.frames_failed += 1
+            return
+
+        self._stats.frames_saved += 1
+        self._detector.set_reference(image)
@@ -0,0 +1,78 @@
+'''
+Thin client for a resident gscreenshot daemon (gscreenshot --daemon)
+
+This is deliberately kept outside of the gscreenshot package and only
+uses the standard library. Importing anything from gscreenshot would
+pull in PIL, gi and every backend, which is the startup cost the
+daemon exists to avoid.
+
+If no daemon is running, the client falls back to gscreenshot-cli.
+'''
+import json
+import os
+import socket
+import sys
+import tempfile
+import typing
+
+
+def get_socket_path() -> str:
+    '''Get the path of the gscreenshot daemon socket'''
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, "gscreenshot.sock")
+
+    return os.path.join(tempfile.gettempdir(), f"gscreenshot-{os.getuid()}.sock")
+
+
+def send_message(connection: socket.socket, message: dict):
+    '''Send a message as a single line of JSON'''
+    connection.sendall(json.dumps(message).encode("UTF-8") + b"\n")
+
+
+def receive_message(connection: socket.socket) -> typing.Optional[dict]:
+    '''Receive a single line of JSON'''
+    with connection.makefile("rb") as reader:
+        line = reader.readline()
+
+    if not line:
+        return None
+
+    return json.loads(line.decode("UTF-8"))
+
+
+def request(argv: typing.List[str], socket_path: typing.Optional[str] = None) -> dict:
+    '''
+    Forward command line arguments to the daemon and wait for the result.
+
+    Returns {"status": int, "stdout": str, "stderr": str}
+    Raises OSError if the daemon isn't reachable.
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path or get_socket_path())
+        send_message(connection, {"argv": argv, "cwd": os.getcwd()})
+        response = receive_message(connection)
+
+    if response is None:
+        raise ConnectionResetError("gscreenshot daemon closed the connection")
+
+    return response
+
+
+def main():
+    '''Run the client'''
+    argv = sys.argv[1:]
+
+    try:
+        response = request(argv)
+    except OSError:
+        try:
+            os.execvp("gscreenshot-cli", ["gscreenshot-cli"] + argv)
+        except OSError as exc:
+            print(f"gscreenshot daemon is not running and gscreenshot-cli failed: {exc}",
+                  file=sys.stderr)
+            sys.exit(1)
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    sys.exit(response.get("status", 1))
@@ -14,6 +14,9 @@ class CLITestGscreenshotCalls(unittest.TestCase):
     def setUp(self):
         self.app = mock.MagicMock()
         self.app.get_available_cursors.return_value = {}
+        self.app.current.get_encoded.return_value = None
+        self.app.current.get_artifact.return_value = None
+        self.app.current.get_artifact_path.return_value = None
         pixmaps_path = "gscreenshot.resources.pixmaps"
         screenshot = None
         with as_file(files(pixmaps_path).joinpath('gscreenshot.png')) as png_path:
@@ -60,6 +63,70 @@ class CLITestGscreenshotCalls(unittest.TestCase):
             delay=5, capture_cursor=True, cursor_name=None, overwrite=True
         )
 
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    @mock.patch('os.makedirs')
+    def test_params_output(self, makedirs, fopen):
+        args = get_args(["--delay", "5", "--output", "DP-1"])
+        main(app=self.app, args=args)
+        self.app.screenshot_output.assert_called_with(
+            delay=5, capture_cursor=False, cursor_name=None, overwrite=True, output="DP-1"
+        )
+
+    def test_params_burst(self):
+        self.app.screenshot_burst.return_value.frames_saved = 3
+        self.app.screenshot_burst.return_value.report.return_value = ""
+        args = get_args(["--burst", "3", "--interval", "250", "-f", "potato"])
+        main(app=self.app, args=args)
+        self.app.screenshot_burst.assert_called_with(
+            3, 250, "potato", delay=0, capture_cursor=False, cursor_name=None,
+            region=None, output=None
+        )
+        self.app.screenshot_full_display.assert_not_called()
+
+    def test_params_timelapse(self):
+        self.app.screenshot_timelapse.return_value.frames_saved = 3
+        self.app.screenshot_timelapse.return_value.report.return_value = ""
+        args = get_args(["--timelapse", "2.5", "--max-frames", "3", "-f", "potato-$n.png"])
+        main(app=self.app, args=args)
+        self.app.screenshot_timelapse.assert_called_with(
+            2500, "potato-$n.png", max_frames=3, max_duration=None, skip_if_behind=True,
+            delay=0, capture_cursor=False, cursor_name=None, region=None, output=None
+        )
+        self.app.screenshot_full_display.assert_not_called()
+
+    def test_params_watch(self):
+        self.app.get_available_regions.return_value = {"build": [0, 0, 100, 50]}
+        self.app.screenshot_watch.return_value.frames_saved = 2
+        self.app.screenshot_watch.return_value.report.return_value = ""
+        args = get_args(["--watch", "0.5", "--threshold", "5", "--use-region", "build"])
+        main(app=self.app, args=args)
+        self.app.screenshot_watch.assert_called_with(
+            [0, 0, 100, 50], 500, None, threshold=0.05, max_frames=None, max_duration=None,
+            delay=0, capture_cursor=False, cursor_name=None
+        )
+        self.app.screenshot_full_display.assert_not_called()
+
+    def test_params_watch_without_region(self):
+        args = get_args(["--watch", "1"])
+        main(app=self.app, args=args)
+        self.app.screenshot_watch.assert_not_called()
+        self.app.screenshot_full_display.assert_not_called()
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    @mock.patch('os.makedirs')
+    def test_encoder_profile(self, makedirs, fopen):
+        args = get_args(["--encoder-profile", "fast"])
+        main(app=self.app, args=args)
+        self.app.set_encoder_profile.assert_called_with("fast")
+        self.app.set_adaptive_palette.assert_not_called()
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    @mock.patch('os.makedirs')
+    def test_adaptive_palette(self, makedirs, fopen):
+        args = get_args(["--adaptive-palette"])
+        main(app=self.app, args=args)
+        self.app.set_adaptive_palette.assert_called_with(True)
+
     @mock.patch('builtins.open', new_callable=mock_open, create=True)
     @mock.patch('os.makedirs')
     @mock.patch('src.gscreenshot.actions.subprocess.run')
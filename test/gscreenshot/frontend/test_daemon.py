@@ -0,0 +1,108 @@
+from importlib.resources import as_file, files
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from unittest.mock import mock_open
+from PIL import Image
+import mock
+
+from src.gscreenshot.screenshot.screenshot import Screenshot
+from src.gscreenshot.frontend.daemon import CaptureDaemon, is_process_stream
+from src.gscreenshot_client import receive_message, send_message
+
+
+class CaptureDaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.app = mock.MagicMock()
+        self.app.get_available_cursors.return_value = {}
+        self.app.session = {}
+        pixmaps_path = "gscreenshot.resources.pixmaps"
+        with as_file(files(pixmaps_path).joinpath('gscreenshot.png')) as png_path:
+            self.screenshot = Screenshot(Image.open(png_path))
+
+        self.screenshot_collection = mock.MagicMock()
+        self.screenshot_collection.cursor_current.return_value = self.screenshot
+        self.app.get_screenshot_collection.return_value = self.screenshot_collection
+        self.app.current = self.screenshot
+        self.daemon = CaptureDaemon(self.app, socket_path="/nonexistent/gscreenshot.sock")
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    def test_run_request(self, fopen):
+        result = self.daemon.run_request(["-f", "potato.png"])
+
+        self.app.screenshot_full_display.assert_called()
+        self.assertEqual(0, result["status"])
+        self.assertEqual("potato.png\n", result["stdout"])
+
+    def test_run_request_no_screenshot(self):
+        self.screenshot_collection.cursor_current.return_value = None
+        result = self.daemon.run_request(["-f", "potato.png"])
+
+        self.assertEqual(1, result["status"])
+        self.assertIn("No screenshot taken", result["stderr"])
+
+    def test_run_request_invalid_args(self):
+        result = self.daemon.run_request(["--not-an-option"])
+        self.assertEqual(2, result["status"])
+        self.assertIn("--not-an-option", result["stderr"])
+        self.app.screenshot_full_display.assert_not_called()
+
+    def test_run_request_help(self):
+        result = self.daemon.run_request(["--help"])
+        self.assertEqual(0, result["status"])
+        self.assertIn("usage:", result["stdout"])
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    def test_run_request_cwd_restored(self, fopen):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as folder:
+            self.daemon.run_request(["-f", "potato.png"], cwd=folder)
+        self.assertEqual(cwd, os.getcwd())
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    def test_run_request_resets_encoder_settings(self, fopen):
+        self.daemon.run_request(["-f", "potato.png", "--encoder-profile", "fast",
+                                 "--adaptive-palette"])
+        self.app.set_encoder_profile.assert_called_with("fast")
+        self.app.set_adaptive_palette.assert_called_with(True)
+
+        self.daemon.run_request(["-f", "potato.png"])
+        self.app.set_encoder_profile.assert_called_with("balanced")
+        self.app.set_adaptive_palette.assert_called_with(False)
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    def test_run_request_clears_screenshots(self, fopen):
+        self.daemon.run_request(["-f", "potato.png"])
+        self.screenshot_collection.clear.assert_called_once()
+
+    def test_run_request_stdout(self):
+        result = self.daemon.run_request(["-f", "/dev/stdout"])
+
+        self.assertEqual(2, result["status"])
+        self.assertIn("/dev/stdout", result["stderr"])
+        self.app.screenshot_full_display.assert_not_called()
+
+    def test_is_process_stream(self):
+        self.assertTrue(is_process_stream("/dev/stdout"))
+        self.assertTrue(is_process_stream("/dev/fd/1"))
+        self.assertTrue(is_process_stream("/proc/self/fd/2"))
+        self.assertTrue(is_process_stream("../stdout", "/dev/fd"))
+        self.assertFalse(is_process_stream("stdout.png", "/home/potato"))
+        self.assertFalse(is_process_stream("/dev/shm/potato.png"))
+
+    @mock.patch('builtins.open', new_callable=mock_open, create=True)
+    def test_handle_connection(self, fopen):
+        worker = threading.Thread(target=self.daemon._process_requests, daemon=True)
+        worker.start()
+
+        server_side, client_side = socket.socketpair()
+        with server_side, client_side:
+            send_message(client_side, {"argv": ["-f", "potato.png"]})
+            self.daemon.handle_connection(server_side)
+            response = receive_message(client_side)
+
+        self.assertEqual(0, response["status"])
+        self.assertEqual("potato.png\n", response["stdout"])
@@ -1,10 +1,16 @@
 from importlib.resources import as_file, files
+import os
+import tempfile
+import threading
 import unittest
 from unittest.mock import MagicMock
 from PIL import Image
 import mock
 
+from gscreenshot.encoder import get_encoder_service
 from gscreenshot.frontend.presenter import Presenter
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.effects import CropEffect
 
 
 class GtkPresenterTest(unittest.TestCase):
@@ -23,6 +29,12 @@ class GtkPresenterTest(unittest.TestCase):
         self.view.get_preview_dimensions.return_value = (20, 30)
         self.presenter = Presenter(self.app, self.view)
 
+    def quick_preview_count(self):
+        return sum(
+            1 for call in self.app.current_always.get_preview.call_args_list
+            if call.kwargs.get("quick")
+        )
+
     def test_on_copy_clicked_gtk_persistent_clipboard(self):
         self.view.copy_to_clipboard.return_value = True
         success = self.presenter.on_button_copy_clicked()
@@ -61,7 +73,7 @@ class GtkPresenterTest(unittest.TestCase):
         self.presenter.on_window_resize()
         self.view.resize.assert_called_once()
         # Called once in the constructor already
-        self.assertEqual(self.app.current_always.get_preview.call_count, 2)
+        self.assertEqual(self.quick_preview_count(), 2)
 
     def test_on_button_copy_and_close_clicked(self):
         self.screenshot_collection.cursor_current.return_value = None
@@ -88,17 +100,100 @@ class GtkPresenterTest(unittest.TestCase):
         # mocking any of the threading
         self.presenter.on_button_all_clicked()
         self.app.screenshot_full_display.assert_called_once()
-        self.app.current_always.get_preview.assert_called_once()
+        self.assertEqual(self.quick_preview_count(), 1)
         self.view.update_preview.assert_called_once()
 
     def test_on_button_window_clicked(self):
         self.presenter.on_button_window_clicked()
         self.app.screenshot_selected.assert_called_once()
-        self.app.current_always.get_preview.assert_called_once()
+        self.assertEqual(self.quick_preview_count(), 1)
         self.view.update_preview.assert_called_once()
 
     def test_on_button_selectarea_clicked(self):
         self.presenter.on_button_selectarea_clicked()
         self.app.screenshot_selected.assert_called_once()
-        self.app.current_always.get_preview.assert_called_once()
+        self.assertEqual(self.quick_preview_count(), 1)
         self.view.update_preview.assert_called_once()
+
+    def test_on_region_save_clicked_captured_region(self):
+        screenshot = Screenshot(Image.new("RGB", (20, 10)))
+        screenshot.set_capture_region((100, 200, 120, 210))
+        self.app.current = screenshot
+
+        self.presenter.on_region_save_clicked(region_name="potato")
+        self.app.add_stored_region.assert_called_once_with("potato", (100, 200, 120, 210))
+
+    def test_on_region_save_clicked_cropped_captured_region(self):
+        screenshot = Screenshot(Image.new("RGB", (20, 10)))
+        screenshot.set_capture_region((100, 200, 120, 210))
+        screenshot.add_effect(CropEffect((5, 5, 10, 10)))
+        self.app.current = screenshot
+
+        self.presenter.on_region_save_clicked(region_name="potato")
+        self.app.add_stored_region.assert_called_once_with("potato", (105, 205, 110, 210))
+
+    @mock.patch('gscreenshot.screenshot.actions.save.GscreenshotCache')
+    @mock.patch('gscreenshot.frontend.presenter.GscreenshotCache')
+    def test_on_button_saveas_clicked(self, *_):
+        self.view.idle_add.side_effect = lambda callback: callback()
+        self.app.current = Screenshot(Image.new("RGB", (20, 10)))
+
+        with tempfile.TemporaryDirectory() as folder:
+            self.view.ask_for_save_location.return_value = os.path.join(folder, "potato.png")
+
+            self.assertTrue(self.presenter.on_button_saveas_clicked())
+            self.assertTrue(self.presenter.wait_for_saves(timeout=5))
+
+        self.view.notify_save_complete.assert_called_once()
+        self.view.show_warning.assert_not_called()
+
+    @mock.patch('gscreenshot.screenshot.actions.save.GscreenshotCache')
+    @mock.patch('gscreenshot.frontend.presenter.GscreenshotCache')
+    def test_on_button_saveas_clicked_failed(self, *_):
+        self.view.idle_add.side_effect = lambda callback: callback()
+        self.app.current = Screenshot(Image.new("RGB", (20, 10)))
+        # The dialog is opened again after the save fails, and cancelled
+        self.view.ask_for_save_location.side_effect = ["/nonexistent/folder/potato.png", None]
+
+        self.assertTrue(self.presenter.on_button_saveas_clicked())
+        self.assertFalse(self.presenter.wait_for_saves(timeout=5))
+
+        self.assertEqual(2, self.view.ask_for_save_location.call_count)
+        self.view.notify_save_complete.assert_not_called()
+        self.view.show_warning.assert_called_once()
+
+    @mock.patch('gscreenshot.screenshot.actions.save.GscreenshotCache')
+    @mock.patch('gscreenshot.frontend.presenter.GscreenshotCache')
+    def test_on_button_saveas_clicked_no_retry(self, *_):
+        self.view.idle_add.side_effect = lambda callback: callback()
+        self.app.current = Screenshot(Image.new("RGB", (20, 10)))
+        self.view.ask_for_save_location.return_value = "/nonexistent/folder/potato.png"
+
+        self.assertTrue(self.presenter.on_button_saveas_clicked(retry=False))
+        self.assertFalse(self.presenter.wait_for_saves(timeout=5))
+
+        self.view.ask_for_save_location.assert_called_once()
+        self.view.show_warning.assert_called_once()
+
+    @mock.patch('gscreenshot.screenshot.actions.save.GscreenshotCache')
+    @mock.patch('gscreenshot.frontend.presenter.GscreenshotCache')
+    def test_on_button_saveas_clicked_effects_changed(self, *_):
+        self.view.idle_add.side_effect = lambda callback: callback()
+        screenshot = Screenshot(Image.new("RGB", (20, 10)))
+        self.app.current = screenshot
+        release = threading.Event()
+
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "potato.png")
+            self.view.ask_for_save_location.return_value = filename
+
+            # Hold up the encoder until the effects have changed
+            get_encoder_service().submit(release.wait, 5)
+            get_encoder_service().submit(release.wait, 5)
+            self.assertTrue(self.presenter.on_button_saveas_clicked())
+            screenshot.add_effect(CropEffect((0, 0, 5, 5)))
+            release.set()
+
+            self.assertTrue(self.presenter.wait_for_saves(timeout=5))
+            with Image.open(filename) as image:
+                self.assertEqual((20, 10), image.size)
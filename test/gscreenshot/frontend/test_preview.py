@@ -0,0 +1,62 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from PIL import Image
+
+from src.gscreenshot.frontend.preview import PreviewRenderer
+from src.gscreenshot.screenshot import Screenshot
+
+
+class PreviewRendererTest(unittest.TestCase):
+
+    def setUp(self):
+        self.main_thread_calls = []
+        self.renderer = PreviewRenderer(self.main_thread_calls.append)
+        self.screenshot = Screenshot(Image.new("RGB", (400, 300)))
+
+    def run_main_thread(self):
+        for call in self.main_thread_calls:
+            self.assertFalse(call())
+        self.main_thread_calls.clear()
+
+    def test_request(self):
+        callback = Mock()
+        self.renderer.request(self.screenshot, 200, 200, callback)
+        self.assertTrue(self.renderer.wait(5))
+
+        callback.assert_not_called()
+        self.run_main_thread()
+
+        callback.assert_called_once()
+        self.assertEqual((204, 154), callback.call_args[0][0].size)
+
+    def test_latest_request_wins(self):
+        release = threading.Event()
+        slow = Mock()
+        slow.get_preview.side_effect = lambda *args, **kwargs: release.wait(5) and Image.new("RGB", (1, 1))
+
+        first = Mock()
+        second = Mock()
+        third = Mock()
+
+        self.renderer.request(slow, 200, 200, first)
+        self.renderer.request(self.screenshot, 200, 200, second)
+        self.renderer.request(self.screenshot, 100, 100, third)
+        release.set()
+        self.assertTrue(self.renderer.wait(5))
+        self.run_main_thread()
+
+        first.assert_not_called()
+        second.assert_not_called()
+        third.assert_called_once()
+
+    def test_outdated_when_delivered(self):
+        callback = Mock()
+        self.renderer.request(self.screenshot, 200, 200, callback)
+        self.assertTrue(self.renderer.wait(5))
+
+        self.renderer.cancel()
+        self.run_main_thread()
+
+        callback.assert_not_called()
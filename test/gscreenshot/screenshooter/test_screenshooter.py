@@ -1,9 +1,21 @@
+import io
+import os
+import sys
+import tempfile
 import unittest
 from unittest.mock import Mock
 import mock
+from PIL import Image
 
+from gscreenshot.screenshot.effects import CropEffect, StampEffect
 from gscreenshot.selector.exceptions import SelectionCancelled, SelectionParseError
+from src.gscreenshot.outputs import Output
 from src.gscreenshot.screenshooter import Screenshooter
+from src.gscreenshot.screenshooter.grim import Grim
+from src.gscreenshot.util import GSCapabilities
+from src.gscreenshot.screenshooter.scrot import Scrot
+from src.gscreenshot.screenshooter.xdg_desktop_portal import _PortalHelper
+from src.gscreenshot.screenshooter.xlib import XlibScreenshooter, xlib_available
 
 
 class BaseScreenshooter(Screenshooter):
@@ -46,6 +58,16 @@ class BaseScreenshooter(Screenshooter):
         return True
 
 
+class RegionScreenshooter(BaseScreenshooter):
+
+    def grab_region(self, region, delay=0, capture_cursor=False):
+        self.set_image(Mock())
+        self.called = "region"
+
+    def get_capabilities(self):
+        return {GSCapabilities.REGION_CAPTURE: "potato"}
+
+
 class ScreenshooterTest(unittest.TestCase):
 
     def setUp(self):
@@ -69,13 +91,15 @@ class ScreenshooterTest(unittest.TestCase):
         self.assertIsNotNone(self.screenshooter.image)
 
     @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
-    @mock.patch('src.gscreenshot.screenshooter.screenshooter.PIL')
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.Screenshot')
     @mock.patch('src.gscreenshot.screenshooter.screenshooter.os')
-    def test_call_screenshooter_success(self, mock_os, mock_pil, mock_subprocess):
+    @mock.patch('builtins.open', new_callable=mock.mock_open, read_data=b"png")
+    def test_call_screenshooter_success(self, mock_open, mock_os, mock_screenshot, mock_subprocess):
         success = self.screenshooter._call_screenshooter('potato', ['pancake'])
         mock_subprocess.assert_called_once_with(
             ['potato', 'pancake']
         )
+        mock_screenshot.from_bytes.assert_called_once_with(b"png")
         self.assertTrue(success)
 
     @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
@@ -100,6 +124,137 @@ class ScreenshooterTest(unittest.TestCase):
         )
         self.assertFalse(success)
 
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.os')
+    def test_call_screenshooter_stream(self, mock_os, mock_subprocess):
+        png_data = io.BytesIO()
+        Image.new("RGB", (4, 3)).save(png_data, "PNG")
+        mock_subprocess.return_value = png_data.getvalue()
+
+        success = self.screenshooter._call_screenshooter('potato', ['-'], stream=True)
+
+        mock_subprocess.assert_called_once_with(['potato', '-'])
+        mock_os.path.exists.assert_not_called()
+        mock_os.unlink.assert_not_called()
+        self.assertTrue(success)
+        self.assertEqual((4, 3), self.screenshooter.screenshot.get_image().size)
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
+    def test_call_screenshooter_stream_no_output(self, mock_subprocess):
+        mock_subprocess.return_value = b''
+        success = self.screenshooter._call_screenshooter('potato', ['-'], stream=True)
+        self.assertFalse(success)
+        self.assertIsNone(self.screenshooter.screenshot)
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
+    def test_call_screenshooter_capture_format(self, mock_subprocess):
+        ppm_data = io.BytesIO()
+        Image.new("RGB", (4, 3)).save(ppm_data, "PPM")
+        mock_subprocess.return_value = ppm_data.getvalue()
+        self.screenshooter.get_capture_formats = lambda: ['png', 'ppm']
+
+        success = self.screenshooter._call_screenshooter(
+            'potato', ['-t', Screenshooter.CAPTURE_FORMAT, '-'], stream=True
+        )
+
+        mock_subprocess.assert_called_once_with(['potato', '-t', 'ppm', '-'])
+        self.assertTrue(success)
+
+    def test_grab_selection_region_crop(self):
+        self.screenshooter.grab_selection_(region=(1, 2, 3, 4))
+        self.assertEqual("fullscreen", self.screenshooter.called)
+
+        crop = self.screenshooter.screenshot.add_effect.call_args[0][0]
+        self.assertIsInstance(crop, CropEffect)
+        self.assertEqual((1, 2, 3, 4), crop.meta["region"])
+
+    def test_grab_selection_region_capture(self):
+        screenshooter = RegionScreenshooter()
+        screenshooter._selector = None
+        screenshooter.grab_selection_(region=(1, 2, 3, 4))
+
+        self.assertEqual("region", screenshooter.called)
+        screenshooter.screenshot.set_capture_region.assert_called_once_with((1, 2, 3, 4))
+        screenshooter.screenshot.add_effect.assert_not_called()
+
+    def test_grab_selection_region_capture_failed(self):
+        screenshooter = RegionScreenshooter()
+        screenshooter._selector = None
+        screenshooter.set_image = lambda image: None
+        screenshooter.grab_selection_(region=(1, 2, 3, 4))
+
+        self.assertEqual("fullscreen", screenshooter.called)
+        self.assertIsInstance(screenshooter.screenshot.add_effect.call_args[0][0], CropEffect)
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.get_outputs')
+    def test_grab_region_cursor_size(self, get_outputs):
+        get_outputs.return_value = [Output("DP-1", 0, 0, 1920, 1080)]
+        glyph = Image.new("RGBA", (64, 64), (255, 255, 255, 255))
+        region = (100, 100, 500, 400)
+
+        screenshooter = RegionScreenshooter()
+        screenshooter._selector = None
+        screenshooter.get_cursor_position = Mock(return_value=(300, 200))
+        screenshooter.grab_region_(region, capture_cursor=True, use_cursor=glyph)
+
+        stamp = screenshooter.screenshot.add_effect.call_args[0][0]
+        self.assertIsInstance(stamp, StampEffect)
+
+        # The same size and place as on a full screen screenshot, cropped
+        left, upper, right, lower = StampEffect(glyph, (300, 200)).get_bounds((1920, 1080))
+        self.assertEqual(
+            (left - 100, upper - 100, right - 100, lower - 100), stamp.get_bounds((400, 300))
+        )
+        self.assertEqual(34, right - left)
+
+    def test_grab_region_default(self):
+        self.screenshooter.grab_region((1, 2, 3, 4))
+        self.assertEqual("fullscreen", self.screenshooter.called)
+
+        crop = self.screenshooter.screenshot.add_effect.call_args[0][0]
+        self.assertIsInstance(crop, CropEffect)
+        self.assertEqual((1, 2, 3, 4), crop.meta["region"])
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.get_outputs')
+    def test_grab_output_region(self, get_outputs):
+        get_outputs.return_value = [
+            Output("eDP-1", 0, 0, 1280, 720, 2.0),
+            Output("DP-1", 1280, 0, 1920, 1080, 1.0),
+        ]
+        screenshooter = RegionScreenshooter()
+        screenshooter._selector = None
+        screenshooter.grab_region = Mock()
+
+        screenshooter.grab_output_("DP-1")
+        screenshooter.grab_region.assert_called_once_with(
+            (2560, 0, 6400, 2160), 0, capture_cursor=False
+        )
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.get_outputs')
+    def test_grab_output_not_found(self, get_outputs):
+        get_outputs.return_value = [Output("eDP-1", 0, 0, 1280, 720)]
+        self.screenshooter.grab_output_("DP-1")
+        self.assertIsNone(self.screenshooter.called)
+        self.assertIsNone(self.screenshooter.screenshot)
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.get_outputs')
+    def test_grab_output_default(self, get_outputs):
+        get_outputs.return_value = [
+            Output("eDP-1", 0, 0, 1280, 720),
+            Output("DP-1", 1280, 0, 1920, 1080),
+        ]
+        self.screenshooter.grab_output("DP-1")
+        self.assertEqual("fullscreen", self.screenshooter.called)
+
+        crop = self.screenshooter.screenshot.add_effect.call_args[0][0]
+        self.assertEqual((1280, 0, 3200, 1080), crop.meta["region"])
+
+    def test_get_region_geometry(self):
+        self.assertEqual(
+            (2, 3, 8, 5),
+            Screenshooter._get_region_geometry((1.6, 3.2, 10.4, 8.0))
+        )
+
     def test_grab_selection_fallback(self):
         self.screenshooter._selector = None
         self.screenshooter.grab_selection_()
@@ -123,3 +278,204 @@ class ScreenshooterTest(unittest.TestCase):
         self.screenshooter.grab_selection_()
         self.assertIsNotNone(self.screenshooter.image)
         self.assertEqual("fullscreen", self.screenshooter.called)
+
+
+@unittest.skipUnless(xlib_available, "python-xlib is not installed")
+class XlibScreenshooterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.screenshooter = XlibScreenshooter()
+        self.screenshooter._selector = None
+        self.display = Mock()
+        self.display.info.image_byte_order = 0
+        pixmap_format = Mock()
+        pixmap_format.depth = 24
+        pixmap_format.bits_per_pixel = 32
+        self.display.info.pixmap_formats = [pixmap_format]
+
+        self.root = self.display.screen.return_value.root
+        self.root.get_geometry.return_value.width = 2
+        self.root.get_geometry.return_value.height = 1
+        self.root.get_image.return_value.depth = 24
+        # Two BGRX pixels: pure blue, then pure red
+        self.root.get_image.return_value.data = b'\xff\x00\x00\x00\x00\x00\xff\x00'
+        self.screenshooter._display = self.display
+
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
+    def test_grab_fullscreen(self, mock_subprocess):
+        self.screenshooter.grab_fullscreen()
+        mock_subprocess.assert_not_called()
+
+        image = self.screenshooter.screenshot.get_image()
+        self.assertEqual((2, 1), image.size)
+        self.assertEqual((0, 0, 255), image.getpixel((0, 0)))
+        self.assertEqual((255, 0, 0), image.getpixel((1, 0)))
+
+    def test_grab_region(self):
+        self.screenshooter.grab_region((1, 0, 2, 1))
+        self.root.get_image.assert_called_once_with(1, 0, 1, 1, mock.ANY, 0xffffffff)
+        self.assertEqual((1, 1), self.screenshooter.screenshot.get_image().size)
+
+    def test_grab_region_partly_offscreen(self):
+        self.screenshooter.grab_region((1, 0, 3, 1))
+        self.root.get_image.assert_called_once_with(1, 0, 1, 1, mock.ANY, 0xffffffff)
+
+        image = self.screenshooter.screenshot.get_image()
+        self.assertEqual((2, 1), image.size)
+        self.assertEqual((0, 0, 0), image.getpixel((1, 0)))
+
+    def test_grab_fullscreen_unsupported_depth(self):
+        self.root.get_image.return_value.depth = 16
+        self.screenshooter.grab_fullscreen()
+        self.assertIsNone(self.screenshooter.screenshot)
+
+    @mock.patch.dict(os.environ, {'DISPLAY': ':0'})
+    @mock.patch('src.gscreenshot.screenshooter.xlib.display.Display')
+    def test_can_run(self, xdisplay):
+        xdisplay.return_value = self.display
+        self.display.screen.return_value.root_depth = 24
+        self.assertTrue(XlibScreenshooter.can_run())
+
+        # Other backends are used for formats this one can't read
+        self.display.screen.return_value.root_depth = 16
+        self.assertFalse(XlibScreenshooter.can_run())
+        self.display.close.assert_called()
+
+
+class ScrotTest(unittest.TestCase):
+
+    def test_parse_version(self):
+        self.assertEqual((1, 10), Scrot._parse_version("scrot 1.10.0\n"))
+        self.assertEqual((0, 8), Scrot._parse_version("scrot version 0.8"))
+        self.assertEqual((0, 0), Scrot._parse_version("potato"))
+
+
+class PortalHelperTest(unittest.TestCase):
+
+    # Stands in for xdg_desktop_portal.py --serve
+    SERVE = (
+        "import sys\n"
+        "for line in sys.stdin:\n"
+        "    open(line.strip(), 'w').close()\n"
+        "    print('ok', flush=True)\n"
+    )
+
+    def setUp(self):
+        self.destination = tempfile.mktemp()
+
+    def tearDown(self):
+        if os.path.exists(self.destination):
+            os.unlink(self.destination)
+
+    def test_capture_reuses_helper(self):
+        helper = _PortalHelper([sys.executable, "-c", self.SERVE], 5)
+        try:
+            self.assertTrue(helper.capture(self.destination))
+            process = helper._process
+            self.assertTrue(helper.capture(self.destination))
+            self.assertIs(process, helper._process)
+        finally:
+            helper.stop()
+
+        self.assertTrue(os.path.exists(self.destination))
+        self.assertIsNone(helper._process)
+
+    def test_capture_restarts_exited_helper(self):
+        serve_once = self.SERVE + "    break\n"
+        helper = _PortalHelper([sys.executable, "-c", serve_once], 5)
+        try:
+            self.assertTrue(helper.capture(self.destination))
+            helper._process.wait(timeout=5)
+            self.assertTrue(helper.capture(self.destination))
+        finally:
+            helper.stop()
+
+    def test_capture_error(self):
+        serve_error = "import sys\nfor line in sys.stdin:\n    print('error 1 {}', flush=True)\n"
+        helper = _PortalHelper([sys.executable, "-c", serve_error], 5)
+        try:
+            self.assertFalse(helper.capture(self.destination))
+            self.assertIsNotNone(helper._process)
+        finally:
+            helper.stop()
+
+    def test_capture_timeout(self):
+        helper = _PortalHelper([sys.executable, "-c", "import time; time.sleep(30)"], 0.2)
+        self.assertFalse(helper.capture(self.destination))
+        self.assertIsNone(helper._process)
+
+
+class GrimTest(unittest.TestCase):
+
+    def setUp(self):
+        self.screenshooter = Grim()
+        self.screenshooter._selector = None
+
+    @mock.patch('src.gscreenshot.screenshooter.grim.get_outputs')
+    def test_grab_fullscreen_outputs(self, get_outputs):
+        get_outputs.return_value = [
+            Output("DP-1", 0, 0, 2, 1),
+            Output("DP-2", 2, 0, 1, 1),
+        ]
+        images = {
+            "DP-1": Image.new("RGB", (2, 1), (255, 0, 0)),
+            "DP-2": Image.new("RGB", (1, 1), (0, 0, 255)),
+        }
+        self.screenshooter._capture_image = Mock(
+            side_effect=lambda utility, params: images[params[params.index('-o') + 1]]
+        )
+
+        self.screenshooter.grab_fullscreen()
+
+        self.assertEqual(2, self.screenshooter._capture_image.call_count)
+        image = self.screenshooter.screenshot.get_image()
+        self.assertEqual((3, 1), image.size)
+        self.assertEqual((255, 0, 0), image.getpixel((1, 0)))
+        self.assertEqual((0, 0, 255), image.getpixel((2, 0)))
+
+    @mock.patch('src.gscreenshot.screenshooter.grim.find_executable', return_value="grim")
+    @mock.patch('src.gscreenshot.screenshooter.grim.cached_probe', return_value=True)
+    def test_can_run_probed_per_desktop(self, cached_probe, _):
+        with mock.patch.dict(os.environ, {'XDG_CURRENT_DESKTOP': 'sway',
+                                          'WAYLAND_DISPLAY': 'wayland-1'}):
+            self.assertTrue(Grim.can_run())
+        with mock.patch.dict(os.environ, {'XDG_CURRENT_DESKTOP': 'GNOME',
+                                          'WAYLAND_DISPLAY': 'wayland-0'}):
+            self.assertTrue(Grim.can_run())
+
+        self.assertEqual(
+            ["grim:sway:wayland-1", "grim:GNOME:wayland-0"],
+            [i[0][0] for i in cached_probe.call_args_list]
+        )
+
+    @mock.patch('src.gscreenshot.screenshooter.grim.get_outputs')
+    def test_grab_fullscreen_layout_reused(self, get_outputs):
+        get_outputs.return_value = [
+            Output("DP-1", 0, 0, 1, 1),
+            Output("DP-2", 1, 0, 1, 1),
+        ]
+        self.screenshooter._capture_image = Mock(return_value=Image.new("RGB", (1, 1)))
+
+        self.screenshooter.grab_fullscreen()
+        self.screenshooter.grab_fullscreen()
+        get_outputs.assert_called_once()
+
+        self.screenshooter._outputs_checked -= Grim.OUTPUT_LAYOUT_TTL + 1
+        self.screenshooter.grab_fullscreen()
+        self.assertEqual(2, get_outputs.call_count)
+
+    @mock.patch('src.gscreenshot.screenshooter.grim.get_outputs')
+    @mock.patch('src.gscreenshot.screenshooter.screenshooter.subprocess.check_output')
+    def test_grab_fullscreen_mixed_scales(self, mock_subprocess, get_outputs):
+        get_outputs.return_value = [
+            Output("DP-1", 0, 0, 2, 1, 2.0),
+            Output("DP-2", 2, 0, 1, 1, 1.0),
+        ]
+        png_data = io.BytesIO()
+        Image.new("RGB", (4, 3)).save(png_data, "PNG")
+        mock_subprocess.return_value = png_data.getvalue()
+
+        self.screenshooter.grab_fullscreen()
+
+        mock_subprocess.assert_called_once()
+        self.assertNotIn('-o', mock_subprocess.call_args[0][0])
@@ -0,0 +1,92 @@
+import unittest
+
+from PIL import Image, ImageChops, ImageDraw
+
+from src.gscreenshot.screenshot.effects import CropEffect, StampEffect, plan_effects
+
+
+class EffectPlannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.image = Image.new("RGB", (400, 300), (255, 255, 255))
+        ImageDraw.Draw(self.image).rectangle((50, 50, 250, 150), fill=(0, 128, 255))
+        self.glyph = Image.new("RGBA", (24, 32), (255, 0, 0, 255))
+
+    def apply_in_order(self, effects):
+        image = self.image.copy()
+        for effect in effects:
+            if effect.enabled:
+                image = effect.apply_to(image)
+        return image
+
+    def apply_plan(self, plan):
+        image = self.image.copy()
+        for effect in plan:
+            image = effect.apply_to(image)
+        return image
+
+    def assertSameImage(self, expected, actual):
+        self.assertEqual(expected.size, actual.size)
+        self.assertIsNone(ImageChops.difference(expected, actual).getbbox())
+
+    def test_crop_moved_before_stamp(self):
+        effects = [StampEffect(self.glyph, (120, 80)), CropEffect((100, 60, 300, 200))]
+
+        plan = plan_effects(effects, self.image.size)
+
+        self.assertIsInstance(plan[0], CropEffect)
+        self.assertIsInstance(plan[1], StampEffect)
+        self.assertSameImage(self.apply_in_order(effects), self.apply_plan(plan))
+
+    def test_stamp_partly_inside_crop(self):
+        effects = [StampEffect(self.glyph, (97, 57)), CropEffect((100, 60, 300, 200))]
+
+        plan = plan_effects(effects, self.image.size)
+
+        self.assertEqual(2, len(plan))
+        self.assertSameImage(self.apply_in_order(effects), self.apply_plan(plan))
+
+    def test_stamp_outside_crop_skipped(self):
+        effects = [StampEffect(self.glyph, (10, 10)), CropEffect((100, 60, 300, 200))]
+
+        plan = plan_effects(effects, self.image.size)
+
+        self.assertEqual(1, len(plan))
+        self.assertIsInstance(plan[0], CropEffect)
+        self.assertSameImage(self.apply_in_order(effects), self.apply_plan(plan))
+
+    def test_crops_fused(self):
+        effects = [
+            StampEffect(self.glyph, (150, 100)),
+            CropEffect((100, 60, 300, 200)),
+            CropEffect((20, 20, 120, 100)),
+        ]
+
+        plan = plan_effects(effects, self.image.size)
+
+        self.assertEqual(2, len(plan))
+        self.assertEqual((120, 80, 220, 160), plan[0].meta["region"])
+        self.assertSameImage(self.apply_in_order(effects), self.apply_plan(plan))
+
+    def test_crop_outside_crop_not_fused(self):
+        effects = [CropEffect((100, 60, 300, 200)), CropEffect((-10, -10, 100, 100))]
+
+        plan = plan_effects(effects, self.image.size)
+
+        self.assertEqual(2, len(plan))
+        self.assertSameImage(self.apply_in_order(effects), self.apply_plan(plan))
+
+    def test_disabled_effects_skipped(self):
+        crop = CropEffect((100, 60, 300, 200))
+        crop.disable()
+
+        self.assertEqual([], plan_effects([crop], self.image.size))
+
+    def test_effects_not_changed(self):
+        stamp = StampEffect(self.glyph, (120, 80))
+        crop = CropEffect((100, 60, 300, 200))
+
+        plan_effects([stamp, crop], self.image.size)
+
+        self.assertIsNone(stamp.reference_size)
+        self.assertEqual((100, 60, 300, 200), crop.meta["region"])
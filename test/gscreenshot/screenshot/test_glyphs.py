@@ -0,0 +1,68 @@
+import gc
+import os
+import tempfile
+import unittest
+from PIL import Image
+
+from src.gscreenshot.screenshot.effects import glyphs
+from src.gscreenshot.screenshot.effects.glyphs import (
+    clear_glyph_cache,
+    get_glyph,
+    get_scaled_glyph,
+)
+
+
+class GlyphCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        clear_glyph_cache()
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "glyph.png")
+        Image.new("P", (40, 60)).save(self.path)
+
+    def tearDown(self):
+        clear_glyph_cache()
+        self.folder.cleanup()
+
+    def test_get_glyph(self):
+        glyph = get_glyph(self.path)
+
+        self.assertEqual("RGBA", glyph.mode)
+        self.assertEqual((40, 60), glyph.size)
+        self.assertIs(glyph, get_glyph(self.path))
+
+    def test_get_glyph_file_changed(self):
+        glyph = get_glyph(self.path)
+
+        Image.new("RGB", (20, 20)).save(self.path)
+        os.utime(self.path, (0, 0))
+
+        self.assertEqual((20, 20), get_glyph(self.path).size)
+        self.assertIsNot(glyph, get_glyph(self.path))
+
+    def test_get_scaled_glyph(self):
+        glyph = get_glyph(self.path)
+        scaled = get_scaled_glyph(glyph, (20, 20))
+
+        self.assertEqual((13, 20), scaled.size)
+        self.assertEqual((40, 60), glyph.size)
+        self.assertIs(scaled, get_scaled_glyph(glyph, (20, 20)))
+        self.assertIsNot(scaled, get_scaled_glyph(glyph, (10, 10)))
+
+    def test_get_scaled_glyph_evicts_oldest(self):
+        glyph = Image.new("RGBA", (100, 100))
+        first = get_scaled_glyph(glyph, (1, 1))
+        for size in range(2, glyphs.SCALED_VARIANTS_PER_GLYPH + 2):
+            get_scaled_glyph(glyph, (size, size))
+
+        self.assertIsNot(first, get_scaled_glyph(glyph, (1, 1)))
+
+    def test_get_scaled_glyph_collected(self):
+        glyph = Image.new("RGBA", (100, 100))
+        get_scaled_glyph(glyph, (10, 10))
+        self.assertEqual(1, len(glyphs._scaled))
+
+        del glyph
+        gc.collect()
+
+        self.assertEqual(0, len(glyphs._scaled))
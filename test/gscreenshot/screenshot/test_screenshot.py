@@ -1,10 +1,20 @@
 from importlib.resources import as_file, files
+import io
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from PIL import Image
 from PIL import ImageChops
+from src.gscreenshot.compat import get_pil_constant
 from src.gscreenshot.screenshot import Screenshot
+from src.gscreenshot.screenshot.actions import CopyAction, SaveAction, SaveTmpfileAction
+from src.gscreenshot.screenshot.actions.save import get_artifact_key, get_encoded_image
+from src.gscreenshot.screenshot.effects.crop import CropEffect
 from src.gscreenshot.screenshot.effects.stamp import StampEffect
 
 
@@ -36,3 +46,287 @@ class ScreenshotTest(unittest.TestCase):
             len(set(ImageChops.difference(expected_img, self.screenshot.get_image()).getdata())),  # type: ignore
             2,
             "cursor was not stamped onto the test image correctly")
+
+    def test_translate_region(self):
+        self.assertEqual((1, 2, 3, 4), self.screenshot.translate_region((1, 2, 3, 4)))
+
+        self.screenshot.set_capture_region((10, 20, 30, 40))
+        self.assertEqual((10, 20, 30, 40), self.screenshot.get_capture_region())
+        self.assertEqual((5, 0, 15, 10), self.screenshot.translate_region((15, 20, 25, 30)))
+
+    def test_get_image_memoized(self):
+        self.screenshot = Screenshot(Image.new("RGB", (20, 10)))
+
+        image = self.screenshot.get_rendered_image()
+        self.assertIs(image, self.screenshot.get_rendered_image())
+
+    def test_get_image_copy(self):
+        self.screenshot = Screenshot(Image.new("RGB", (20, 10)))
+
+        image = self.screenshot.get_image()
+        self.assertIsNot(image, self.screenshot.get_rendered_image())
+
+        image.paste((255, 0, 0), (0, 0, 20, 10))
+        self.assertEqual((0, 0, 0), self.screenshot.get_image().getpixel((0, 0)))
+
+    def test_get_image_effects_changed(self):
+        self.screenshot = Screenshot(Image.new("RGB", (20, 10)))
+        full = self.screenshot.get_rendered_image()
+
+        crop = CropEffect((0, 0, 5, 5))
+        self.screenshot.add_effect(crop)
+        self.assertEqual((5, 5), self.screenshot.get_rendered_image().size)
+
+        crop.disable()
+        self.assertEqual((20, 10), self.screenshot.get_rendered_image().size)
+        self.assertIs(full, self.screenshot.get_rendered_image())
+
+        crop.enable()
+        self.assertEqual((5, 5), self.screenshot.get_rendered_image().size)
+
+        self.screenshot.remove_effect(crop)
+        self.assertEqual((20, 10), self.screenshot.get_rendered_image().size)
+
+        crop.disable()
+        self.assertIs(self.screenshot.get_rendered_image(), self.screenshot.get_rendered_image())
+
+    def test_get_size(self):
+        image = Mock()
+        image.size = (7680, 4320)
+        self.screenshot = Screenshot(image)
+
+        self.assertEqual((7680, 4320), self.screenshot.get_size())
+
+        self.screenshot.add_effect(StampEffect(Mock(), (20, 40)))
+        crop = CropEffect((100, 200, 1380.4, 920))
+        self.screenshot.add_effect(crop)
+        self.assertEqual((1280, 720), self.screenshot.get_size())
+
+        crop.disable()
+        self.assertEqual((7680, 4320), self.screenshot.get_size())
+        image.copy.assert_not_called()
+
+
+class EncodedScreenshotTest(unittest.TestCase):
+
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30), (10, 20, 30)).save(buffer, "PNG")
+        self.png = buffer.getvalue()
+        self.screenshot = Screenshot.from_bytes(self.png)
+
+    def test_lazy_decode(self):
+        self.assertEqual((40, 30), self.screenshot.get_size())
+        self.assertIsNone(self.screenshot._image)
+
+        self.assertEqual((10, 20, 30), self.screenshot.get_image().getpixel((0, 0)))
+        self.assertIsNotNone(self.screenshot._image)
+
+    def test_get_encoded(self):
+        self.assertEqual(self.png, self.screenshot.get_encoded("png"))
+        self.assertIsNone(self.screenshot.get_encoded("jpeg"))
+
+        crop = CropEffect((0, 0, 10, 10))
+        self.screenshot.add_effect(crop)
+        self.assertIsNone(self.screenshot.get_encoded("png"))
+
+        crop.disable()
+        self.assertEqual(self.png, self.screenshot.get_encoded("png"))
+
+    def test_uncompressed_dropped_after_decode(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30)).save(buffer, "PPM")
+        screenshot = Screenshot.from_bytes(buffer.getvalue())
+
+        self.assertIsNotNone(screenshot.get_encoded("ppm"))
+        screenshot.get_image()
+        self.assertIsNone(screenshot.get_encoded("ppm"))
+
+    def test_save_passthrough(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "potato.png")
+            SaveAction(filename=filename).execute(self.screenshot)
+
+            with open(filename, "rb") as saved:
+                data = saved.read()
+
+            self.assertIsNone(self.screenshot._image)
+            self.assertIn(b"eXIf", data)
+
+            with Image.open(filename) as image:
+                self.assertEqual((40, 30), image.size)
+                self.assertEqual((10, 20, 30), image.convert("RGB").getpixel((0, 0)))
+                self.assertIn(0x0131, image.getexif())
+
+
+    def test_save_profile_not_passed_through(self):
+        buffer = io.BytesIO()
+        Image.linear_gradient("L").resize((200, 200)).convert("RGB").save(buffer, "PNG")
+        screenshot = Screenshot.from_bytes(buffer.getvalue())
+
+        saved = {}
+        with tempfile.TemporaryDirectory() as folder:
+            for profile in ("fast", "smallest"):
+                filename = os.path.join(folder, f"{profile}.png")
+                SaveAction(filename=filename, encoder_profile=profile).execute(screenshot)
+                with open(filename, "rb") as saved_file:
+                    saved[profile] = saved_file.read()
+
+        self.assertNotEqual(saved["fast"], saved["smallest"])
+        self.assertLess(len(saved["smallest"]), len(saved["fast"]))
+
+
+class ArtifactTest(unittest.TestCase):
+
+    def setUp(self):
+        self.screenshot = Screenshot(Image.new("RGB", (40, 30), (10, 20, 30)))
+
+    def test_encoded_once(self):
+        with patch.object(Image.Image, "save", autospec=True,
+                          side_effect=Image.Image.save) as save:
+            data = get_encoded_image(self.screenshot, "png")
+            self.assertEqual(data, get_encoded_image(self.screenshot, "png"))
+            self.assertEqual(1, save.call_count)
+
+            get_encoded_image(self.screenshot, "png", encoder_profile="fast")
+            self.assertEqual(2, save.call_count)
+
+    def test_effects_changed(self):
+        data = get_encoded_image(self.screenshot, "png")
+
+        self.screenshot.add_effect(CropEffect((0, 0, 20, 20)))
+
+        with Image.open(io.BytesIO(get_encoded_image(self.screenshot, "png"))) as image:
+            self.assertEqual((20, 20), image.size)
+        self.assertNotEqual(data, get_encoded_image(self.screenshot, "png"))
+
+    def test_stale_artifact_ignored(self):
+        version = self.screenshot.get_version()
+        self.screenshot.add_effect(CropEffect((0, 0, 20, 20)))
+
+        self.screenshot.set_artifact("key", b"stale", version)
+        self.assertIsNone(self.screenshot.get_artifact("key"))
+
+    @patch("src.gscreenshot.screenshot.actions.copy.session_is_wayland", return_value=False)
+    @patch("src.gscreenshot.screenshot.actions.copy.subprocess.Popen")
+    def test_copy_doesnt_decode(self, popen, _):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 30), (10, 20, 30)).save(buffer, "PNG")
+        screenshot = Screenshot.from_bytes(buffer.getvalue())
+
+        self.assertTrue(CopyAction().execute(screenshot))
+
+        popen.return_value.__enter__.return_value.communicate.assert_called_once_with(
+            input=buffer.getvalue()
+        )
+        self.assertIsNone(screenshot._image)
+
+    def test_tmpfile_reused(self):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "potato.png")
+            SaveAction(filename=filename).execute(self.screenshot)
+
+            # The user's own file is never handed out
+            tmpfile = SaveTmpfileAction().execute(self.screenshot)
+            self.assertNotEqual(filename, tmpfile)
+
+        try:
+            self.assertEqual(tmpfile, SaveTmpfileAction().execute(self.screenshot))
+
+            # A copy which was changed since isn't reused
+            time.sleep(0.01)
+            with open(tmpfile, "ab") as saved:
+                saved.write(b"changed")
+            self.assertIsNone(
+                self.screenshot.get_artifact_path(("tmpfile", get_artifact_key("png")))
+            )
+        finally:
+            os.unlink(tmpfile)
+
+
+class PreviewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.screenshot = Screenshot(Image.new("RGB", (3840, 2160), (200, 100, 50)))
+
+    def test_preview_levels(self):
+        levels = self.screenshot._get_preview_levels()
+
+        self.assertEqual(
+            [(3840, 2160), (1920, 1080), (960, 540), (480, 270), (240, 135)],
+            [level.size for level in levels]
+        )
+        self.assertIs(levels, self.screenshot._get_preview_levels())
+
+    def test_get_preview(self):
+        preview = self.screenshot.get_preview(500, 500)
+
+        self.assertEqual((500, 281), preview.size)
+        self.assertEqual((200, 100, 50), preview.getpixel((250, 140)))
+
+        self.assertEqual((504, 285), self.screenshot.get_preview(500, 500, True).size)
+
+    def test_preview_levels_effects_changed(self):
+        levels = self.screenshot._get_preview_levels()
+
+        self.screenshot.add_effect(CropEffect((0, 0, 1000, 1000)))
+
+        self.assertIsNot(levels, self.screenshot._get_preview_levels())
+        self.assertEqual((500, 500), self.screenshot.get_preview(500, 800).size)
+
+    def test_pil_constant(self):
+        self.assertEqual(Image.Resampling.LANCZOS, get_pil_constant("Resampling", "LANCZOS"))
+
+        # Pillow < 9.1 only has the constants on Image
+        with patch("src.gscreenshot.compat.Image", SimpleNamespace(LANCZOS=1)):
+            self.assertEqual(1, get_pil_constant("Resampling", "LANCZOS"))
+
+    def test_tiny_image_scaled_up(self):
+        screenshot = Screenshot(Image.new("RGB", (10, 5)))
+        self.assertEqual((100, 50), screenshot.get_preview(200, 200).size)
+
+    def test_get_quick_preview(self):
+        preview = self.screenshot.get_preview(500, 500, quick=True)
+
+        self.assertEqual((500, 281), preview.size)
+        self.assertEqual((200, 100, 50), preview.getpixel((250, 140)))
+        # A quick preview doesn't build the pyramid
+        self.assertIsNone(self.screenshot._preview_levels)
+
+    def test_quick_preview_doesnt_render(self):
+        self.screenshot.get_preview(500, 500)
+        self.screenshot.add_effect(CropEffect((0, 0, 1000, 1000)))
+
+        # The old preview is used until the new one is rendered
+        self.assertEqual((500, 281), self.screenshot.get_preview(500, 500, quick=True).size)
+        self.assertIsNone(self.screenshot._rendered)
+
+        self.assertEqual((500, 500), self.screenshot.get_preview(500, 500).size)
+        self.assertIsNone(self.screenshot._stale_preview_levels)
+
+    def test_quick_preview_doesnt_decode(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 200)).save(buffer, "PNG")
+        screenshot = Screenshot.from_bytes(buffer.getvalue())
+
+        preview = screenshot.get_preview(100, 100, with_border=True, quick=True)
+
+        self.assertEqual((104, 54), preview.size)
+        self.assertIsNone(screenshot._image)
+
+    def test_rendered_once(self):
+        self.screenshot.add_effect(CropEffect((0, 0, 1000, 1000)))
+        render = Screenshot._render
+
+        def slow_render(screenshot, version):
+            time.sleep(0.1)
+            return render(screenshot, version)
+
+        with patch.object(Screenshot, "_render", autospec=True, side_effect=slow_render) as mocked:
+            threads = [threading.Thread(target=self.screenshot.get_image) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, mocked.call_count)
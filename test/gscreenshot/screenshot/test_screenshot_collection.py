@@ -0,0 +1,96 @@
+import io
+import os
+import unittest
+
+from PIL import Image
+
+from src.gscreenshot.screenshot import Screenshot, ScreenshotCollection
+
+
+class ScreenshotCollectionMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        # Each screenshot holds 100x100x3 = 30000 bytes
+        self.collection = ScreenshotCollection(memory_budget=70000)
+        self.screenshots = [
+            Screenshot(Image.new("RGB", (100, 100), (i * 50, 0, 0))) for i in range(4)
+        ]
+
+    def test_spill_least_recently_viewed(self):
+        for screenshot in self.screenshots:
+            self.collection.append(screenshot)
+            self.collection.cursor_to_end()
+
+        self.assertTrue(self.screenshots[0].is_spilled())
+        self.assertTrue(self.screenshots[1].is_spilled())
+        self.assertFalse(self.screenshots[2].is_spilled())
+        self.assertFalse(self.screenshots[3].is_spilled())
+
+        stats = self.collection.get_memory_stats()
+        self.assertEqual(70000, stats.budget)
+        self.assertEqual(60000, stats.resident_bytes)
+        self.assertEqual(2, stats.resident)
+        self.assertEqual(2, stats.spilled)
+        self.assertGreater(stats.spilled_bytes, 0)
+
+    def test_restore_on_cursor_move(self):
+        for screenshot in self.screenshots:
+            self.collection.append(screenshot)
+            self.collection.cursor_to_end()
+
+        self.collection.cursor_prev()
+        self.collection.cursor_prev()
+        current = self.collection.cursor_prev()
+
+        self.assertIs(self.screenshots[0], current)
+        self.assertFalse(current.is_spilled())
+        self.assertEqual((0, 0, 0), current.get_image().getpixel((0, 0)))
+        self.assertLessEqual(self.collection.get_memory_stats().resident_bytes, 70000)
+
+    def test_restore_encoded(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (100, 100), (1, 2, 3)).save(buffer, "PNG")
+        screenshot = Screenshot.from_bytes(buffer.getvalue())
+
+        self.collection.append(screenshot)
+        for other in self.screenshots:
+            self.collection.append(other)
+            self.collection.cursor_to_end()
+
+        self.assertTrue(screenshot.is_spilled())
+        self.assertEqual(buffer.getvalue(), screenshot.get_encoded("png"))
+        self.assertEqual((1, 2, 3), screenshot.get_image().getpixel((0, 0)))
+
+    def test_no_budget(self):
+        collection = ScreenshotCollection()
+        for screenshot in self.screenshots:
+            collection.append(screenshot)
+
+        self.assertFalse(any(screenshot.is_spilled() for screenshot in self.screenshots))
+        self.assertIsNone(collection.get_memory_stats().budget)
+
+    def test_clear(self):
+        for screenshot in self.screenshots:
+            self.collection.append(screenshot)
+            self.collection.cursor_to_end()
+
+        spill_dir = self.collection._get_spill_dir()
+        self.assertNotEqual([], os.listdir(spill_dir))
+
+        self.collection.clear()
+
+        self.assertEqual(0, len(self.collection))
+        self.assertIsNone(self.collection.cursor_current())
+        self.assertEqual([], self.collection._recent)
+        self.assertEqual([], os.listdir(spill_dir))
+
+    def test_remove_spilled(self):
+        for screenshot in self.screenshots:
+            self.collection.append(screenshot)
+            self.collection.cursor_to_end()
+
+        spill_dir = self.collection._get_spill_dir()
+        self.collection.remove(self.screenshots[0])
+        self.collection.replace(Screenshot(Image.new("RGB", (10, 10))), 0)
+
+        self.assertEqual([], os.listdir(spill_dir))
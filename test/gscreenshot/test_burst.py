@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import mock
+from PIL import Image
+
+from src.gscreenshot.burst import BurstCapture, BurstStats
+from src.gscreenshot.scheduler import IntervalScheduler
+from src.gscreenshot.screenshot import Screenshot
+
+
+class BurstCaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, "gscreenshot-$n.png")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def capture(self):
+        return Screenshot(Image.new("RGB", (8, 6)))
+
+    def test_run(self):
+        stats = BurstCapture(
+            self.capture, self.filename, IntervalScheduler(max_frames=5), workers=2, queue_size=5
+        ).run()
+
+        self.assertEqual(5, stats.frames_captured)
+        self.assertEqual(5, stats.frames_saved)
+        self.assertEqual(0, stats.frames_dropped)
+        self.assertEqual(self.folder.name, stats.foldername)
+        self.assertEqual(5, len(stats.total_ms))
+        self.assertEqual(
+            sorted(f"gscreenshot-000{i}.png" for i in range(1, 6)),
+            sorted(os.listdir(self.folder.name))
+        )
+
+    def test_run_foldername_interpolated(self):
+        filename = os.path.join(self.folder.name, "%Y", "gscreenshot-$n.png")
+        stats = BurstCapture(self.capture, filename, IntervalScheduler(max_frames=1)).run()
+
+        expected = os.path.join(self.folder.name, time.strftime("%Y"))
+        self.assertEqual(expected, stats.foldername)
+        self.assertEqual(["gscreenshot-0001.png"], os.listdir(expected))
+
+    def test_run_no_foldername(self):
+        cwd = os.getcwd()
+        os.chdir(self.folder.name)
+        try:
+            stats = BurstCapture(
+                self.capture, "gscreenshot-$n.png", IntervalScheduler(max_frames=1)
+            ).run()
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(".", stats.foldername)
+
+    def test_run_interval(self):
+        stats = BurstCapture(
+            self.capture, self.filename, IntervalScheduler(50, max_frames=3)
+        ).run()
+        self.assertGreaterEqual(stats.elapsed, 0.1)
+
+    def test_run_capture_failed(self):
+        stats = BurstCapture(lambda: None, self.filename, IntervalScheduler(max_frames=3)).run()
+        self.assertEqual(0, stats.frames_captured)
+        self.assertEqual(3, stats.frames_failed)
+        self.assertEqual([], os.listdir(self.folder.name))
+
+    @mock.patch('src.gscreenshot.burst.SaveAction')
+    def test_run_drops_frames(self, save_action):
+        release = threading.Event()
+
+        def slow_save(screenshot):
+            release.wait(5)
+            return "potato.png"
+
+        save_action.return_value.execute.side_effect = slow_save
+
+        def capture():
+            # Only let the worker go once the queue is full
+            if stats_frames[0] == 3:
+                release.set()
+            stats_frames[0] += 1
+            return self.capture()
+
+        stats_frames = [0]
+        stats = BurstCapture(
+            capture, self.filename, IntervalScheduler(max_frames=5), workers=1, queue_size=1
+        ).run()
+
+        self.assertEqual(5, stats.frames_captured)
+        self.assertGreater(stats.frames_dropped, 0)
+        self.assertEqual(5, stats.frames_saved + stats.frames_dropped)
+
+    def test_report(self):
+        stats = BurstStats(
+            frames_requested=2, interval_ms=100, frames_captured=2, frames_saved=2,
+            elapsed=0.5, capture_ms=[10, 20], queued_ms=[1, 2], encode_ms=[30, 40],
+            total_ms=[41, 62]
+        )
+        report = stats.report()
+
+        self.assertIn("2/2 frames saved", report)
+        self.assertIn("0 skipped", report)
+        self.assertIn("4.0 fps (target 10.0 fps)", report)
+        self.assertIn("capture  mean 15.0 ms, p95 20.0 ms, max 20.0 ms", report)
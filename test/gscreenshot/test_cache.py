@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+import mock
+
+from src.gscreenshot.cache import BackendProbeCache
+
+
+class BackendProbeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(os.environ, {
+            'XDG_CACHE_HOME': self.cache_dir.name,
+            'XDG_SESSION_TYPE': 'x11',
+            'PATH': self.cache_dir.name,
+        })
+        self.env.start()
+        BackendProbeCache._instance = None
+
+        self.executable = os.path.join(self.cache_dir.name, "potato")
+        with open(self.executable, "w", encoding="UTF-8") as executable:
+            executable.write("")
+
+    def tearDown(self):
+        BackendProbeCache._instance = None
+        self.env.stop()
+        self.cache_dir.cleanup()
+
+    def test_probe_is_cached_between_runs(self):
+        probe = Mock(return_value="1.2")
+        self.assertEqual("1.2", BackendProbeCache.load().probe("potato", ["potato"], probe))
+
+        BackendProbeCache._instance = None
+        self.assertEqual("1.2", BackendProbeCache.load().probe("potato", ["potato"], probe))
+        probe.assert_called_once()
+
+    def test_probe_invalidated_by_mtime(self):
+        probe = Mock(return_value=True)
+        BackendProbeCache.load().probe("potato", ["potato"], probe)
+
+        os.utime(self.executable, (0, 0))
+        BackendProbeCache.load().probe("potato", ["potato"], probe)
+        self.assertEqual(2, probe.call_count)
+
+    def test_probe_invalidated_by_session(self):
+        probe = Mock(return_value=True)
+        BackendProbeCache.load().probe("potato", ["potato"], probe)
+
+        BackendProbeCache._instance = None
+        with mock.patch.dict(os.environ, {'XDG_SESSION_TYPE': 'wayland'}):
+            BackendProbeCache.load().probe("potato", ["potato"], probe)
+
+        self.assertEqual(2, probe.call_count)
+
+    def test_clear(self):
+        probe = Mock(return_value=True)
+        BackendProbeCache.load().probe("potato", ["potato"], probe)
+
+        BackendProbeCache.clear()
+        self.assertFalse(os.path.exists(BackendProbeCache.get_cache_path()))
+        BackendProbeCache.load().probe("potato", ["potato"], probe)
+        self.assertEqual(2, probe.call_count)
@@ -0,0 +1,107 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import os
+import tempfile
+import unittest
+import mock
+from PIL import Image
+
+from gscreenshot.collection_saver import CollectionSaver
+from gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.actions import SaveAction
+
+
+class CollectionSaverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.screenshots = [
+            Screenshot(Image.new("RGB", (20 + i, 10), (i * 40, 0, 0))) for i in range(4)
+        ]
+        self.progress = mock.Mock()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def assert_saved(self):
+        self.assertEqual(
+            ["gscreenshot-1.png", "gscreenshot-2.png", "gscreenshot-3.png", "gscreenshot-4.png"],
+            sorted(os.listdir(self.folder.name))
+        )
+        for i, screenshot in enumerate(self.screenshots):
+            fname = os.path.join(self.folder.name, f"gscreenshot-{i + 1}.png")
+            self.assertEqual((20 + i, 10), Image.open(fname).size)
+            self.assertEqual(fname, screenshot.get_saved_path())
+
+        self.progress.assert_called_with(4, 4)
+        self.assertEqual(4, self.progress.call_count)
+
+    def test_save_in_order(self):
+        saver = CollectionSaver(self.folder.name, max_workers=1, progress=self.progress)
+
+        self.assertEqual(4, saver.save(self.screenshots))
+        self.assert_saved()
+
+    @mock.patch('gscreenshot.collection_saver.os.cpu_count', return_value=2)
+    @mock.patch('gscreenshot.collection_saver.os.sched_getaffinity', return_value={0, 1},
+                create=True)
+    @mock.patch.object(CollectionSaver, "MIN_POOL_PIXELS", 0)
+    def test_save_in_processes(self, *_):
+        saver = CollectionSaver(self.folder.name, progress=self.progress)
+
+        self.assertEqual(2, saver.get_worker_count(self.screenshots))
+        self.assertEqual(4, saver.save(self.screenshots))
+        self.assert_saved()
+
+    # The failed future is seen first, while the other is already saved
+    @mock.patch('gscreenshot.collection_saver.wait',
+                side_effect=lambda running, return_when: (list(running), set()))
+    @mock.patch.object(CollectionSaver, "get_worker_count", return_value=2)
+    def test_save_pool_broken(self, *_):
+        def execute_in(action, screenshot, executor):
+            future = Future()
+            if action.params.filename.endswith("-2.png"):
+                future.set_result(action.execute(screenshot))
+            else:
+                future.set_exception(BrokenProcessPool("potato"))
+            return future
+
+        saver = CollectionSaver(self.folder.name, progress=self.progress)
+        with mock.patch.object(SaveAction, "execute_in", autospec=True,
+                               side_effect=execute_in) as mocked:
+            self.assertEqual(4, saver.save(self.screenshots))
+
+        self.assertEqual(2, mocked.call_count)
+        self.assert_saved()
+
+    def test_save_existing(self):
+        open(os.path.join(self.folder.name, "gscreenshot-2.png"), "wb").close()
+        saver = CollectionSaver(self.folder.name, max_workers=1)
+
+        self.assertEqual(3, saver.save(self.screenshots))
+        self.assertEqual(0, os.path.getsize(os.path.join(self.folder.name, "gscreenshot-2.png")))
+
+    @mock.patch('gscreenshot.collection_saver.os.cpu_count', return_value=8)
+    @mock.patch('gscreenshot.collection_saver.os.sched_getaffinity', return_value=set(range(8)),
+                create=True)
+    @mock.patch.object(CollectionSaver, "MIN_POOL_PIXELS", 0)
+    def test_get_worker_count_memory_budget(self, *_):
+        screenshots = [Screenshot(Image.new("RGB", (100, 100)))] * 8
+        job_bytes = 100 * 100 * 3 * CollectionSaver.COPIES_PER_JOB
+
+        saver = CollectionSaver(self.folder.name, memory_budget=job_bytes * 3, max_workers=8)
+        self.assertEqual(3, saver.get_worker_count(screenshots))
+
+        saver = CollectionSaver(self.folder.name, memory_budget=0, max_workers=8)
+        self.assertEqual(1, saver.get_worker_count(screenshots))
+
+    @mock.patch('gscreenshot.collection_saver.os.cpu_count', return_value=8)
+    @mock.patch('gscreenshot.collection_saver.os.sched_getaffinity', return_value=set(range(8)),
+                create=True)
+    def test_get_worker_count_small_collection(self, *_):
+        saver = CollectionSaver(self.folder.name, max_workers=8)
+        self.assertEqual(1, saver.get_worker_count(self.screenshots))
+
+    def test_get_worker_count_screenshots(self):
+        saver = CollectionSaver(self.folder.name, max_workers=8)
+        self.assertEqual(1, saver.get_worker_count(self.screenshots[:1]))
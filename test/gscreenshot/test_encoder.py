@@ -0,0 +1,178 @@
+import os
+import tempfile
+import threading
+import unittest
+from PIL import Image, ImageChops, ImageDraw
+
+from gscreenshot.encoder import (
+    DEFAULT_ENCODER_PROFILE,
+    EncoderService,
+    get_encoder_options,
+    set_default_encoder_profile,
+    to_lossless_palette,
+)
+from src.gscreenshot.screenshot import Screenshot
+from gscreenshot.screenshot.actions import SaveAction, ScreenshotActionError
+
+
+class EncoderServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = EncoderService()
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_submit(self):
+        future = self.service.submit(lambda a, b: a + b, 1, b=2)
+        self.assertEqual(3, future.result(timeout=5))
+
+    def test_callback_before_wait(self):
+        release = threading.Event()
+        finished = []
+
+        future = self.service.submit(release.wait, callback=finished.append)
+        self.assertEqual(1, self.service.pending())
+        self.assertFalse(self.service.wait(timeout=0.01))
+
+        release.set()
+        self.assertTrue(self.service.wait(timeout=5))
+        self.assertEqual([future], finished)
+        self.assertEqual(0, self.service.pending())
+
+    def test_error(self):
+        def fail():
+            raise ScreenshotActionError("potato")
+
+        future = self.service.submit(fail)
+        self.assertTrue(self.service.wait(timeout=5))
+        self.assertIsInstance(future.exception(), ScreenshotActionError)
+
+    def test_callback_error(self):
+        def fail(_):
+            raise ValueError
+
+        self.service.submit(lambda: None, callback=fail)
+        self.assertTrue(self.service.wait(timeout=5))
+
+
+class SaveActionAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = EncoderService()
+        self.folder = tempfile.TemporaryDirectory()
+        self.screenshot = Screenshot(Image.new("RGB", (20, 10)))
+
+    def tearDown(self):
+        self.service.shutdown()
+        self.folder.cleanup()
+
+    def test_execute_async(self):
+        filename = os.path.join(self.folder.name, "potato.png")
+        finished = []
+
+        future = SaveAction(filename=filename).execute_async(
+            self.screenshot, callback=finished.append, service=self.service
+        )
+
+        self.assertEqual(filename, future.result(timeout=5))
+        self.assertTrue(self.service.wait(timeout=5))
+        self.assertEqual([future], finished)
+        self.assertEqual(filename, self.screenshot.get_saved_path())
+        self.assertEqual((20, 10), Image.open(filename).size)
+
+    def test_execute_async_bad_format(self):
+        filename = os.path.join(self.folder.name, "potato.notaformat")
+
+        with self.assertRaises(ScreenshotActionError):
+            SaveAction(filename=filename).execute_async(self.screenshot, service=self.service)
+
+        self.assertEqual(0, self.service.pending())
+
+    def test_execute_async_nothing_to_save(self):
+        finished = []
+        future = SaveAction().execute_async(None, callback=finished.append, service=self.service)
+
+        self.assertIsNone(future.result(timeout=0))
+        self.assertEqual([future], finished)
+
+
+class EncoderProfileTest(unittest.TestCase):
+
+    def tearDown(self):
+        set_default_encoder_profile(DEFAULT_ENCODER_PROFILE)
+
+    def test_get_encoder_options(self):
+        self.assertEqual({"compress_level": 1}, get_encoder_options("png", "fast"))
+        self.assertEqual(
+            {"compress_level": 9, "optimize": True}, get_encoder_options("png", "smallest")
+        )
+        self.assertEqual({}, get_encoder_options("bmp", "smallest"))
+
+    def test_get_encoder_options_webp(self):
+        self.assertFalse(get_encoder_options("webp", "balanced")["lossless"])
+        self.assertTrue(get_encoder_options("webp", "smallest")["lossless"])
+
+    def test_get_encoder_options_default(self):
+        self.assertEqual({"compress_level": 6}, get_encoder_options("png"))
+
+        set_default_encoder_profile("fast")
+        self.assertEqual({"compress_level": 1}, get_encoder_options("png"))
+
+    def test_get_encoder_options_unknown(self):
+        self.assertEqual({"compress_level": 6}, get_encoder_options("png", "potato"))
+
+        with self.assertRaises(ValueError):
+            set_default_encoder_profile("potato")
+
+    def test_save_with_profile(self):
+        image = Image.linear_gradient("L").resize((200, 200)).convert("RGB")
+        sizes = {}
+
+        with tempfile.TemporaryDirectory() as folder:
+            for profile in ("fast", "smallest"):
+                filename = os.path.join(folder, f"{profile}.png")
+                SaveAction(filename=filename, encoder_profile=profile).execute(Screenshot(image))
+                sizes[profile] = os.path.getsize(filename)
+
+        self.assertLess(sizes["smallest"], sizes["fast"])
+
+
+class AdaptivePaletteTest(unittest.TestCase):
+
+    def setUp(self):
+        # Antialiased text has many colours a few steps apart
+        self.image = Image.new("RGB", (400, 300), (250, 250, 250))
+        draw = ImageDraw.Draw(self.image)
+        for line in range(0, 300, 14):
+            draw.text((5, line), "gscreenshot adaptive palette " * 3, fill=(20, 20, 20))
+        draw.rectangle((300, 200, 380, 280), fill=(66, 133, 244))
+
+    def test_to_lossless_palette(self):
+        paletted = to_lossless_palette(self.image)
+
+        self.assertEqual("P", paletted.mode)
+        self.assertIsNone(ImageChops.difference(paletted.convert("RGB"), self.image).getbbox())
+
+    def test_to_lossless_palette_too_many_colours(self):
+        image = Image.merge("RGB", [Image.linear_gradient("L")] * 2 + [Image.radial_gradient("L")])
+        self.assertIsNone(to_lossless_palette(image))
+
+    def test_to_lossless_palette_rgba(self):
+        self.assertIsNone(to_lossless_palette(self.image.convert("RGBA")))
+
+    def test_save_with_palette(self):
+        sizes = {}
+
+        with tempfile.TemporaryDirectory() as folder:
+            for adaptive_palette in (False, True):
+                filename = os.path.join(folder, f"{adaptive_palette}.png")
+                SaveAction(filename=filename, adaptive_palette=adaptive_palette).execute(
+                    Screenshot(self.image)
+                )
+                sizes[adaptive_palette] = os.path.getsize(filename)
+
+                with Image.open(filename) as saved:
+                    self.assertEqual("P" if adaptive_palette else "RGB", saved.mode)
+
+        self.assertLess(sizes[True], sizes[False])
@@ -13,6 +13,12 @@ class GscreenshotTest(unittest.TestCase):
         self.fake_image = Mock()
         self.fake_screenshot = Mock()
         self.fake_screenshot.get_image.return_value = self.fake_image
+        self.fake_screenshot.get_rendered_image.return_value = self.fake_image
+        self.fake_screenshot.get_encoded.return_value = None
+        self.fake_screenshot.get_artifact.return_value = None
+        self.fake_screenshot.get_artifact_path.return_value = None
+        self.fake_screenshot.get_memory_usage.return_value = 0
+        self.fake_screenshot.is_spilled.return_value = False
         self.fake_screenshooter.__utilityname__ = "mock screenshotter"
 
         self.fake_screenshooter.image = self.fake_image
@@ -142,6 +148,32 @@ class GscreenshotTest(unittest.TestCase):
 
         self.assertEqual(self.fake_image, actual)
 
+    @mock.patch('src.gscreenshot.BurstCapture')
+    def test_screenshot_timelapse_filename(self, burst_capture):
+        for filename, expected in (
+            ("potato-$n.png", "potato-$n.png"),
+            ("potato.png", "potato-$n.png"),
+            ("potatoes", "potatoes/gscreenshot-$n.png"),
+        ):
+            self.gscreenshot.screenshot_timelapse(1000, filename, max_frames=2)
+            self.assertEqual(expected, burst_capture.call_args[0][1])
+
+        scheduler = burst_capture.call_args[0][2]
+        self.assertEqual(2, scheduler.max_frames)
+        self.assertTrue(scheduler.skip_if_behind)
+
+    @mock.patch('src.gscreenshot.BurstCapture')
+    def test_screenshot_burst(self, burst_capture):
+        self.gscreenshot.screenshot_burst(3, 100, "potatoes", region=(1, 2, 3, 4))
+
+        capture, filename, scheduler = burst_capture.call_args[0]
+        self.assertEqual("potatoes/gscreenshot-$n.png", filename)
+        self.assertEqual(3, scheduler.max_frames)
+        self.assertFalse(scheduler.skip_if_behind)
+
+        capture()
+        self.fake_screenshooter.grab_region_.assert_called_once_with((1, 2, 3, 4), 0, False, None)
+
     def test_get_thumbnail(self):
         fake_thumbnail = Mock()
         fake_thumbnail.thumbnail.return_falue = fake_thumbnail
@@ -194,7 +226,8 @@ class GscreenshotTest(unittest.TestCase):
 
         self.gscreenshot.screenshot_full_display()
         success = self.gscreenshot.save_last_image("potato.png")
-        self.fake_image.save.assert_called_with(mock_open(), "PNG", exif=ANY)
+        self.fake_image.save.assert_called_with(ANY, "PNG", compress_level=ANY)
+        mock_open.assert_any_call("potato.png", "wb")
         self.assertTrue(success)
 
     def test_save_last_image_bad_extension(self):
@@ -0,0 +1,64 @@
+import json
+import subprocess
+import unittest
+from unittest.mock import patch
+
+from src.gscreenshot.outputs import Output, get_outputs
+from src.gscreenshot.outputs.output_layout import parse_wlr_randr_json
+
+
+class OutputsTest(unittest.TestCase):
+
+    def test_get_region(self):
+        output = Output("DP-1", 1920, 0, 1280, 720, 1.5)
+        self.assertEqual((2880, 0, 4800, 1080), output.get_region())
+        self.assertEqual((3840, 0, 6400, 1440), output.get_region(2))
+
+    def test_parse_wlr_randr_json(self):
+        randr_output = json.dumps([
+            {
+                "name": "eDP-1",
+                "enabled": True,
+                "modes": [
+                    {"width": 1920, "height": 1080, "current": False},
+                    {"width": 2560, "height": 1440, "current": True},
+                ],
+                "position": {"x": 0, "y": 0},
+                "transform": "normal",
+                "scale": 2.0,
+            },
+            {
+                "name": "DP-1",
+                "enabled": True,
+                "modes": [{"width": 1920, "height": 1080, "current": True}],
+                "position": {"x": 1280, "y": 0},
+                "transform": "90",
+                "scale": 1.0,
+            },
+            {
+                "name": "HDMI-A-1",
+                "enabled": False,
+                "modes": [],
+                "position": {"x": 0, "y": 0},
+                "scale": 1.0,
+            },
+        ])
+
+        self.assertEqual([
+            Output("eDP-1", 0, 0, 1280, 720, 2.0),
+            Output("DP-1", 1280, 0, 1080, 1920, 1.0),
+        ], parse_wlr_randr_json(randr_output))
+
+    @patch("src.gscreenshot.outputs.output_layout.session_is_wayland", return_value=True)
+    @patch("src.gscreenshot.outputs.output_layout.find_executable", return_value="wlr-randr")
+    @patch("src.gscreenshot.outputs.output_layout.subprocess.check_output")
+    def test_get_outputs_error(self, check_output, *_):
+        check_output.side_effect = subprocess.CalledProcessError(1, "wlr-randr")
+        self.assertEqual([], get_outputs())
+
+        check_output.side_effect = None
+        check_output.return_value = "not json"
+        self.assertEqual([], get_outputs())
+
+        check_output.return_value = json.dumps([{"enabled": True, "modes": [{"current": True}]}])
+        self.assertEqual([], get_outputs())
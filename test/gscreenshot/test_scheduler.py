@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+from src.gscreenshot.scheduler import IntervalScheduler
+
+
+class IntervalSchedulerTest(unittest.TestCase):
+
+    def test_max_frames(self):
+        scheduler = IntervalScheduler(max_frames=3)
+        self.assertEqual([1, 2, 3], list(scheduler))
+        self.assertEqual(3, scheduler.frames)
+
+    def test_max_duration(self):
+        scheduler = IntervalScheduler(40, max_duration=0.1)
+        self.assertEqual([1, 2, 3], list(scheduler))
+
+    def test_does_not_drift(self):
+        scheduler = IntervalScheduler(20, max_frames=5)
+        start = time.monotonic()
+        due = []
+        for _ in scheduler:
+            due.append(time.monotonic() - start)
+            # Work that takes most of the interval doesn't push frames back
+            time.sleep(0.015)
+
+        self.assertLess(due[-1], 0.08 + 0.015)
+
+    def test_skip_if_behind(self):
+        scheduler = IntervalScheduler(20, max_frames=2)
+        for number in scheduler:
+            if number == 1:
+                time.sleep(0.07)
+
+        self.assertIn(scheduler.skipped, (2, 3))
+
+    def test_catch_up(self):
+        scheduler = IntervalScheduler(20, max_frames=3, skip_if_behind=False)
+        for number in scheduler:
+            if number == 1:
+                time.sleep(0.07)
+
+        self.assertEqual(0, scheduler.skipped)
+        self.assertEqual(3, scheduler.frames)
+
+    def test_stop(self):
+        scheduler = IntervalScheduler(10000)
+        threading.Timer(0.05, scheduler.stop).start()
+
+        start = time.monotonic()
+        self.assertEqual([1], list(scheduler))
+        self.assertLess(time.monotonic() - start, 5)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+import mock
+from PIL import Image, ImageDraw
+
+from src.gscreenshot.scheduler import IntervalScheduler
+from src.gscreenshot.screenshot import Screenshot
+from src.gscreenshot.watch import RegionWatcher, TileChangeDetector
+
+
+class TileChangeDetectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = TileChangeDetector()
+        self.image = Image.new("RGB", (640, 480), (255, 255, 255))
+
+    def test_no_reference(self):
+        self.assertEqual(1.0, self.detector.changed_fraction(self.image))
+
+    def test_unchanged(self):
+        self.detector.set_reference(self.image)
+        self.assertEqual(0, self.detector.changed_fraction(self.image.copy()))
+
+    def test_changed(self):
+        self.detector.set_reference(self.image)
+
+        changed = self.image.copy()
+        ImageDraw.Draw(changed).rectangle((0, 0, 319, 479), fill=(0, 0, 0))
+
+        self.assertAlmostEqual(0.5, self.detector.changed_fraction(changed), places=2)
+
+    def test_below_tolerance(self):
+        self.detector.set_reference(self.image)
+        self.assertEqual(
+            0, self.detector.changed_fraction(Image.new("RGB", (640, 480), (250, 250, 250)))
+        )
+
+    def test_size_changed(self):
+        self.detector.set_reference(self.image)
+        self.assertEqual(1.0, self.detector.changed_fraction(Image.new("RGB", (320, 240))))
+
+
+class RegionWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, "watch", "gscreenshot-$n.png")
+        self.frames = [
+            Image.new("RGB", (64, 64), (255, 255, 255)),
+            Image.new("RGB", (64, 64), (255, 255, 255)),
+            Image.new("RGB", (64, 64), (0, 0, 0)),
+            Image.new("RGB", (64, 64), (0, 0, 0)),
+        ]
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def capture(self):
+        return Screenshot(self.frames.pop(0))
+
+    def test_run(self):
+        stats = RegionWatcher(
+            self.capture, (0, 0, 64, 64), self.filename, IntervalScheduler(max_frames=4)
+        ).run()
+
+        self.assertEqual(4, stats.polls)
+        self.assertEqual(4, stats.captures)
+        self.assertEqual(2, stats.frames_saved)
+        self.assertEqual(os.path.join(self.folder.name, "watch"), stats.foldername)
+        self.assertEqual(
+            ["gscreenshot-0001.png", "gscreenshot-0002.png"],
+            sorted(os.listdir(os.path.join(self.folder.name, "watch")))
+        )
+
+    def test_run_max_frames(self):
+        stats = RegionWatcher(
+            self.capture, (0, 0, 64, 64), self.filename, IntervalScheduler(max_frames=4),
+            max_frames=1
+        ).run()
+
+        self.assertEqual(1, stats.polls)
+        self.assertEqual(1, stats.frames_saved)
+
+    def test_run_damage_monitor(self):
+        damage_monitor = mock.Mock()
+        damage_monitor.damaged.side_effect = [False, True, True]
+
+        stats = RegionWatcher(
+            self.capture, (0, 0, 64, 64), self.filename, IntervalScheduler(max_frames=4),
+            damage_monitor=damage_monitor
+        ).run()
+
+        self.assertEqual(4, stats.polls)
+        self.assertEqual(1, stats.skipped)
+        self.assertEqual(3, stats.captures)
+        self.assertEqual(2, stats.frames_saved)
+        damage_monitor.damaged.assert_called_with((0, 0, 64, 64))
+        damage_monitor.close.assert_called_once()
+
+    def test_run_capture_failed(self):
+        stats = RegionWatcher(
+            lambda: None, (0, 0, 64, 64), self.filename, IntervalScheduler(max_frames=2)
+        ).run()
+
+        self.assertEqual(2, stats.frames_failed)
+        self.assertEqual(0, stats.frames_saved)